@@ -1,12 +1,15 @@
 import os
-import requests
+from utils.http import get_session, response_text
+from utils.timing import span
+from utils import metrics
+from config import GEMINI_API_BASE, GEMINI_MODEL
 import json
 from bs4 import BeautifulSoup
 
 class AIAuditAnalyzer:
     def __init__(self, api_key=None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite:generateContent?key={self.api_key}"
+        self.api_url = f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:generateContent?key={self.api_key}"
 
     def analyze(self, url, html_content=None):
         """
@@ -25,9 +28,9 @@ class AIAuditAnalyzer:
         # Fetch content if not provided
         if not html_content:
             try:
-                response = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+                response = get_session().get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
                 if response.status_code == 200:
-                    html_content = response.text
+                    html_content = response_text(response)
                 else:
                     return {"error": f"Failed to fetch website: {response.status_code}"}
             except Exception as e:
@@ -53,10 +56,12 @@ class AIAuditAnalyzer:
         }
         
         try:
-            response = requests.post(self.api_url, json=payload, timeout=30)
+            with span("gemini.review", kind="ai"), metrics.gemini_call("review") as call:
+                response = call["response"] = get_session().post(self.api_url, json=payload, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
+                metrics.count_gemini_tokens("review", result)
                 if 'candidates' in result and len(result['candidates']) > 0:
                     ai_text = result['candidates'][0]['content']['parts'][0]['text'].strip()
                     # Clean up markdown code blocks if present
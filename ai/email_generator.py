@@ -1,11 +1,15 @@
 import os
-import requests
+from utils.http import get_session
+from utils.timing import span
+from utils import metrics
+from ai.score_calculator import format_score, format_page_weight, format_vitals
+from config import GEMINI_API_BASE, GEMINI_MODEL
 import json
 
 class EmailGenerator:
     def __init__(self, api_key=None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite:generateContent?key={self.api_key}"
+        self.api_url = f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:generateContent?key={self.api_key}"
 
     def generate(self, business_info, audit_data, template):
         """
@@ -37,10 +41,12 @@ class EmailGenerator:
         }
         
         try:
-            response = requests.post(self.api_url, json=payload, timeout=30)
+            with span("gemini.email", kind="ai"), metrics.gemini_call("email") as call:
+                response = call["response"] = get_session().post(self.api_url, json=payload, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
+                metrics.count_gemini_tokens("email", result)
                 if 'candidates' in result and len(result['candidates']) > 0:
                     return result['candidates'][0]['content']['parts'][0]['text'].strip()
                 else:
@@ -56,10 +62,11 @@ class EmailGenerator:
         website = business_info.get('website', 'their website')
         
         # Extract scores
-        perf = audit_data.get('performance_score', 0)
-        seo = audit_data.get('seo_score', 0)
-        ux = audit_data.get('ux_score', 0)
-        mobile = audit_data.get('mobile_score', 0)
+        # Scores are None for categories a quick or timed-out audit did not measure
+        perf = format_score(audit_data.get('performance_score', 0))
+        seo = format_score(audit_data.get('seo_score', 0))
+        ux = format_score(audit_data.get('ux_score', 0))
+        mobile = format_score(audit_data.get('mobile_score', 0))
         overall = audit_data.get('overall_score', 0)
         
         # Extract key issues if available
@@ -80,11 +87,13 @@ You must strictly follow the template structure but fill in the placeholders wit
 - Website: {website}
 
 **Audit Results:**
-- Overall Score: {overall}/100
-- Performance: {perf}/100
-- SEO: {seo}/100
-- UX: {ux}/100
-- Mobile: {mobile}/100
+- Overall Score: {format_score(overall)}
+- Performance: {perf}
+- SEO: {seo}
+- UX: {ux}
+- Mobile: {mobile}
+- Page weight: {format_page_weight(audit_data.get('assets')) or "not measured"}
+- Mobile load in a real browser: {format_vitals(audit_data.get('mobile')) or "not measured"}
 
 **Key Issues Found:**
 - {issues_str}
@@ -1,38 +1,100 @@
+# Audit tiers: "quick" scores only the static analyzers (one fetch, no browser or
+# Gemini); "deep" adds the mobile test and link check (and usually the AI review).
+QUICK = "quick"
+DEEP = "deep"
+
+def format_score(score):
+    """A category score for reports and prompts: "80/100", or "not measured" (quick or timed-out audits)."""
+    return f"{score}/100" if score is not None else "not measured"
+
+_ASSET_LABELS = {"script": "scripts", "stylesheet": "CSS", "image": "images", "font": "fonts", "media": "media", "other": "other"}
+
+def format_page_weight(assets, detail=True):
+    """
+    Page weight of a deep audit for reports and prompts, e.g. "2.4 MB (38 files)",
+    with the heaviest asset kinds when `detail` is set; None if not measured.
+    """
+    if not assets or assets.get("page_weight_kb") is None:
+        return None
+    files = assets.get("sized", 0) + 1  # the page itself
+    heaviest = sorted(assets.get("by_kind", {}).items(), key=lambda item: -item[1]["kb"])[:3]
+    parts = ", ".join(f"{_format_kb(totals['kb'])} {_ASSET_LABELS.get(kind, kind)}" for kind, totals in heaviest)
+    return f"{_format_kb(assets['page_weight_kb'])} ({files} files" + (f": {parts})" if detail and parts else ")")
+
+def format_vitals(mobile_data):
+    """Core Web Vitals measured by the mobile test, e.g. "LCP 3.2s, CLS 0.05, TBT 120 ms", or None."""
+    vitals = (mobile_data or {}).get("vitals")
+    if not vitals:
+        return None
+    parts = [f"LCP {vitals['lcp_ms'] / 1000:.1f}s" if vitals.get("lcp_ms") is not None else None,
+             f"CLS {vitals['cls']:.2f}" if vitals.get("cls") is not None else None,
+             f"TBT {vitals['tbt_ms']} ms" if vitals.get("tbt_ms") is not None else None]
+    return ", ".join(part for part in parts if part) or None
+
+def _format_kb(kb):
+    return f"{kb / 1024:.1f} MB" if kb >= 1024 else f"{kb:.0f} KB"
+
 class ScoreCalculator:
-    def calculate(self, performance_data, seo_data, ux_data, mobile_data, broken_links_data):
+    # Weights (can be adjusted)
+    WEIGHTS = {
+        "performance": 0.25,
+        "seo": 0.25,
+        "ux": 0.20,
+        "mobile": 0.20,
+        "links": 0.10
+    }
+
+    def calculate(self, performance_data, seo_data, ux_data, mobile_data=None, broken_links_data=None):
         """Calculates the overall weighted score."""
+        return self.score(performance_data, seo_data, ux_data, mobile_data, broken_links_data)["overall_score"]
+
+    def score(self, performance_data, seo_data, ux_data, mobile_data=None, broken_links_data=None):
+        """
+        Calculates the overall score and records the tier that produced it.
+
+        Without mobile and link results (a quick audit), or when an analyzer
+        timed out or failed (its score is None), the weights of the categories that
+        were measured are scaled up to sum to 1, so every audit scores 0-100.
+
+        Returns:
+            dict: overall_score, tier ("quick" or "deep"), the weights used and
+                the categories left unmeasured.
+        """
+        parts = {"performance": performance_data, "seo": seo_data, "ux": ux_data}
+        tier = QUICK
+        if mobile_data is not None and broken_links_data is not None:
+            parts.update(mobile=mobile_data, links=broken_links_data)
+            tier = DEEP
         
-        # Weights (can be adjusted)
-        weights = {
-            "performance": 0.25,
-            "seo": 0.25,
-            "ux": 0.20,
-            "mobile": 0.20,
-            "links": 0.10
-        }
-        
-        p_score = performance_data.get("score", 0)
-        s_score = seo_data.get("score", 0)
-        u_score = ux_data.get("score", 0)
-        m_score = mobile_data.get("score", 0)
-        l_score = broken_links_data.get("score", 0)
-        
-        overall_score = (
-            p_score * weights["performance"] +
-            s_score * weights["seo"] +
-            u_score * weights["ux"] +
-            m_score * weights["mobile"] +
-            l_score * weights["links"]
-        )
+        measured = {name: data for name, data in parts.items() if data.get("score", 0) is not None}
+        # Deep weights already sum to 1
+        total_weight = sum(self.WEIGHTS[name] for name in measured)
+        scale = 1 if len(measured) == len(self.WEIGHTS) or not total_weight else 1 / total_weight
+        weights = {name: self.WEIGHTS[name] * scale for name in measured}
+        overall_score = sum(data.get("score", 0) * weights[name] for name, data in measured.items())
         
-        return int(overall_score)
+        return {
+            # None when no category could be measured at all
+            "overall_score": int(overall_score) if measured else None,
+            "tier": tier,
+            "weights": {name: round(weight, 3) for name, weight in weights.items()},
+            "unmeasured": [name for name in parts if name not in measured]
+        }
+
+    def opportunity(self, performance_data, seo_data, ux_data):
+        """How much a site could improve (100 - its quick score, 0 if unmeasured); deep audits go to the highest."""
+        overall_score = self.calculate(performance_data, seo_data, ux_data)
+        return 100 - overall_score if overall_score is not None else 0
 
-    def get_priority_list(self, performance_data, seo_data, ux_data, mobile_data, broken_links_data):
+    def get_priority_list(self, performance_data, seo_data, ux_data, mobile_data=None, broken_links_data=None):
         """Generates a priority list of improvements."""
         priorities = []
+        mobile_data = mobile_data or {}
+        broken_links_data = broken_links_data or {}
         
         # Performance
-        if performance_data.get("score", 0) < 60:
+        performance_score = performance_data.get("score", 0)
+        if performance_score is not None and performance_score < 60:
             priorities.append({"category": "Performance", "priority": "High", "issue": "Website is too slow"})
             
         # SEO
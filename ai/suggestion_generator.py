@@ -1,11 +1,15 @@
-import requests
+from utils.http import get_session
+from utils.timing import span
+from utils import metrics
+from ai.score_calculator import format_score
+from config import GEMINI_API_BASE, GEMINI_MODEL
 import os
 import json
 
 class SuggestionGenerator:
     def __init__(self, api_key=None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite:generateContent?key={self.api_key}"
+        self.api_url = f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:generateContent?key={self.api_key}"
 
     def generate(self, business_info, audit_summary):
         """Generate AI-powered suggestions based on audit data."""
@@ -28,10 +32,12 @@ class SuggestionGenerator:
         }
         
         try:
-            response = requests.post(self.api_url, json=payload, timeout=30)
+            with span("gemini.suggestions", kind="ai"), metrics.gemini_call("suggestions") as call:
+                response = call["response"] = get_session().post(self.api_url, json=payload, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
+                metrics.count_gemini_tokens("suggestions", result)
                 if 'candidates' in result and len(result['candidates']) > 0:
                     return result['candidates'][0]['content']['parts'][0]['text'].strip()
                 else:
@@ -46,10 +52,11 @@ class SuggestionGenerator:
         business_name = business_info.get('business_name', 'Unknown Business')
         website = business_info.get('website', 'N/A')
         
-        perf_score = audit_summary.get('performance_score', 0)
-        seo_score = audit_summary.get('seo_score', 0)
-        ux_score = audit_summary.get('ux_score', 0)
-        mobile_score = audit_summary.get('mobile_score', 0)
+        # Scores are None for categories a quick or timed-out audit did not measure
+        perf_score = format_score(audit_summary.get('performance_score', 0))
+        seo_score = format_score(audit_summary.get('seo_score', 0))
+        ux_score = format_score(audit_summary.get('ux_score', 0))
+        mobile_score = format_score(audit_summary.get('mobile_score', 0))
         overall_score = audit_summary.get('overall_score', 0)
         
         prompt = f"""You are a professional web development consultant. Analyze this website audit and provide 3 specific, actionable recommendations.
@@ -58,11 +65,11 @@ Business: {business_name}
 Website: {website}
 
 Audit Scores:
-- Performance: {perf_score}/100
-- SEO: {seo_score}/100
-- UX: {ux_score}/100
-- Mobile: {mobile_score}/100
-- Overall: {overall_score}/100
+- Performance: {perf_score}
+- SEO: {seo_score}
+- UX: {ux_score}
+- Mobile: {mobile_score}
+- Overall: {format_score(overall_score)}
 
 Provide exactly 3 specific, actionable recommendations to improve this website. Focus on the lowest-scoring areas. Format your response as:
 
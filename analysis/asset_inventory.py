@@ -0,0 +1,199 @@
+import contextvars
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urldefrag
+from bs4 import BeautifulSoup
+from utils.http import get_session, response_text
+from storage.asset_cache import get_cached_assets, save_assets
+from config import (USER_AGENT, ASSET_MAX_PER_PAGE, ASSET_CONCURRENCY, ASSET_TIMEOUT, ASSET_MAX_BYTES,
+                    ASSET_CACHE_MAX_AGE)
+
+ASSET_KINDS = ["script", "stylesheet", "image", "font", "media", "other"]
+
+_EXTENSION_KINDS = {
+    "js": "script", "mjs": "script", "css": "stylesheet",
+    "png": "image", "jpg": "image", "jpeg": "image", "gif": "image", "webp": "image", "avif": "image",
+    "svg": "image", "ico": "image", "woff": "font", "woff2": "font", "ttf": "font", "otf": "font", "eot": "font",
+    "mp4": "media", "webm": "media", "mp3": "media", "ogg": "media",
+}
+# <link rel=preload as=...> values
+_PRELOAD_KINDS = {"script": "script", "style": "stylesheet", "image": "image", "font": "font",
+                  "video": "media", "audio": "media"}
+_CSS_URL = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)", re.IGNORECASE)
+_CONTENT_RANGE_TOTAL = re.compile(r"/\s*(\d+)\s*$")
+
+class AssetInventory:
+    """
+    Page weight: finds the subresources a page loads (scripts, stylesheets, images,
+    fonts, media) and sizes them without downloading them, with a HEAD, or a
+    one-byte ranged GET when HEAD gives no size.
+
+    Sizes are shared across leads in the asset cache (storage/asset_cache.py), so a
+    CDN asset used by thousands of sites is measured once.
+    """
+
+    def __init__(self):
+        self.headers = {"User-Agent": USER_AGENT}
+
+    def collect(self, url, html):
+        """The page's subresources as [(absolute url, kind)], in document order, without duplicates."""
+        soup = BeautifulSoup(html, 'html.parser')
+        base = soup.find('base', href=True)
+        base_url = urljoin(url, base['href']) if base else url
+        found = {}
+
+        def add(src, kind=None):
+            src = (src or "").strip()
+            if not src or src.startswith(("data:", "blob:", "javascript:", "#")):
+                return
+            asset_url = urldefrag(urljoin(base_url, src))[0]
+            if asset_url.startswith(("http://", "https://")) and asset_url not in found:
+                found[asset_url] = kind or _kind_from_extension(asset_url)
+
+        for tag in soup.find_all('script', src=True):
+            add(tag['src'], "script")
+        for tag in soup.find_all('link', href=True):
+            rel = [r.lower() for r in tag.get('rel', [])]
+            if "stylesheet" in rel:
+                add(tag['href'], "stylesheet")
+            elif "preload" in rel or "modulepreload" in rel:
+                add(tag['href'], _PRELOAD_KINDS.get((tag.get('as') or "").lower()))
+            elif "icon" in rel or "apple-touch-icon" in rel:
+                add(tag['href'], "image")
+        for tag in soup.find_all(['img', 'source', 'video', 'audio', 'embed']):
+            kind = "image" if tag.name == 'img' or tag.find_parent('picture') else None
+            add(tag.get('src'), kind)
+            if tag.get('srcset'):
+                # The first candidate stands for the set; a browser loads only one of them
+                add(tag['srcset'].split(",")[0].split()[0] if tag['srcset'].strip() else None, "image")
+            if tag.get('poster'):
+                add(tag['poster'], "image")
+        # Fonts and backgrounds referenced from inline CSS
+        for css in [tag.get_text() for tag in soup.find_all('style')] + [tag['style'] for tag in soup.find_all(style=True)]:
+            for match in _CSS_URL.finditer(css):
+                add(match.group(1))
+        return list(found.items())
+
+    def measure(self, url, html, document_kb=0):
+        """
+        Sizes the page's subresources. `document_kb` (the HTML itself) is added to
+        the page weight.
+
+        Returns:
+            dict: count (assets found, at most ASSET_MAX_PER_PAGE), sized, cached
+                (sizes served from the asset cache), total_kb, by_kind
+                ({kind: {"count", "kb"}}), largest (top 5) and page_weight_kb.
+        """
+        if html is None:
+            return {"count": 0, "sized": 0, "total_kb": None, "page_weight_kb": None,
+                    "error": "Could not fetch website"}
+        assets = self.collect(url, html)
+        found = len(assets)
+        assets = assets[:ASSET_MAX_PER_PAGE]
+        kinds = dict(assets)
+
+        cached = get_cached_assets(kinds)
+        now = time.time()
+        sizes = {asset_url: entry['size'] for asset_url, entry in cached.items()
+                 if now - entry['checked_at'] < ASSET_CACHE_MAX_AGE}
+        hits = len(sizes)
+
+        pending = [asset_url for asset_url in kinds if asset_url not in sizes]
+        measured = []
+        if pending:
+            with ThreadPoolExecutor(max_workers=ASSET_CONCURRENCY, thread_name_prefix="assets") as executor:
+                # Each request runs in a copy of this context, so it stays within the
+                # audit's timing recorder and deadline
+                futures = [executor.submit(contextvars.copy_context().run, self._size, asset_url, cached.get(asset_url))
+                           for asset_url in pending]
+                for future in futures:
+                    entry = future.result()
+                    if entry is not None:
+                        measured.append(entry)
+                        sizes[entry['url']] = entry['size']
+        save_assets(measured)
+
+        by_kind = {}
+        for asset_url, size in sizes.items():
+            totals = by_kind.setdefault(kinds[asset_url], {"count": 0, "kb": 0.0})
+            totals["count"] += 1
+            totals["kb"] += size / 1024
+        total_kb = sum(totals["kb"] for totals in by_kind.values())
+        largest = sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:5]
+
+        return {
+            "count": len(assets),
+            "found": found,
+            "sized": len(sizes),
+            "cached": hits,
+            "total_kb": round(total_kb, 2),
+            "by_kind": {kind: {"count": totals["count"], "kb": round(totals["kb"], 2)}
+                        for kind, totals in sorted(by_kind.items(), key=lambda item: ASSET_KINDS.index(item[0]))},
+            "largest": [{"url": asset_url, "kind": kinds[asset_url], "kb": round(size / 1024, 2)}
+                        for asset_url, size in largest],
+            "page_weight_kb": round(document_kb + total_kb, 2)
+        }
+
+    def _size(self, asset_url, cached):
+        """
+        Size of one asset as a cache entry (url, validator, size, content_type), or
+        None if it could not be measured. A cached entry with a validator is
+        revalidated: a 304 keeps its size.
+        """
+        headers = dict(self.headers)
+        validator = cached['validator'] if cached else ''
+        if validator:
+            headers['If-None-Match' if _is_etag(validator) else 'If-Modified-Since'] = validator
+        session = get_session()
+        try:
+            response = session.head(asset_url, headers=headers, timeout=ASSET_TIMEOUT, allow_redirects=True)
+            if response.status_code == 304 and cached and cached['size'] is not None:
+                return dict(cached, url=asset_url)
+            size = _declared_size(response) if response.status_code < 400 else None
+            if size is None:
+                # No HEAD support or no Content-Length: ask for one byte and read the total from Content-Range
+                response = session.get(asset_url, headers=dict(self.headers, Range="bytes=0-0"), timeout=ASSET_TIMEOUT,
+                                       stream=True)
+                try:
+                    if response.status_code >= 400:
+                        return None
+                    size = _declared_size(response) if response.status_code == 200 else _range_total(response)
+                    if size is None:
+                        size = _count_bytes(response)
+                finally:
+                    response.close()
+        except Exception:
+            return None
+        return {"url": asset_url, "validator": _validator(response), "size": size,
+                "content_type": (response.headers.get('Content-Type') or '').split(';')[0] or None}
+
+def _kind_from_extension(asset_url):
+    path = asset_url.split('?')[0].lower()
+    return _EXTENSION_KINDS.get(path.rsplit('.', 1)[-1] if '.' in path.rsplit('/', 1)[-1] else '', "other")
+
+def _declared_size(response):
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+def _range_total(response):
+    match = _CONTENT_RANGE_TOTAL.search(response.headers.get('Content-Range', '')) if response.status_code == 206 else None
+    return int(match.group(1)) if match else None
+
+def _count_bytes(response):
+    size = 0
+    for chunk in response.iter_content(64 * 1024):
+        size += len(chunk)
+        if size >= ASSET_MAX_BYTES:
+            break
+    return size
+
+def _validator(response):
+    return response.headers.get('ETag') or response.headers.get('Last-Modified') or ''
+
+def _is_etag(validator):
+    return validator.startswith(('"', 'W/'))
+
+if __name__ == "__main__":
+    page = response_text(get_session().get("https://example.com", timeout=10))
+    print(AssetInventory().measure("https://example.com", page))
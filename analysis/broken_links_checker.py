@@ -1,4 +1,5 @@
-import requests
+from utils.http import get_session, response_text
+from utils.host_health import HostUnavailable
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from config import USER_AGENT
@@ -14,12 +15,13 @@ class BrokenLinksChecker:
             
         domain = urlparse(url).netloc
         broken_links = []
+        unchecked = 0
         checked_links = set()
         score = 100
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = get_session().get(url, headers=self.headers, timeout=10)
+            soup = BeautifulSoup(response_text(response), 'html.parser')
             links = soup.find_all('a', href=True)
             
             # Limit to checking first 20 links to avoid long wait times
@@ -33,11 +35,16 @@ class BrokenLinksChecker:
                     links_to_check.append(full_url)
                     checked_links.add(full_url)
             
-            for link in links_to_check[:20]:
+            links_to_check = links_to_check[:20]
+            for i, link in enumerate(links_to_check):
                 try:
-                    res = requests.head(link, headers=self.headers, timeout=5)
+                    res = get_session().head(link, headers=self.headers, timeout=5)
                     if res.status_code >= 400:
                         broken_links.append(link)
+                except HostUnavailable:
+                    # The site itself stopped answering; that doesn't make the rest broken
+                    unchecked = len(links_to_check) - i
+                    break
                 except:
                     broken_links.append(link)
             
@@ -52,7 +59,8 @@ class BrokenLinksChecker:
         return {
             "score": score,
             "broken_links": broken_links,
-            "count": len(broken_links)
+            "count": len(broken_links),
+            "unchecked": unchecked
         }
 
 if __name__ == "__main__":
@@ -0,0 +1,37 @@
+import asyncio
+from playwright.async_api import async_playwright
+from config import HEADLESS_MODE, BROWSER_POOL_MAX_CONTEXTS
+
+class BrowserPool:
+    """
+    Keeps one Chromium instance running for a long-lived process (the audit daemon).
+
+    Callers open a fresh context per check instead of launching a browser, which
+    takes milliseconds rather than seconds. At most BROWSER_POOL_MAX_CONTEXTS
+    contexts are open at once; the browser is relaunched if it crashes.
+    All methods must be called from the event loop that started the pool.
+    """
+
+    def __init__(self, max_contexts=BROWSER_POOL_MAX_CONTEXTS):
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+        self.slots = asyncio.Semaphore(max_contexts)
+        self.devices = {}
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self.devices = self._playwright.devices
+        await self.get_browser()
+
+    async def get_browser(self):
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                self._browser = await self._playwright.chromium.launch(headless=HEADLESS_MODE)
+            return self._browser
+
+    async def close(self):
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
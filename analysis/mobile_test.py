@@ -1,51 +1,179 @@
 import asyncio
+import time
 from playwright.async_api import async_playwright
+from utils import metrics
+from config import MOBILE_SETTLE_MS, MOBILE_DESKTOP_CHECK
+
+# Installed before any page script runs, so layout shifts and long tasks from the
+# very start of the load are observed (LCP and paint entries are buffered anyway).
+OBSERVE_SCRIPT = """
+(() => {
+  const m = window.__auditMetrics = {lcp: null, cls: 0, longTasks: []};
+  const observe = (type, handle) => {
+    try {
+      new PerformanceObserver(list => list.getEntries().forEach(handle)).observe({type, buffered: true});
+    } catch (e) {}  // entry type not supported
+  };
+  observe('largest-contentful-paint', e => { m.lcp = e.renderTime || e.loadTime || e.startTime; });
+  observe('layout-shift', e => { if (!e.hadRecentInput) m.cls += e.value; });
+  observe('longtask', e => { m.longTasks.push([e.startTime, e.duration]); });
+})();
+"""
+
+# Everything the check needs from the loaded page, in one round-trip. Times are ms
+# from navigation start; transfer sizes are 0 for cross-origin resources that do not
+# send Timing-Allow-Origin.
+COLLECT_SCRIPT = """
+() => {
+  const m = window.__auditMetrics || {lcp: null, cls: 0, longTasks: []};
+  const nav = performance.getEntriesByType('navigation')[0];
+  const paint = performance.getEntriesByName('first-contentful-paint')[0];
+  const fcp = paint ? paint.startTime : null;
+  // Total blocking time: the part over 50 ms of every long task after the first paint
+  const tbt = m.longTasks.filter(([start]) => fcp === null || start >= fcp)
+                         .reduce((sum, [, duration]) => sum + Math.max(0, duration - 50), 0);
+  const resources = performance.getEntriesByType('resource');
+  const byType = {};
+  let bytes = 0;
+  for (const r of resources) {
+    const type = byType[r.initiatorType] = byType[r.initiatorType] || {count: 0, bytes: 0};
+    type.count += 1;
+    type.bytes += r.transferSize || 0;
+    bytes += r.transferSize || 0;
+  }
+  const slowest = resources.slice().sort((a, b) => b.duration - a.duration).slice(0, 5)
+    .map(r => ({url: r.name, type: r.initiatorType, ms: Math.round(r.duration), bytes: r.transferSize || 0}));
+  return {
+    scrollWidth: document.body ? document.body.scrollWidth : 0,
+    innerWidth: window.innerWidth,
+    viewportMeta: !!document.querySelector('meta[name="viewport"]'),
+    lcp: m.lcp, cls: m.cls, tbt, fcp,
+    ttfb: nav ? nav.responseStart : null,
+    domContentLoaded: nav ? nav.domContentLoadedEventEnd : null,
+    load: nav ? nav.loadEventEnd : null,
+    resources: {count: resources.length, bytes, byType},
+    slowest
+  };
+}
+"""
+
+LAYOUT_SCRIPT = "() => [document.body ? document.body.scrollWidth : 0, window.innerWidth]"
+
+DESKTOP_VIEWPORT = {"width": 1366, "height": 768}
+
+# "Poor" thresholds of the Core Web Vitals (ms, ms, unitless)
+POOR_LCP_MS = 4000
+POOR_TBT_MS = 600
+POOR_CLS = 0.25
 
 class MobileTest:
-    async def check(self, url):
-        """Checks if the website is mobile responsive."""
+    async def check(self, url, browser_pool=None, desktop=None):
+        """
+        Checks if the website is mobile responsive, and measures its load in the
+        emulated phone: Core Web Vitals (LCP, CLS, TBT, FCP), navigation timing
+        and resource timing, all from the one page load.
+
+        With `desktop` (default MOBILE_DESKTOP_CHECK) the same page is then resized
+        to a desktop viewport, instead of reloaded, to check its wide layout too.
+
+        With a BrowserPool the check runs in a new context of the pool's warm
+        browser; otherwise a browser is launched just for this check.
+        """
         if not url.startswith('http'):
             url = 'http://' + url
-            
-        score = 100
-        issues = []
-        
+        if desktop is None:
+            desktop = MOBILE_DESKTOP_CHECK
+
+        if browser_pool:
+            async with browser_pool.slots:
+                browser = await browser_pool.get_browser()
+                return await self._check_in(browser, browser_pool.devices['iPhone 12'], url, desktop)
+
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
-            # Emulate a mobile device (iPhone 12)
-            device = p.devices['iPhone 12']
-            context = await browser.new_context(**device)
-            page = await context.new_page()
-            
             try:
-                await page.goto(url, timeout=30000)
-                
-                # Check for horizontal scroll (common mobile issue)
-                scroll_width = await page.evaluate("document.body.scrollWidth")
-                viewport_width = await page.evaluate("window.innerWidth")
-                
-                if scroll_width > viewport_width:
-                    score -= 30
-                    issues.append("Horizontal scroll detected (content overflows screen)")
-                
-                # Check if text is readable without zooming (heuristic)
-                # This is complex to do perfectly, but we can check for meta viewport again or computed styles
-                viewport_meta = await page.query_selector('meta[name="viewport"]')
-                if not viewport_meta:
-                    # Already checked in UX, but good to double check in context
-                    pass
-                    
-            except Exception as e:
-                print(f"Error checking mobile responsiveness for {url}: {e}")
-                score = 0
-                issues.append("Failed to load on mobile emulator")
+                return await self._check_in(browser, p.devices['iPhone 12'], url, desktop)
             finally:
                 await browser.close()
-                
-        return {
-            "score": score,
-            "issues": issues
+
+    async def _check_in(self, browser, device, url, desktop=False):
+        score = 100
+        issues = []
+        result = {}
+
+        # Emulate a mobile device (iPhone 12)
+        context = await browser.new_context(**device)
+        metrics.BROWSER_CONTEXTS.inc()
+
+        try:
+            await context.add_init_script(OBSERVE_SCRIPT)
+            page = await context.new_page()
+            started = time.perf_counter()
+            await page.goto(url, timeout=30000)
+            metrics.RENDER_SECONDS.labels("mobile").observe(time.perf_counter() - started)
+            if MOBILE_SETTLE_MS:
+                await page.wait_for_timeout(MOBILE_SETTLE_MS)
+
+            lab = await page.evaluate(COLLECT_SCRIPT)
+            result = _structure(lab)
+
+            # Check for horizontal scroll (common mobile issue)
+            if lab["scrollWidth"] > lab["innerWidth"]:
+                score -= 30
+                issues.append("Horizontal scroll detected (content overflows screen)")
+
+            vitals = result["vitals"]
+            if vitals["lcp_ms"] is not None and vitals["lcp_ms"] > POOR_LCP_MS:
+                score -= 10
+                issues.append(f"Main content takes {vitals['lcp_ms'] / 1000:.1f}s to appear on mobile (LCP)")
+            if vitals["cls"] > POOR_CLS:
+                score -= 10
+                issues.append(f"Layout shifts while loading (CLS {vitals['cls']:.2f})")
+            if vitals["tbt_ms"] > POOR_TBT_MS:
+                score -= 10
+                issues.append(f"Scripts block the page for {vitals['tbt_ms']:.0f} ms while loading (TBT)")
+
+            if desktop:
+                await page.set_viewport_size(DESKTOP_VIEWPORT)
+                scroll_width, width = await page.evaluate(LAYOUT_SCRIPT)
+                result["desktop"] = {"width": width, "scroll_width": scroll_width,
+                                     "horizontal_scroll": scroll_width > width}
+                if scroll_width > width:
+                    issues.append("Horizontal scroll at desktop width")
+
+        except Exception as e:
+            print(f"Error checking mobile responsiveness for {url}: {e}")
+            score = 0
+            issues.append("Failed to load on mobile emulator")
+        finally:
+            await context.close()
+            metrics.BROWSER_CONTEXTS.dec()
+
+        return dict(result, score=max(0, score), issues=issues)
+
+def _ms(value):
+    return round(value) if value is not None else None
+
+def _structure(lab):
+    """The collected lab data as the check's result fields."""
+    return {
+        "viewport": {"width": lab["innerWidth"], "scroll_width": lab["scrollWidth"], "meta": lab["viewportMeta"]},
+        "vitals": {
+            "lcp_ms": _ms(lab["lcp"]),
+            "cls": round(lab["cls"], 3),
+            "tbt_ms": _ms(lab["tbt"]),
+            "fcp_ms": _ms(lab["fcp"]),
+            "ttfb_ms": _ms(lab["ttfb"])
+        },
+        "load": {"dom_content_loaded_ms": _ms(lab["domContentLoaded"]), "load_ms": _ms(lab["load"])},
+        "resources": {
+            "count": lab["resources"]["count"],
+            "transfer_kb": round(lab["resources"]["bytes"] / 1024, 2),
+            "by_type": {name: {"count": t["count"], "transfer_kb": round(t["bytes"] / 1024, 2)}
+                        for name, t in lab["resources"]["byType"].items()},
+            "slowest": lab["slowest"]
         }
+    }
 
 if __name__ == "__main__":
     tester = MobileTest()
@@ -1,6 +1,6 @@
-import requests
+from utils.http import get_session, connection_phases, decode_body
 import time
-from config import USER_AGENT
+from config import USER_AGENT, PAGE_TIMEOUT, PAGE_MAX_BYTES
 
 class PerformanceAnalyzer:
     def __init__(self):
@@ -8,31 +8,92 @@ class PerformanceAnalyzer:
 
     def analyze(self, url):
         """Analyzes the performance of a website."""
+        return self.analyze_page(url)[0]
+
+    def analyze_page(self, url):
+        """
+        Like analyze, but also returns the fetched page (None if the fetch failed)
+        so the other analyzers can reuse it instead of fetching it again: a dict of
+        the final "url", the body's "content" (bytes), and its "text" and "encoding"
+        (decoded once, see utils/http.decode_body).
+
+        The page is streamed and at most PAGE_MAX_BYTES are read. The load time is
+        split into redirects, DNS, connect, TLS, time to first byte (server wait)
+        and download; DNS, connect and TLS are 0 on a reused connection.
+        """
         if not url.startswith('http'):
             url = 'http://' + url
             
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
-            response = requests.get(url, headers=self.headers, timeout=15)
-            end_time = time.time()
+            response = get_session().get(url, headers=self.headers, timeout=PAGE_TIMEOUT, stream=True)
+            headers_time = time.perf_counter()
+            phases = connection_phases(response, start_time)
+            content, truncated = self._read_capped(response, headers_time)
+            end_time = time.perf_counter()
             
+            redirects = sum(hop.elapsed.total_seconds() for hop in response.history)
+            setup = sum(phases.values()) if phases else 0.0
+            download = end_time - headers_time
             response_time = end_time - start_time
-            page_size_kb = len(response.content) / 1024
+            page_size = len(content)
+            if truncated:
+                # Score the whole page: its declared size, and the time it would have taken at this rate
+                declared = response.headers.get("Content-Length", "")
+                declared = int(declared) if declared.isdigit() else 0
+                if declared > page_size > 0:
+                    response_time += download * (declared / page_size - 1)
+                    page_size = declared
             
-            score = self.calculate_score(response_time, page_size_kb)
+            score = self.calculate_score(response_time, page_size / 1024)
             
             return {
                 "response_time_seconds": round(response_time, 2),
-                "page_size_kb": round(page_size_kb, 2),
-                "score": score
-            }
+                "page_size_kb": round(page_size / 1024, 2),
+                "score": score,
+                "timing": {
+                    "redirects": round(redirects, 3),
+                    "dns": round(phases["dns"], 3) if phases else 0.0,
+                    "connect": round(phases["connect"], 3) if phases else 0.0,
+                    "tls": round(phases["tls"], 3) if phases else 0.0,
+                    "ttfb": round(max(0.0, response.elapsed.total_seconds() - setup), 3),
+                    "download": round(download, 3)
+                },
+                "connection_reused": phases is None,
+                "truncated": truncated
+            }, self._snapshot(response, content)
         except Exception as e:
             print(f"Error analyzing performance for {url}: {e}")
             return {
                 "response_time_seconds": -1,
                 "page_size_kb": -1,
                 "score": 0
-            }
+            }, None
+
+    def _read_capped(self, response, started):
+        """
+        Reads the streamed body up to PAGE_MAX_BYTES (and PAGE_TIMEOUT). Returns
+        (bytes, truncated); a truncated response is closed rather than drained.
+        """
+        content = bytearray()
+        truncated = False
+        try:
+            for chunk in response.iter_content(64 * 1024):
+                content += chunk
+                if len(content) >= PAGE_MAX_BYTES or time.perf_counter() - started > PAGE_TIMEOUT:
+                    truncated = True
+                    break
+        except Exception:
+            response.close()
+            raise
+        if truncated:
+            # Drop the rest instead of downloading it; a fully read response returns its connection to the pool
+            response.close()
+        return bytes(content[:PAGE_MAX_BYTES]), truncated
+
+    def _snapshot(self, response, content):
+        text, encoding = decode_body(content, response.headers.get("Content-Type"))
+        return {"url": response.url, "content": content, "text": text, "encoding": encoding}
 
     def calculate_score(self, response_time, page_size_kb):
         # Basic scoring logic
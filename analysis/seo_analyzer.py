@@ -1,5 +1,5 @@
 from bs4 import BeautifulSoup
-import requests
+from utils.http import get_session, response_text
 from config import USER_AGENT
 
 class SEOAnalyzer:
@@ -8,12 +8,12 @@ class SEOAnalyzer:
 
     def analyze(self, url, html_content=None):
         """Analyzes SEO factors of a website."""
-        if not html_content:
+        if html_content is None:
             if not url.startswith('http'):
                 url = 'http://' + url
             try:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                html_content = response.text
+                response = get_session().get(url, headers=self.headers, timeout=10)
+                html_content = response_text(response)
             except:
                 return {"score": 0, "issues": ["Could not fetch website"]}
 
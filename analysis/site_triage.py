@@ -0,0 +1,170 @@
+import asyncio
+import re
+import socket
+import time
+from functools import partial
+from urllib.parse import urljoin, urlparse
+from utils.http import get_session, decode_body
+from config import USER_AGENT, TRIAGE_DNS_TIMEOUT, TRIAGE_CONNECT_TIMEOUT, TRIAGE_TIMEOUT, TRIAGE_MAX_BYTES
+
+# Outcomes of a triage. Only "live" sites are worth a full audit.
+LIVE = "live"
+TRIAGE_STATUSES = [LIVE, "no_website", "social", "dns_failed", "unreachable", "http_error", "parked"]
+
+# A lead "website" that is (or redirects to) a profile on one of these is not a site to audit
+SOCIAL_DOMAINS = (
+    "facebook.com", "fb.com", "instagram.com", "linkedin.com", "twitter.com", "x.com", "youtube.com",
+    "tiktok.com", "wa.me", "whatsapp.com", "linktr.ee", "business.site", "justdial.com",
+)
+
+# Parked, for-sale, default server and "coming soon" pages. Matched against the title,
+# and against the text only of near-empty pages, so a real site announcing
+# something "coming soon" is not mistaken for a placeholder.
+PLACEHOLDER_TEXT_CHARS = 1500
+PARKED_MARKERS = re.compile(
+    r"domain (?:name )?(?:is |may be )?for sale|\.[a-z]{2,} is for sale|buy this domain|this domain (?:is parked|has expired)|"
+    r"parked (?:free|domain)|domain parking|sedoparking|parkingcrew|bodis\.com|hugedomains|afternic|dan\.com/buy|"
+    r"welcome to nginx|apache2 \w+ default page|it works!|default web site page|iis windows server|"
+    r"account (?:has been )?suspended|website (?:is )?coming soon|site under construction|"
+    r"future home of something quite cool",
+    re.IGNORECASE,
+)
+
+MAX_REDIRECTS = 5
+
+# Root responses that still mean a site exists (bot walls, auth, rate limits)
+LIVE_ERROR_CODES = {401, 403, 429}
+
+class SiteTriage:
+    """
+    Cheap liveness check of a lead's website, so dead, parked and social-only
+    "websites" never reach the analyzers, Playwright or Gemini.
+
+    In order: DNS resolution, a TCP connect to the web port, then one GET of the
+    home page that reads at most TRIAGE_MAX_BYTES. Each step has its own short
+    timeout, so a dead host costs seconds instead of every analyzer's timeout.
+    """
+
+    def __init__(self, executor=None):
+        # Blocking DNS lookups and GETs run here (None = the event loop's default executor);
+        # batch triage passes a pool sized to its concurrency
+        self.executor = executor
+        self.headers = {"User-Agent": USER_AGENT}
+
+    async def check(self, url):
+        """Returns {"status", "detail", "final_url", "seconds"}; status is one of TRIAGE_STATUSES."""
+        started = time.perf_counter()
+        status, detail, final_url = await self._classify(url)
+        return {"status": status, "detail": detail, "final_url": final_url,
+                "seconds": round(time.perf_counter() - started, 3)}
+
+    async def _classify(self, url):
+        if not url or url.strip() in ("", "N/A"):
+            return "no_website", None, None
+        url = url.strip()
+        if not url.startswith('http'):
+            url = 'http://' + url
+
+        parsed = urlparse(url)
+        host = parsed.hostname
+        if not host:
+            return "no_website", f"Invalid URL: {url}", None
+        if _is_social(host):
+            return "social", host, url
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+
+        try:
+            addresses = await asyncio.wait_for(
+                self._run(socket.getaddrinfo, host, port, type=socket.SOCK_STREAM), TRIAGE_DNS_TIMEOUT
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            return "dns_failed", _describe(e), None
+
+        error = await self._connect(addresses, port)
+        if error:
+            return "unreachable", error, None
+
+        try:
+            status_code, final_url, body = await self._run(self._fetch_head_of_page, url)
+        except Exception as e:
+            return "unreachable", _describe(e), None
+
+        final_host = urlparse(final_url).hostname or host
+        if final_host != host and _is_social(final_host):
+            return "social", f"Redirects to {final_host}", final_url
+        if 300 <= status_code < 400:
+            return "http_error", "Too many redirects", final_url
+        if status_code >= 400 and status_code not in LIVE_ERROR_CODES:
+            return "http_error", f"HTTP {status_code}", final_url
+        marker = _placeholder_marker(body)
+        if marker:
+            return "parked", marker, final_url
+        return LIVE, None, final_url
+
+    def _run(self, fn, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def _connect(self, addresses, port):
+        """Opens (and closes) a TCP connection to the first address that accepts one. Returns an error or None."""
+        error = None
+        for address in list(dict.fromkeys(info[4][0] for info in addresses))[:2]:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), TRIAGE_CONNECT_TIMEOUT)
+                writer.close()
+                return None
+            except (OSError, asyncio.TimeoutError) as e:
+                error = _describe(e)
+        return error
+
+    def _fetch_head_of_page(self, url):
+        """
+        GETs `url` and returns (status, final url, first TRIAGE_MAX_BYTES as text).
+        Redirects are followed here, stopping without a request at a social site.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            response = get_session().get(url, headers=self.headers, timeout=TRIAGE_TIMEOUT, stream=True,
+                                         allow_redirects=False)
+            if not response.is_redirect:
+                break
+            response.close()
+            url = urljoin(url, response.headers['Location'])
+            if _is_social(urlparse(url).hostname or ""):
+                return response.status_code, url, ""
+        else:
+            return response.status_code, url, ""
+
+        content = bytearray()
+        try:
+            for chunk in response.iter_content(16 * 1024):
+                content += chunk
+                if len(content) >= TRIAGE_MAX_BYTES:
+                    # Drop the rest of a large page; a fully read one returns its connection to the pool
+                    response.close()
+                    break
+        except Exception:
+            response.close()
+            raise
+        text, _ = decode_body(bytes(content[:TRIAGE_MAX_BYTES]), response.headers.get("Content-Type"))
+        return response.status_code, response.url, text
+
+def _is_social(host):
+    host = host.lower()
+    return any(host == domain or host.endswith("." + domain) for domain in SOCIAL_DOMAINS)
+
+def _placeholder_marker(html):
+    title = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    match = PARKED_MARKERS.search(title.group(1)) if title else None
+    if not match:
+        text = re.sub(r"<(script|style)\b.*?</\1>|<[^>]+>", " ", html, flags=re.IGNORECASE | re.DOTALL)
+        text = " ".join(text.split())
+        if len(text) < PLACEHOLDER_TEXT_CHARS:
+            match = PARKED_MARKERS.search(text)
+    return match.group(0) if match else None
+
+def _describe(error):
+    if isinstance(error, asyncio.TimeoutError):
+        return "Timed out"
+    return f"{type(error).__name__}: {error}"
+
+if __name__ == "__main__":
+    print(asyncio.run(SiteTriage().check("example.com")))
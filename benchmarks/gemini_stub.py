@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Canned review in the shape AIAuditAnalyzer asks for
+REVIEW = {
+    "value_proposition": {"score": 6, "observation": "Services are listed but the benefit is unclear."},
+    "copywriting": {"score": 5, "observation": "Generic copy; add specifics."},
+    "trust_factors": {"score": 4, "observation": "No testimonials or reviews."},
+    "cta": {"score": 5, "observation": "Contact details are hard to find."},
+    "summary": "A workable site that undersells the business. Clearer offers and proof would help.",
+}
+
+EMAIL = "Hi,\n\nWe audited your website and found a few quick wins.\n\nBest,\nBenchmark"
+
+class GeminiStub(ThreadingHTTPServer):
+    """
+    Local stand-in for the Gemini generateContent endpoint. Answers every request
+    after `latency` seconds: JSON requests get a canned review, others canned text.
+    Point the AI modules at it with GEMINI_API_BASE=stub.base_url.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency=0.2, host="127.0.0.1", port=0):
+        super().__init__((host, port), GeminiHandler)
+        self.latency = latency
+        self.requests = 0
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class GeminiHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.server.requests += 1
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.server.latency)
+        if not self.path.split("?")[0].endswith(":generateContent"):
+            return self._reply(404, {"error": {"message": "Not found"}})
+        wants_json = payload.get("generationConfig", {}).get("responseMimeType") == "application/json"
+        text = json.dumps(REVIEW) if wants_json else EMAIL
+        self._reply(200, {"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+    def _reply(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
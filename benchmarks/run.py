@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the path (run as `python benchmarks/run.py`)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.site_farm import SiteFarm, build_corpus
+from benchmarks.gemini_stub import GeminiStub
+from benchmarks.smtp_sink import SMTPSink
+from utils.timing import percentile
+
+# Offline benchmark: audits a generated corpus of local sites, reviews them with a
+# Gemini stub, renders reports and sends the outreach emails to a local SMTP sink.
+# Nothing leaves the machine, so runs are comparable. Project modules are imported
+# only after isolate() has pointed config at temporary storage and the stubs.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Timing differences smaller than this are noise, never regressions (seconds)
+MIN_REGRESSION_SECONDS = 0.1
+THROUGHPUT_METRICS = ["audits_per_sec", "emails_per_sec"]
+# Runs are only compared with a baseline recorded with the same settings
+SETTINGS = ["sites", "concurrency", "seed", "gemini_latency", "browser"]
+
+TEMPLATE = "Hi,\n\nYour website {Website} scored {Overall}/100.\n{Issues}\n\nBest,\nBenchmark"
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where unavailable (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def isolate(tmp, gemini):
+    """Points config at throwaway storage and the Gemini stub. Call before importing project modules."""
+    os.environ.update({
+        "DB_PATH": os.path.join(tmp, "leads.db"),
+        "REPORT_OUTPUT_DIR": os.path.join(tmp, "reports"),
+        "REPORT_CACHE_DIR": os.path.join(tmp, "report_cache"),
+        "DAEMON_SOCKET": os.path.join(tmp, "auditor.sock"),
+        "GEMINI_API_BASE": gemini.base_url,
+        "GEMINI_API_KEY": "benchmark",
+        "OUTBOX_DOMAIN_INTERVAL": "0",
+        "NO_PROXY": "127.0.0.1,localhost",
+    })
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def run_timed(fn, items, concurrency):
+    """Runs fn(item) for every item on `concurrency` threads. Returns the duration of each call."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda item: timed(fn, item), items))
+
+async def audit_corpus(lead_ids, concurrency, samples):
+    """Audits every lead, `concurrency` at a time, recording each analyzer's time. Returns (audits/sec, browser used)."""
+    from pipeline.audit import run_analysis
+    from analysis.browser_pool import BrowserPool
+
+    browser_pool = BrowserPool()
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        print(f"No browser available ({type(e).__name__}); the Mobile analyzer fails fast in this run.",
+              file=sys.__stdout__)
+        await browser_pool.close()
+        browser_pool = None
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def audit(lead_id):
+        async with slots:
+            # run_analysis reports each step before starting it: a step lasts until the next one starts
+            marks = []
+            start = time.perf_counter()
+            await run_analysis(lead_id, with_ai=False, browser_pool=browser_pool,
+                               progress=lambda step: marks.append((step, time.perf_counter())))
+            end = time.perf_counter()
+            for (step, began), (_, ended) in zip(marks, marks[1:] + [(None, end)]):
+                samples.setdefault(step, []).append(ended - began)
+            samples.setdefault("audit", []).append(end - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(audit(lead_id) for lead_id in lead_ids))
+    finally:
+        if browser_pool:
+            await browser_pool.close()
+    return len(lead_ids) / (time.perf_counter() - start), browser_pool is not None
+
+def run_benchmark(sites=30, concurrency=4, seed=0, gemini_latency=0.2, verbose=False):
+    """Runs every stage against a fresh corpus. Returns the results dict saved as a baseline."""
+    corpus = build_corpus(sites, seed)
+    farm = SiteFarm(corpus).start()
+    gemini = GeminiStub(latency=gemini_latency).start()
+    sink = SMTPSink(reject=None).start()
+    tmp = tempfile.TemporaryDirectory(prefix="auditor-bench-")
+    isolate(tmp.name, gemini)
+
+    samples = {}
+    try:
+        with contextlib.ExitStack() as stack:
+            if not verbose:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            from storage.database import init_db, insert_lead, get_lead, get_latest_audit
+            from storage import outbox
+            from pipeline.audit import run_ai_review
+            from pipeline.report import generate_report
+            from pipeline.outbox import run_outbox_worker
+            from ai.email_generator import EmailGenerator
+            from ai.suggestion_generator import SuggestionGenerator
+            from utils.email_sender import EmailSender
+
+            init_db()
+            lead_ids = [insert_lead({
+                "business_name": f"Site {site['id']} ({site['kind']})",
+                "category": "Benchmark",
+                "website": farm.url(site),
+                "email": f"info@site{site['id']}.test",
+            }) for site in corpus]
+
+            # Stage 1: static analyzers and the mobile check
+            audits_per_sec, browser = asyncio.run(audit_corpus(lead_ids, concurrency, samples))
+
+            # Stage 2: Gemini review (site fetch + stub call)
+            samples["ai"] = run_timed(run_ai_review, lead_ids, concurrency)
+
+            # Stage 3: suggestions + PDF report
+            def report(lead_id):
+                lead, audit = get_lead(lead_id), get_latest_audit(lead_id)
+                generate_report(lead_id, SuggestionGenerator().generate(lead, audit))
+            samples["report"] = run_timed(report, lead_ids, concurrency)
+
+            # Stage 4: write the email and queue it, then drain the outbox into the SMTP sink
+            def write_email(lead_id):
+                lead = get_lead(lead_id)
+                body = EmailGenerator().generate(lead, get_latest_audit(lead_id), TEMPLATE)
+                outbox.enqueue_email(lead_id, lead['email'], f"Question about {lead['business_name']}", body)
+            samples["email"] = run_timed(write_email, lead_ids, concurrency)
+
+            with EmailSender("127.0.0.1", sink.port, "bench@example.com", "secret", use_tls=False,
+                             rate_per_minute=0) as sender:
+                start = time.perf_counter()
+                asyncio.run(run_outbox_worker(sender=sender, poll_interval=0.05, once=True))
+                send_seconds = time.perf_counter() - start
+    finally:
+        farm.stop()
+        gemini.stop()
+        sink.stop()
+        tmp.cleanup()
+
+    return {
+        "sites": sites,
+        "concurrency": concurrency,
+        "seed": seed,
+        "gemini_latency": gemini_latency,
+        "browser": browser,
+        "python": platform.python_version(),
+        "audits_per_sec": round(audits_per_sec, 3),
+        "emails_per_sec": round(len(sink.messages) / send_seconds, 3) if send_seconds else 0.0,
+        "emails_sent": len(sink.messages),
+        "peak_rss_mb": peak_rss_mb(),
+        "timings": {
+            name: {"n": len(values), "p50": round(percentile(values, 50), 4), "p95": round(percentile(values, 95), 4)}
+            for name, values in samples.items()
+        },
+    }
+
+def run_in_subprocess(args):
+    """One benchmark run in a fresh interpreter, so imported config and peak RSS do not carry over."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.json")
+        subprocess.run([
+            sys.executable, os.path.abspath(__file__), "--no-compare", "--output", output,
+            "--sites", str(args.sites), "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+            "--gemini-latency", str(args.gemini_latency),
+        ], check=True, capture_output=not args.verbose)
+        with open(output) as f:
+            return json.load(f)
+
+def merge_runs(runs):
+    """Combines repeated runs into one result: the median of every metric (runs must share settings)."""
+    if len(runs) == 1:
+        return runs[0]
+    median = lambda values: percentile(values, 50)
+    merged = dict(runs[-1], repeat=len(runs))
+    for key in THROUGHPUT_METRICS:
+        merged[key] = median([run[key] for run in runs])
+    if all(run["peak_rss_mb"] is not None for run in runs):
+        merged["peak_rss_mb"] = median([run["peak_rss_mb"] for run in runs])
+    merged["timings"] = {
+        name: {stat: median([run["timings"][name][stat] for run in runs]) for stat in ("n", "p50", "p95")}
+        for name in runs[-1]["timings"]
+    }
+    return merged
+
+def compare(results, baseline, tolerance):
+    """
+    Returns regressions of `results` against `baseline` as messages: throughput
+    lower, or p95 times / peak memory higher, by more than `tolerance` (a fraction).
+    A measured stage the baseline does not have is reported too, so a new step
+    is never left unchecked; record the baseline again after adding one.
+    """
+    regressions = []
+    for key in THROUGHPUT_METRICS:
+        if baseline.get(key) and results[key] < baseline[key] * (1 - tolerance):
+            regressions.append(f"{key}: {results[key]} vs baseline {baseline[key]}")
+    if baseline.get("peak_rss_mb") and results.get("peak_rss_mb") and \
+            results["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak_rss_mb: {results['peak_rss_mb']} vs baseline {baseline['peak_rss_mb']}")
+    for name in results["timings"]:
+        if name not in baseline.get("timings", {}):
+            regressions.append(f"{name}: no baseline entry, record one with --update-baseline")
+    for name, before in baseline.get("timings", {}).items():
+        now = results["timings"].get(name)
+        if now is None:
+            continue
+        if now["p95"] > before["p95"] * (1 + tolerance) and now["p95"] - before["p95"] > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{name} p95: {now['p95']}s vs baseline {before['p95']}s")
+    return regressions
+
+def print_results(results):
+    print(f"\n{results['sites']} sites, concurrency {results['concurrency']}, "
+          f"Gemini latency {results['gemini_latency']}s, browser: {'yes' if results['browser'] else 'no'}")
+    print(f"Audits/sec: {results['audits_per_sec']}   Emails/sec: {results['emails_per_sec']} "
+          f"({results['emails_sent']} sent)   Peak RSS: {results['peak_rss_mb']} MB")
+    print(f"\n{'Stage':<12}{'n':>5}{'p50 (s)':>10}{'p95 (s)':>10}")
+    for name, stats in results["timings"].items():
+        print(f"{name:<12}{stats['n']:>5}{stats['p50']:>10.3f}{stats['p95']:>10.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline audit pipeline benchmark")
+    parser.add_argument("--sites", type=int, default=30, help="Generated sites to audit")
+    parser.add_argument("--concurrency", type=int, default=4, help="Audits (and AI/report/email calls) at once")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Seconds the Gemini stub takes per call")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the baseline")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs to take the median of (use 3+ for baselines)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression as a fraction")
+    parser.add_argument("--no-compare", action="store_true", help="Only print (and --output) the results")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args(argv)
+
+    if args.repeat > 1:
+        results = merge_runs([run_in_subprocess(args) for _ in range(args.repeat)])
+    else:
+        results = run_benchmark(args.sites, args.concurrency, args.seed, args.gemini_latency, args.verbose)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.no_compare:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    changed = [key for key in SETTINGS if baseline.get(key) != results[key]]
+    if changed:
+        print(f"\nBaseline was recorded with different settings ({', '.join(changed)}); not compared.")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nREGRESSIONS (more than {args.tolerance:.0%} worse than baseline):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
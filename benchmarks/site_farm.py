@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Kinds of generated sites, cycled through so every corpus has each of them:
+#   small    - a few KB, well-formed
+#   large    - 1-3 MB of markup and images, over the performance analyzer's size limit
+#   slow     - small page served after a 0.3-0.8 s delay (slow TTFB)
+#   redirect - entry URL goes through a chain of three redirects
+#   broken   - half of its internal links return 404
+#   spa      - empty shell whose content is rendered by JavaScript
+SITE_KINDS = ["small", "large", "slow", "redirect", "broken", "spa"]
+
+REDIRECT_HOPS = 3
+
+def build_corpus(count, seed=0):
+    """Returns `count` site specs. The same seed always gives the same corpus."""
+    rng = random.Random(seed)
+    sites = []
+    for site_id in range(count):
+        kind = SITE_KINDS[site_id % len(SITE_KINDS)]
+        sites.append({
+            "id": site_id,
+            "kind": kind,
+            "size_kb": rng.randint(1000, 3000) if kind == "large" else rng.randint(4, 60),
+            "delay": rng.uniform(0.3, 0.8) if kind == "slow" else 0.0,
+            "links": rng.randint(5, 30),
+            "images": rng.randint(0, 40),
+        })
+    return sites
+
+def render_site(site):
+    """Home page HTML of a generated site."""
+    prefix = f"/s{site['id']}"
+    if site["kind"] == "spa":
+        return (f"<!doctype html><html><head><title>App {site['id']}</title>"
+                f"<script src=\"{prefix}/app.js\" defer></script></head>"
+                "<body><div id=\"root\"></div></body></html>")
+
+    rng = random.Random(site["id"])
+    parts = [
+        "<!doctype html><html><head>",
+        f"<title>Business {site['id']} - Local services</title>",
+        "<meta name=\"description\" content=\"Generated benchmark site\">",
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">" if rng.random() > 0.2 else "",
+        "</head><body>",
+        f"<h1>Business {site['id']}</h1>",
+    ]
+    for i in range(site["links"]):
+        parts.append(f"<a href=\"{prefix}/page/{i}\">Page {i}</a> ")
+    for i in range(site["images"]):
+        alt = f" alt=\"Image {i}\"" if rng.random() > 0.3 else ""
+        parts.append(f"<img src=\"{prefix}/img/{i}.png\"{alt}>")
+    parts.append("<p>Contact us at info@business.test for a quote.</p>")
+    html = "".join(parts)
+    filler = "<p>" + "Quality service at fair prices, open every day of the week. " * 8 + "</p>"
+    while len(html) < site["size_kb"] * 1024:
+        html += filler
+    return html + "</body></html>"
+
+class SiteFarm(ThreadingHTTPServer):
+    """
+    Serves a generated corpus of sites from one local HTTP server, each under
+    /s<id>/. Start it with start() and stop it with stop().
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, sites, host="127.0.0.1", port=0):
+        super().__init__((host, port), SiteHandler)
+        self.sites = {site["id"]: site for site in sites}
+        self.pages = {site["id"]: render_site(site).encode() for site in sites}
+        self.requests = 0
+
+    def url(self, site):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/s{site['id']}/"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _send(self, status, content=b"", content_type="text/html; charset=utf-8", headers=None, body=True):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+    def _serve(self, body):
+        self.server.requests += 1
+        parts = self.path.split("?")[0].strip("/").split("/")
+        site = self.server.sites.get(int(parts[0][1:])) if parts[0][1:].isdigit() else None
+        if site is None:
+            return self._send(404, b"Not found", body=body)
+        prefix = f"/s{site['id']}"
+        rest = parts[1:]
+
+        if site["kind"] == "redirect" and rest[:1] in ([], ["hop"]):
+            hop = int(rest[1]) + 1 if len(rest) > 1 else 1
+            target = f"{prefix}/hop/{hop}" if hop < REDIRECT_HOPS else f"{prefix}/home"
+            return self._send(302, headers={"Location": target}, body=body)
+
+        if not rest or rest == ["home"]:
+            time.sleep(site["delay"])
+            return self._send(200, self.server.pages[site["id"]], body=body)
+        if rest[0] == "page":
+            if site["kind"] == "broken" and int(rest[1]) % 2:
+                return self._send(404, b"Not found", body=body)
+            return self._send(200, f"<html><body><h1>Page {rest[1]}</h1></body></html>".encode(), body=body)
+        if rest[0] == "img":
+            return self._send(200, b"\x89PNG\r\n\x1a\n" + b"\0" * 512, content_type="image/png", body=body)
+        if rest == ["app.js"]:
+            script = (f"document.getElementById('root').innerHTML = "
+                      f"'<h1>App {site['id']}</h1><p>Rendered in the browser.</p>';")
+            return self._send(200, script.encode(), content_type="application/javascript", body=body)
+        return self._send(404, b"Not found", body=body)
@@ -0,0 +1,95 @@
+import socket
+import socketserver
+import threading
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Minimal local SMTP server that accepts any login and keeps every message in
+    `messages` as (recipients, body). Recipients containing `reject` get a 550.
+    Messages whose body contains `reject_data` (bytes) are refused with a 554 after
+    DATA. While `drop_after_data` is above zero, that many messages are stored and then
+    the connection is cut before the 250 reply.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, reject="bad", host="127.0.0.1", port=0):
+        super().__init__((host, port), SMTPSinkHandler)
+        self.reject = reject
+        self.messages = []
+        self.handlers = []
+        self.drop_after_data = 0
+        self.reject_data = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def drop_connections(self):
+        """Cuts every open client connection, as a server restart would."""
+        for handler in list(self.handlers):
+            try:
+                handler.request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.handlers.clear()
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.server.handlers.append(self)
+        self.reply("220 sink ready")
+        rcpts = []
+        try:
+            for raw in self.rfile:
+                command = raw.decode().strip()
+                verb = command.split(" ")[0].upper()
+                if verb == "EHLO":
+                    self.wfile.write(b"250-sink\r\n250 AUTH PLAIN\r\n")
+                elif verb == "AUTH":
+                    self.reply("235 ok")
+                elif verb == "MAIL":
+                    rcpts = []
+                    self.reply("250 ok")
+                elif verb == "RCPT":
+                    if self.server.reject and self.server.reject in command:
+                        self.reply("550 no such user")
+                    else:
+                        rcpts.append(command)
+                        self.reply("250 ok")
+                elif verb == "DATA":
+                    self.reply("354 go ahead")
+                    body = []
+                    for line in self.rfile:
+                        if line.strip() == b".":
+                            break
+                        body.append(line)
+                    body = b"".join(body)
+                    if self.server.reject_data and self.server.reject_data in body:
+                        self.reply("554 message rejected as spam")
+                        continue
+                    self.server.messages.append((rcpts, body))
+                    if self.server.drop_after_data > 0:
+                        self.server.drop_after_data -= 1
+                        self.request.shutdown(socket.SHUT_RDWR)
+                        return
+                    self.reply("250 queued")
+                elif verb in ("RSET", "NOOP"):
+                    self.reply("250 ok")
+                elif verb == "QUIT":
+                    self.reply("221 bye")
+                    return
+                else:
+                    self.reply("502 not implemented")
+        except OSError:
+            pass
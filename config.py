@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,13 +9,144 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Database
 DB_NAME = "leads.db"
-DB_PATH = os.path.join(BASE_DIR, "storage", DB_NAME)
+DB_PATH = os.getenv("DB_PATH", os.path.join(BASE_DIR, "storage", DB_NAME))
+
+# Gemini API. Point GEMINI_API_BASE at a local stub (see benchmarks/) to run offline.
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
 
 # Scraping
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 HEADLESS_MODE = True
 
-# Reporting
-REPORT_OUTPUT_DIR = os.path.join(BASE_DIR, "reports")
-if not os.path.exists(REPORT_OUTPUT_DIR):
-    os.makedirs(REPORT_OUTPUT_DIR)
+# Browser contexts a warm browser (audit daemon) serves at once
+BROWSER_POOL_MAX_CONTEXTS = int(os.getenv("BROWSER_POOL_MAX_CONTEXTS", 4))
+
+# Mobile test: wait after the load event for late layout shifts and LCP candidates (ms),
+# and whether to also check the layout at desktop width (same page load, resized)
+MOBILE_SETTLE_MS = int(os.getenv("MOBILE_SETTLE_MS", 500))
+MOBILE_DESKTOP_CHECK = os.getenv("MOBILE_DESKTOP_CHECK", "0") == "1"
+
+# Shared HTTP connection pool (hosts kept, connections per host)
+HTTP_POOL_CONNECTIONS = 50
+HTTP_POOL_MAXSIZE = 20
+
+# Audited page fetch (performance analyzer): timeout (s) and bytes read at most; the
+# rest of a larger page is not downloaded and its size is taken from Content-Length
+PAGE_TIMEOUT = 15
+PAGE_MAX_BYTES = int(os.getenv("PAGE_MAX_BYTES", 5 * 1024 * 1024))
+
+# Asset inventory (page weight): subresources sized per page, requests at once, timeout (s),
+# bytes counted at most when a server gives no size, and how long a measured size is
+# trusted before it is revalidated (s); sizes are shared across leads in the asset cache
+ASSET_MAX_PER_PAGE = int(os.getenv("ASSET_MAX_PER_PAGE", 100))
+ASSET_CONCURRENCY = int(os.getenv("ASSET_CONCURRENCY", 8))
+ASSET_TIMEOUT = 5
+ASSET_MAX_BYTES = 20 * 1024 * 1024
+ASSET_CACHE_MAX_AGE = int(os.getenv("ASSET_CACHE_MAX_AGE", 7 * 24 * 3600))
+
+# Email discovery: max extra pages probed per site, per-request timeout (s), bytes read per page
+EMAIL_PROBE_BUDGET = int(os.getenv("EMAIL_PROBE_BUDGET", 4))
+EMAIL_PROBE_TIMEOUT = float(os.getenv("EMAIL_PROBE_TIMEOUT", 5))
+EMAIL_MAX_BYTES = 512 * 1024
+# Per-domain results kept in memory (s): found addresses, misses (no address or the site
+# did not answer, which may be transient), and at most this many domains
+EMAIL_CACHE_TTL = 24 * 3600
+EMAIL_MISS_TTL = 300
+EMAIL_CACHE_MAX_DOMAINS = 10000
+
+# Maps feed: maximum scroll rounds when loading more listings
+MAPS_MAX_SCROLLS = 10
+
+# Tiled Maps scraping: grid cells per side of a city's bounding box, parallel browser contexts
+MAPS_TILE_GRID = int(os.getenv("MAPS_TILE_GRID", 5))
+MAPS_TILE_CONCURRENCY = int(os.getenv("MAPS_TILE_CONCURRENCY", 4))
+
+# JustDial pagination: parallel page fetches, delay (s) between page requests, hard page limit
+JUSTDIAL_CONCURRENCY = int(os.getenv("JUSTDIAL_CONCURRENCY", 3))
+JUSTDIAL_PAGE_DELAY = float(os.getenv("JUSTDIAL_PAGE_DELAY", 1.0))
+JUSTDIAL_MAX_PAGES = 20
+
+# Scrape results are reused for repeated keyword/location queries for this long (seconds)
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", 24 * 3600))
+
+# Job queue: attempts before dead-lettering, lease length (s), retry backoff base/cap (s)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_BACKOFF_BASE = 30
+JOB_BACKOFF_MAX = 3600
+
+# Default worker concurrency per stage (override with main.py worker --concurrency)
+WORKER_CONCURRENCY = {"scrape": 1, "audit": 4, "ai": 2, "outreach": 2}
+
+# Dashboard background executor threads, and concurrent audits per outreach campaign
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", 4))
+CAMPAIGN_AUDIT_CONCURRENCY = int(os.getenv("CAMPAIGN_AUDIT_CONCURRENCY", 3))
+
+# Audit daemon (main.py serve): Unix socket where available, else localhost TCP
+DAEMON_SOCKET = os.getenv("DAEMON_SOCKET", os.path.join(BASE_DIR, "storage", "auditor.sock"))
+DAEMON_PORT = int(os.getenv("DAEMON_PORT", 8765))
+DAEMON_USE_UNIX_SOCKET = hasattr(socket, "AF_UNIX") and os.name != "nt"
+DAEMON_MAX_AUDITS = int(os.getenv("DAEMON_MAX_AUDITS", 4))
+DAEMON_TIMEOUT = 300
+
+# Outreach SMTP: STARTTLS, socket timeout (s), connections kept open, messages per
+# connection before it is recycled, send rate (0 = unlimited), idle time (s) after
+# which a pooled connection is checked with NOOP before reuse
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") not in ("0", "false", "False")
+SMTP_TIMEOUT = 30
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_MAX_PER_CONNECTION = int(os.getenv("SMTP_MAX_PER_CONNECTION", 100))
+SMTP_RATE_PER_MINUTE = int(os.getenv("SMTP_RATE_PER_MINUTE", 30))
+SMTP_IDLE_CHECK = 30
+
+# Outbox: send attempts per email, lease while sending (s), minimum gap between
+# emails to the same recipient domain (s), emails sent at once by the outbox worker
+OUTBOX_MAX_ATTEMPTS = 3
+OUTBOX_LEASE_SECONDS = 120
+OUTBOX_DOMAIN_INTERVAL = int(os.getenv("OUTBOX_DOMAIN_INTERVAL", 20))
+OUTBOX_CONCURRENCY = SMTP_POOL_SIZE
+
+# Site triage before audits: DNS, connect and page timeouts (s), bytes read of the home
+# page, sites checked at once, and how long a result is trusted (s): failures that may be
+# transient (unreachable, HTTP 5xx) are checked again much sooner than the rest
+TRIAGE_DNS_TIMEOUT = 3
+TRIAGE_CONNECT_TIMEOUT = 3
+TRIAGE_TIMEOUT = float(os.getenv("TRIAGE_TIMEOUT", 8))
+TRIAGE_MAX_BYTES = 64 * 1024
+TRIAGE_CONCURRENCY = int(os.getenv("TRIAGE_CONCURRENCY", 50))
+TRIAGE_MAX_AGE = int(os.getenv("TRIAGE_MAX_AGE", 7 * 24 * 3600))
+TRIAGE_RETRY_AGE = int(os.getenv("TRIAGE_RETRY_AGE", 3600))
+
+# Audit tiers: the tier pipeline workers use ("quick", "deep" or "auto"), and the opportunity
+# (100 - quick score) at which "auto" goes on to the deep audit
+AUDIT_TIER = os.getenv("AUDIT_TIER", "auto")
+DEEP_AUDIT_MIN_OPPORTUNITY = int(os.getenv("DEEP_AUDIT_MIN_OPPORTUNITY", 30))
+
+# Time budget of one audit (s), spread over its analyzers; stragglers are cancelled
+AUDIT_DEADLINE = float(os.getenv("AUDIT_DEADLINE", 90))
+
+# Per-host health of fetched sites (utils/host_health.py): shortest adaptive timeout (s),
+# failures in a row that open a host's circuit breaker, how long it stays open (s),
+# and how many hosts are remembered
+HOST_TIMEOUT_MIN = float(os.getenv("HOST_TIMEOUT_MIN", 3))
+HOST_BREAKER_FAILURES = int(os.getenv("HOST_BREAKER_FAILURES", 2))
+HOST_BREAKER_COOLDOWN = float(os.getenv("HOST_BREAKER_COOLDOWN", 60))
+HOST_HEALTH_MAX_HOSTS = 10000
+
+# Audit profiles (main.py analyze --profile): output directory, sampling interval (s)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_INTERVAL = 0.005
+
+# Prometheus-style /metrics endpoint for worker, serve and outbox --run (0 = off)
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+# Reporting (created on first report, not at import)
+REPORT_OUTPUT_DIR = os.getenv("REPORT_OUTPUT_DIR", os.path.join(BASE_DIR, "reports"))
+# Content-addressed cache of rendered reports: LRU files capped at REPORT_CACHE_MAX_BYTES,
+# with the most recent REPORT_CACHE_MEMORY_ITEMS also kept in memory
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(BASE_DIR, "storage", "report_cache"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+REPORT_CACHE_MEMORY_ITEMS = 32
+# Processes rendering batch reports (0 = one per CPU core)
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 0))
@@ -4,16 +4,26 @@ import os
 import sys
 import asyncio
 import json
-import subprocess
 import sqlite3
+import time
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from storage.database import get_connection, insert_lead, delete_lead
-from reporting.pdf_generator import PDFReportGenerator
-from scraper.maps_scraper import MapsScraper
-from scraper.justdial_scraper import JustDialScraper
+from storage.database import (
+    get_connection, init_db, get_lead, get_latest_audit, get_leads_version, query_leads, get_lead_categories,
+    delete_leads, update_outreach_statuses, LEAD_SORT_COLUMNS
+)
+from pipeline.scrape import scrape_leads, store_lead
+from storage import job_queue
+from pipeline.background import BackgroundExecutor
+from pipeline.campaign import run_outreach_campaign
+from pipeline.outbox import drain_outbox
+from storage import outbox
+from pipeline.report import generate_reports
+from storage.report_cache import get_report_cache
+from ai.score_calculator import format_score
+from config import REPORT_OUTPUT_DIR
 from ai.suggestion_generator import SuggestionGenerator
 
 # Fix for Windows asyncio loop with Playwright
@@ -78,19 +88,73 @@ st.markdown("""
 
 st.title("🚀 AI Website Auditor Dashboard")
 
+# Dashboard source labels -> CLI/pipeline source names
+SOURCE_NAMES = {"Google Maps": "maps", "JustDial": "justdial"}
+
 # Sidebar
 st.sidebar.header("Navigation")
 page = st.sidebar.radio("Go to", ["Scrape", "Leads", "Audit", "Reports", "Mass Outreach"])
 
-def get_leads():
-    """Fetch leads from database - always fresh data."""
+@st.cache_resource
+def get_background_executor():
+    """One executor for the whole Streamlit server, shared by every session."""
+    return BackgroundExecutor()
+
+@st.fragment(run_every=2)
+def show_job_progress(job_id, title):
+    """Polls a background job and reruns the page once when it finishes."""
+    job = get_background_executor().get(job_id)
+    if job is None:
+        return
+    if not job.finished:
+        elapsed = int(time.time() - (job.started_at or job.submitted_at))
+        state = job.step or "Waiting for a free worker"
+        st.progress(job.progress, text=f"⏳ {title}: {state}... ({elapsed}s)")
+    elif job.status == "done":
+        st.success(f"✅ {title} completed in {int(job.finished_at - job.started_at)}s.")
+    else:
+        st.error(f"❌ {title} failed: {job.error}")
+    if job.logs:
+        with st.expander("Log", expanded=not job.finished):
+            st.code("\n".join(job.logs[-200:]))
+    
+    # Show fresh results once, then stop rerunning the page for this job
+    refreshed = st.session_state.setdefault("refreshed_jobs", set())
+    if job.finished and job.id not in refreshed:
+        refreshed.add(job.id)
+        st.rerun()
+
+@st.cache_resource
+def ensure_db():
+    """Creates missing tables and triggers once per server (older databases)."""
+    init_db()
+
+# Query results are cached per leads-table version: any insert, update or delete
+# (from this dashboard, the CLI or a worker) bumps the version and misses the cache.
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_leads_page(version, filters, sort, descending, page_size, page_number):
+    return query_leads(**filters, sort=sort, descending=descending, limit=page_size, offset=page_number * page_size)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_categories(version):
+    return get_lead_categories()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def export_leads_csv(version, filters):
+    rows, _ = query_leads(**filters, limit=None)
+    return pd.DataFrame(rows).to_csv(index=False).encode('utf-8')
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _load_leads(version):
     conn = get_connection()
-    conn.row_factory = None  # Reset row factory
-    conn.row_factory = sqlite3.Row  # Set it again
     df = pd.read_sql_query("SELECT * FROM leads ORDER BY created_at DESC", conn)
     conn.close()
     return df
 
+def get_leads():
+    """Fetch leads from database, cached until the leads table changes."""
+    return _load_leads(get_leads_version())
+
 def get_audit(lead_id):
     """Fetch audit from database - always fresh data."""
     conn = get_connection()
@@ -106,15 +170,15 @@ def get_audit(lead_id):
         return dict(result)
     return None
 
-async def run_scraper_async(source, keyword, location, total):
-    results = []
-    if source == "Google Maps":
-        scraper = MapsScraper()
-        results = await scraper.scrape(keyword, location, total)
-    elif source == "JustDial":
-        scraper = JustDialScraper()
-        results = scraper.scrape(keyword, location, total)
-    return results
+async def run_scraper_async(source, keyword, location, total, use_cache=True, tiled=False):
+    # Repeated keyword/location queries are served from the scrape cache and only topped up.
+    # The cache uses the CLI source names so `main.py scrape` shares it.
+    return await scrape_leads(SOURCE_NAMES.get(source, source), keyword, location, total, use_cache=use_cache, tiled=tiled)
+
+ensure_db()
+active_jobs = get_background_executor().active_jobs()
+if active_jobs:
+    st.sidebar.info(f"⏳ {len(active_jobs)} background job(s) running: " + ", ".join(sorted({j.label for j in active_jobs})))
 
 if page == "Scrape":
     st.header("Lead Scraper")
@@ -125,14 +189,16 @@ if page == "Scrape":
         keyword = st.text_input("Keyword (e.g., Dentist, Gym)")
     with col2:
         location = st.text_input("Location (e.g., New York, Mumbai)")
-        total = st.number_input("Number of Leads", min_value=1, max_value=50, value=5)
+        tiled = source == "Google Maps" and st.checkbox("Tiled search: split the city into areas for large lead lists", value=False)
+        total = st.number_input("Number of Leads", min_value=1, max_value=2000 if tiled else 50, value=5)
         strict_mode = st.checkbox("Strict Mode: Only save leads with Website & Email", value=True)
+        use_cache = st.checkbox("Reuse cached results for this search", value=True)
         
     if st.button("Start Scraping"):
         if keyword and location:
             with st.spinner(f"Scraping {source} for {keyword} in {location}..."):
                 # Run async scraper
-                results = asyncio.run(run_scraper_async(source, keyword, location, total))
+                results = asyncio.run(run_scraper_async(source, keyword, location, total, use_cache, tiled))
                 
                 if results:
                     st.success(f"Found {len(results)} potential leads!")
@@ -150,11 +216,12 @@ if page == "Scrape":
                         skipped_count = 0
                     
                     if filtered_results:
-                        count = 0
-                        for lead in filtered_results:
-                            if insert_lead(lead):
-                                count += 1
-                        st.info(f"Saved {count} leads to database.")
+                        # Leads from a cached search are already stored and are not inserted again
+                        stored = [store_lead(lead) for lead in filtered_results]
+                        count = sum(1 for lead_id, inserted in stored if lead_id and inserted)
+                        existing = sum(1 for lead_id, inserted in stored if lead_id and not inserted)
+                        st.info(f"Saved {count} leads to database." +
+                                (f" {existing} were already saved." if existing else ""))
                         if skipped_count > 0:
                             st.warning(f"Filtered out {skipped_count} leads without email or website.")
                     else:
@@ -166,43 +233,96 @@ if page == "Scrape":
 
 elif page == "Leads":
     st.header("Leads Management")
-    leads = get_leads()
+    version = get_leads_version()
     
-    if not leads.empty:
-        # Display leads with delete option
-        for index, row in leads.iterrows():
-            col1, col2, col3, col4, col5 = st.columns([3, 2, 2, 2, 1])
-            with col1:
-                st.write(f"**{row['business_name']}**")
-            with col2:
-                st.write(row['category'])
-            with col3:
-                email = row['email'] if 'email' in leads.columns and pd.notna(row['email']) else "N/A"
-                st.write(email)
-            with col4:
-                st.write(row['website'] if row['website'] else "N/A")
-            with col5:
-                if st.button("Delete", key=f"del_{row['id']}"):
-                    if delete_lead(row['id']):
-                        st.success("Deleted!")
-                        st.rerun()
-                    else:
-                        st.error("Failed")
+    # Filters and sorting run in SQL; only the current page is loaded
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    with col1:
+        search = st.text_input("Search name, email or website", key="leads_search")
+    with col2:
+        category = st.selectbox("Category", ["All"] + load_categories(version), key="leads_category")
+    with col3:
+        status = st.selectbox("Outreach status", ["All", "Pending", "Draft", "Queued", "Sent", "Failed"], key="leads_status")
+    with col4:
+        sort = st.selectbox("Sort by", LEAD_SORT_COLUMNS, key="leads_sort")
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
+    with col1:
+        has_email = st.checkbox("Has email", key="leads_has_email")
+    with col2:
+        has_website = st.checkbox("Has website", key="leads_has_website")
+    with col3:
+        descending = st.checkbox("Descending", value=True, key="leads_desc")
+    with col4:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="leads_page_size")
+    
+    filters = {
+        "search": search.strip() or None,
+        "category": None if category == "All" else category,
+        "status": None if status == "All" else status,
+        "has_email": has_email,
+        "has_website": has_website,
+    }
+    # Back to the first page whenever the query changes
+    query_key = (tuple(filters.items()), sort, descending, page_size)
+    if st.session_state.get("leads_query") != query_key:
+        st.session_state["leads_query"] = query_key
+        st.session_state["leads_page"] = 1
+    
+    _, total = load_leads_page(version, filters, sort, descending, 0, 0)  # count only
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get("leads_page", 1) > pages:
+        st.session_state["leads_page"] = pages
+    page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="leads_page")
+    rows, total = load_leads_page(version, filters, sort, descending, page_size, page_number - 1)
+    
+    if rows:
+        st.caption(f"Showing {len(rows)} of {total} leads")
+        table = pd.DataFrame(rows)
+        table.insert(0, "Select", False)
+        columns = ["Select", "id", "business_name", "category", "email", "website", "site_status", "phone", "outreach_status", "created_at"]
+        edited = st.data_editor(
+            table[[c for c in columns if c in table.columns]],
+            hide_index=True,
+            use_container_width=True,
+            disabled=[c for c in columns if c != "Select"],
+            key=f"leads_editor_{version}_{page_number}"
+        )
+        selected = [int(i) for i in edited.loc[edited["Select"], "id"]]
+        
+        # Bulk actions on the selected rows
+        col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
+        with col1:
+            new_status = st.selectbox("Set outreach status", ["Pending", "Draft", "Queued", "Sent", "Failed"], key="leads_new_status")
+        with col2:
+            if st.button(f"Update status ({len(selected)})", disabled=not selected):
+                update_outreach_statuses(selected, new_status)
+                st.rerun()
+        with col3:
+            if st.button(f"Queue audits ({len(selected)})", disabled=not selected):
+                executor = get_background_executor()
+                for lead_id in selected:
+                    executor.submit_audit(lead_id)
+                st.success(f"Queued {len(selected)} audits.")
+        with col4:
+            if st.button(f"🗑️ Delete ({len(selected)})", disabled=not selected):
+                st.success(f"Deleted {delete_leads(selected)} leads.")
+                st.rerun()
         
         st.divider()
         st.subheader("Export Leads")
         
-        # Convert DataFrame to CSV for download
-        csv = leads.to_csv(index=False).encode('utf-8')
-        
-        st.download_button(
-            label="Download CSV",
-            data=csv,
-            file_name='leads_export.csv',
-            mime='text/csv',
-        )
-    else:
+        # CSV of every lead matching the filters, built on request
+        if st.button("Prepare CSV"):
+            st.download_button(
+                label=f"Download CSV ({total} leads)",
+                data=export_leads_csv(version, filters),
+                file_name='leads_export.csv',
+                mime='text/csv',
+            )
+    elif total == 0 and not any(filters.values()):
         st.info("No leads found. Go to 'Scrape' page to find some.")
+    else:
+        st.info("No leads match these filters.")
 
 elif page == "Audit":
     st.header("Run Audit")
@@ -220,42 +340,19 @@ elif page == "Audit":
         st.write(f"**Email:** {selected_lead.get('email', 'N/A')}")
         
         # Auto-Audit Button
+        # Audits run on the shared background executor; the page polls their state
         if st.button("Start Full Audit"):
-            with st.spinner(f"Auditing {selected_lead['website']}... This may take a minute."):
-                try:
-                    # Get the project root directory (parent of dashboard folder)
-                    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    
-                    # Run the main.py analyze command as a subprocess
-                    process = subprocess.Popen(
-                        [sys.executable, "main.py", "analyze", "--lead_id", str(lead_id)],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        cwd=project_root  # Use project root as working directory
-                    )
-                    
-                    # Wait for the process to complete (this blocks until done)
-                    stdout, stderr = process.communicate(timeout=120)  # 2 minute timeout
-                    
-                    if process.returncode == 0:
-                        st.success("✅ Audit completed successfully!")
-                        st.text(stdout)  # Show the output
-                        st.info("💡 Click the '🔄 Refresh Data' button in the Reports section to generate the PDF report.")
-                    else:
-                        st.error(f"❌ Audit failed!")
-                        st.text(f"Error: {stderr}")
-                        st.text(f"Output: {stdout}")
-                except subprocess.TimeoutExpired:
-                    st.error("⏱️ Audit timed out (took longer than 2 minutes)")
-                    process.kill()
-                except Exception as e:
-                    st.error(f"❌ Error running audit: {e}")
+            job = get_background_executor().submit_audit(lead_id)
+            st.session_state.setdefault("audit_jobs", {})[lead_id] = job.id
+        
+        audit_job_id = st.session_state.get("audit_jobs", {}).get(lead_id)
+        if audit_job_id:
+            show_job_progress(audit_job_id, f"Audit of {selected_lead['website']}")
 
         # Show existing audit if available
         audit = get_audit(lead_id)
         if audit is not None:
-            st.success("Audit Results Available")
+            st.success(f"Audit Results Available ({audit.get('tier') or 'deep'} audit)")
             
             # Metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -339,48 +436,69 @@ elif page == "Reports":
         audit = get_audit(lead_id)
         
         if audit is not None:
-            st.success(f"✅ Audit Available - Overall Score: {audit['overall_score']}/100")
+            st.success(f"✅ Audit Available - Overall Score: {format_score(audit['overall_score'])}")
             
             # Show score breakdown
             col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Performance", f"{audit['performance_score']}/100")
-            col2.metric("SEO", f"{audit['seo_score']}/100")
-            col3.metric("UX", f"{audit['ux_score']}/100")
-            col4.metric("Mobile", f"{audit['mobile_score']}/100")
+            col1.metric("Performance", format_score(audit['performance_score']))
+            col2.metric("SEO", format_score(audit['seo_score']))
+            col3.metric("UX", format_score(audit['ux_score']))
+            col4.metric("Mobile", format_score(audit['mobile_score']))
             
             st.divider()
             
-            if st.button("📄 Generate PDF Report"):
-                filename = f"report_{lead_id}.pdf"
-                filepath = os.path.join("reports", filename)
-                
+            # Suggestions and PDFs are cached by content (lead + audit + suggestions): once
+            # made for this audit they are served from memory or disk without calling
+            # Gemini or reportlab again
+            report_cache = get_report_cache()
+            lead = get_lead(lead_id)
+            audit_data_dict = get_latest_audit(lead_id)
+            suggestions = report_cache.get_suggestions(lead, audit_data_dict)
+            
+            label = "🔄 Regenerate AI Suggestions" if suggestions is not None else "📄 Generate PDF Report"
+            if st.button(label):
+                with st.spinner("Generating AI suggestions..."):
+                    suggestions = SuggestionGenerator().generate(lead, audit_data_dict)
+                # Failed Gemini calls are shown in the report but not cached
+                if not suggestions.startswith("Error"):
+                    report_cache.put_suggestions(lead, audit_data_dict, suggestions)
+            
+            if suggestions is not None:
                 try:
-                    audit_data_dict = json.loads(audit['audit_data'])
-                    audit_data_dict['performance_score'] = audit['performance_score']
-                    audit_data_dict['seo_score'] = audit['seo_score']
-                    audit_data_dict['ux_score'] = audit['ux_score']
-                    audit_data_dict['mobile_score'] = audit['mobile_score']
-                    audit_data_dict['overall_score'] = audit['overall_score']
+                    with st.spinner("Creating PDF..."):
+                        pdf = report_cache.get_or_render(lead, audit_data_dict, suggestions)
+                    st.success("✅ Report ready!")
+                    st.download_button("⬇️ Download PDF Report", pdf, file_name=f"report_{lead_id}.pdf", mime="application/pdf")
                 except Exception as e:
-                    st.error(f"Error parsing audit data: {e}")
-                    audit_data_dict = {}
-                
-                # Generate AI suggestion for the report
-                with st.spinner("Generating AI suggestions..."):
-                    gen_ai = SuggestionGenerator()
-                    suggestions = gen_ai.generate(dict(selected_lead), audit_data_dict)
-                
-                with st.spinner("Creating PDF..."):
-                    gen = PDFReportGenerator()
-                    if gen.generate(dict(selected_lead), audit_data_dict, suggestions, filepath):
-                        st.success(f"✅ Report generated successfully!")
-                        with open(filepath, "rb") as f:
-                            st.download_button("⬇️ Download PDF Report", f, file_name=filename, mime="application/pdf")
-                    else:
-                        st.error("Failed to generate report.")
+                    st.error(f"Failed to generate report: {e}")
         else:
             st.warning("⚠️ No audit data found.")
             st.info(f"Please run an audit for '{selected_lead['business_name']}' in the Audit section first.")
+        
+        st.divider()
+        st.subheader("Batch Reports")
+        # Renders every audited lead of a campaign in parallel processes; reports newer
+        # than their audit are skipped
+        campaign = st.selectbox("Campaign (category)", ["All"] + load_categories(get_leads_version()), key="batch_campaign")
+        merged = st.checkbox("Also build one merged campaign PDF", key="batch_merged")
+        if st.button("📚 Generate All Reports"):
+            campaign = None if campaign == "All" else campaign
+            merged_path = os.path.join(REPORT_OUTPUT_DIR, f"campaign_{campaign or 'all'}.pdf".replace(" ", "_")) if merged else None
+            job = get_background_executor().submit(
+                "reports", lambda job: generate_reports(campaign=campaign, merged_path=merged_path)
+            )
+            st.session_state["report_batch_job"] = job.id
+        
+        batch_job_id = st.session_state.get("report_batch_job")
+        if batch_job_id:
+            show_job_progress(batch_job_id, "Batch reports")
+            batch_job = get_background_executor().get(batch_job_id)
+            if batch_job and batch_job.status == "done":
+                summary = batch_job.result
+                st.write(f"Rendered {len(summary['rendered'])}, skipped {len(summary['skipped'])} up to date, failed {len(summary['failed'])}.")
+                if summary['merged']:
+                    with open(summary['merged'], "rb") as f:
+                        st.download_button("⬇️ Download Merged PDF", f, file_name=os.path.basename(summary['merged']), mime="application/pdf")
     else:
         st.info("No leads available. Go to the Scrape section to find leads.")
 
@@ -422,128 +540,68 @@ Best,
             smtp_port = st.text_input("SMTP Port", value="587")
             smtp_user = st.text_input("SMTP Email")
             smtp_pass = st.text_input("SMTP Password", type="password")
+            send_window = st.text_input("Send window (optional)", placeholder="09:00-17:00",
+                                        help="Queued emails are only sent between these times (server time).")
+        
+        background = st.checkbox(
+            "Run in background workers (survives browser refresh)", value=False,
+            help="Queues the campaign for `python main.py worker --stage <stage>` processes. "
+                 "Workers send with the SMTP_* settings from .env."
+        )
+
+    if background:
+        st.subheader("Pipeline Queues")
+        stats = job_queue.queue_stats()
+        st.dataframe(pd.DataFrame(stats).T, use_container_width=True)
+        if st.button("🔄 Refresh Queue Status"):
+            st.rerun()
 
     if st.button("🚀 Start Mass Outreach Campaign", type="primary"):
         if not keyword or not location:
             st.error("Please enter Keyword and Location.")
+        elif background:
+            job_id = job_queue.enqueue("scrape", {
+                "source": SOURCE_NAMES.get(source, source),
+                "keyword": keyword,
+                "location": location,
+                "total": int(total),
+                "campaign": {
+                    "strict": strict_mode_mass,
+                    "template": template,
+                    "send": bool(os.getenv("SMTP_USER") and os.getenv("SMTP_PASSWORD")),
+                    "window": send_window or None,
+                    "name": f"{SOURCE_NAMES.get(source, source)}:{keyword}:{location}".lower()
+                }
+            })
+            st.success(f"Campaign queued (job {job_id}). Start workers with "
+                       "`python main.py worker --stage scrape|audit|ai|outreach` to process it.")
         else:
-            status_container = st.container()
-            log_container = st.empty()
-            progress_bar = st.progress(0)
-            
-            logs = []
-            def log(message):
-                logs.append(message)
-                log_container.code("\n".join(logs))
-            
-            # 1. Scrape
-            log(f"Step 1: Scraping {total} leads from {source}...")
-            results = asyncio.run(run_scraper_async(source, keyword, location, total))
-            
-            if not results:
-                log("No leads found. Stopping.")
-                st.error("No leads found.")
-            else:
-                log(f"Found {len(results)} raw leads.")
-                
-                # 2. Filter
-                if strict_mode_mass:
-                    valid_leads = [l for l in results if l.get('email') and l.get('email') != 'N/A' and l.get('website') and l.get('website') != 'N/A']
-                    log(f"Strict Mode ON: Filtered to {len(valid_leads)} leads with Email & Website.")
-                else:
-                    valid_leads = results
-                    log(f"Strict Mode OFF: Processing all {len(valid_leads)} leads.")
-                
-                if not valid_leads:
-                    st.warning("No valid leads found matching criteria.")
-                else:
-                    # Save leads first
-                    saved_leads = []
-                    for l in valid_leads:
-                        lid = insert_lead(l)
-                        if lid:
-                            l['id'] = lid
-                            saved_leads.append(l)
-                    
-                    log(f"Saved {len(saved_leads)} leads to database.")
-                    
-                    # Initialize tools
-                    from ai.email_generator import EmailGenerator
-                    from utils.email_sender import EmailSender
-                    
-                    email_gen = EmailGenerator()
-                    email_sender = EmailSender(smtp_server, smtp_port, smtp_user, smtp_pass)
-                    
-                    # 3. Process Loop
-                    success_count = 0
-                    for i, lead in enumerate(saved_leads):
-                        progress = (i + 1) / len(saved_leads)
-                        progress_bar.progress(progress)
-                        
-                        log(f"Processing {lead['business_name']} ({i+1}/{len(saved_leads)})...")
-                        
-                        # A. Audit
-                        log(f"  - Running Audit for {lead['website']}...")
-                        # Run audit logic (reusing main.py logic or calling direct if possible, but main.py is script)
-                        # We will use subprocess to ensure clean state like in Audit page
-                        try:
-                            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                            process = subprocess.Popen(
-                                [sys.executable, "main.py", "analyze", "--lead_id", str(lead['id'])],
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                text=True,
-                                cwd=project_root
-                            )
-                            stdout, stderr = process.communicate(timeout=120)
-                            
-                            if process.returncode != 0:
-                                log(f"  - Audit failed: {stderr}")
-                                continue
-                                
-                            # Fetch audit result
-                            audit = get_audit(lead['id'])
-                            if not audit:
-                                log("  - Audit data not found after run.")
-                                continue
-                                
-                            audit_data = json.loads(audit['audit_data'])
-                            # Merge scores
-                            audit_data['performance_score'] = audit['performance_score']
-                            audit_data['seo_score'] = audit['seo_score']
-                            audit_data['ux_score'] = audit['ux_score']
-                            audit_data['mobile_score'] = audit['mobile_score']
-                            audit_data['overall_score'] = audit['overall_score']
-                            
-                            # B. Generate Email
-                            log("  - Generating personalized email...")
-                            email_body = email_gen.generate(lead, audit_data, template)
-                            
-                            # C. Send Email
-                            if smtp_user and smtp_pass:
-                                log(f"  - Sending email to {lead['email']}...")
-                                sent, msg = email_sender.send_email(lead['email'], f"Question about {lead['business_name']}", email_body)
-                                if sent:
-                                    log("  - Email SENT successfully.")
-                                    # Update DB status
-                                    conn = get_connection()
-                                    conn.execute("UPDATE leads SET outreach_status = ?, outreach_time = CURRENT_TIMESTAMP WHERE id = ?", ("Sent", lead['id']))
-                                    conn.commit()
-                                    conn.close()
-                                    success_count += 1
-                                else:
-                                    log(f"  - Email Sending FAILED: {msg}")
-                            else:
-                                log("  - Email generated (Draft Mode - SMTP not set).")
-                                log(f"  - Preview: {email_body[:50]}...")
-                                # Save as draft status
-                                conn = get_connection()
-                                conn.execute("UPDATE leads SET outreach_status = ?, outreach_time = CURRENT_TIMESTAMP WHERE id = ?", ("Draft", lead['id']))
-                                conn.commit()
-                                conn.close()
-                                success_count += 1
-                                
-                        except Exception as e:
-                            log(f"  - Error processing lead: {e}")
-                            
-                    st.success(f"Campaign Completed! Successfully processed {success_count} leads.")
+            executor = get_background_executor()
+            sending = bool(smtp_user and smtp_pass)
+            job = executor.submit(
+                "campaign", run_outreach_campaign,
+                SOURCE_NAMES.get(source, source), keyword, location, int(total), strict_mode_mass, template,
+                sending, send_window or None
+            )
+            st.session_state["campaign_job"] = job.id
+            if sending:
+                # Sends queued emails while the campaign writes them, then whatever is still due
+                smtp = {"server": smtp_server, "port": smtp_port, "user": smtp_user, "password": smtp_pass}
+                outbox_job = executor.submit("outbox", drain_outbox, smtp, lambda: not job.finished)
+                st.session_state["outbox_job"] = outbox_job.id
+            st.success("Campaign started in the background. You can keep using the dashboard.")
+
+    campaign_job_id = st.session_state.get("campaign_job")
+    if campaign_job_id:
+        show_job_progress(campaign_job_id, "Campaign")
+    outbox_job_id = st.session_state.get("outbox_job")
+    if outbox_job_id:
+        show_job_progress(outbox_job_id, "Sending")
+
+    st.subheader("Outbox")
+    outbox_counts = outbox.outbox_stats()
+    cols = st.columns(5)
+    for col, status in zip(cols, ["queued", "due", "sending", "sent", "failed"]):
+        col.metric(status.capitalize(), outbox_counts[status])
+    if outbox_counts["failed"] and st.button("🔁 Retry Failed Emails"):
+        st.success(f"{outbox.retry_failed()} emails queued again.")
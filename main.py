@@ -1,143 +1,140 @@
-import asyncio
 import argparse
-import json
-from scraper.maps_scraper import MapsScraper
-from scraper.justdial_scraper import JustDialScraper
-from storage.database import init_db, insert_lead, get_connection
-from analysis.performance_analyzer import PerformanceAnalyzer
-from analysis.seo_analyzer import SEOAnalyzer
-from analysis.ux_analyzer import UXAnalyzer
-from analysis.mobile_test import MobileTest
-from analysis.broken_links_checker import BrokenLinksChecker
-from ai.score_calculator import ScoreCalculator
-from ai.suggestion_generator import SuggestionGenerator
-from reporting.pdf_generator import PDFReportGenerator
 import os
 
-async def run_scraper(source, keyword, location, total):
-    print(f"Starting scraper: {source} for {keyword} in {location}")
-    results = []
-    if source.lower() == "maps":
-        scraper = MapsScraper()
-        results = await scraper.scrape(keyword, location, total)
-    elif source.lower() == "justdial":
-        scraper = JustDialScraper()
-        results = scraper.scrape(keyword, location, total)
-    
-    print(f"Found {len(results)} leads.")
-    for lead in results:
-        lead_id = insert_lead(lead)
-        if lead_id:
-            print(f"Saved lead: {lead['business_name']} (ID: {lead_id})")
-
-async def run_analysis(lead_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM leads WHERE id = ?", (lead_id,))
-    lead = cursor.fetchone()
-    conn.close()
-    
-    if not lead:
-        print("Lead not found.")
-        return
+# Heavy modules (Playwright, reportlab, Gemini, requests) are imported inside the
+# command that needs them, so `init`, `report` or `queue` start in milliseconds.
+# test_startup.py keeps each command under its import-time budget.
 
-    url = lead['website']
-    if not url:
-        print("Lead has no website to analyze.")
-        return
+# Mirrors storage.job_queue.STAGES without importing the queue for every command
+STAGES = ["scrape", "audit", "ai", "outreach"]
 
-    print(f"Analyzing {url}...")
-    
-    # Initialize analyzers
-    perf = PerformanceAnalyzer()
-    seo = SEOAnalyzer()
-    ux = UXAnalyzer()
-    mobile = MobileTest()
-    links = BrokenLinksChecker()
-    
-    # Run analysis
-    # Note: Some might be async, some sync. Assuming sync for simplicity unless known async.
-    # MobileTest is async based on previous file view.
-    
-    # Mocking sync calls for analyzers I haven't seen fully but assuming structure
-    # If they are async, I need to await them.
-    # Let's assume they are sync except MobileTest which I saw was async.
-    
-    # Actually, I should check if they are async. 
-    # Based on file names, they likely use requests or playwright.
-    # I'll wrap in try/except to be safe and assume sync for now, except Mobile.
-    
-    try:
-        p_data = perf.analyze(url)
-    except:
-        p_data = {"score": 50, "issues": ["Performance analysis failed"]}
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
+def bbox_arg(value):
+    from scraper.geo_tiles import parse_bbox
     try:
-        s_data = seo.analyze(url)
-    except:
-        s_data = {"score": 50, "issues": ["SEO analysis failed"]}
+        return parse_bbox(value)
+    except ValueError as e:
+        # argparse only shows the message of an ArgumentTypeError
+        raise argparse.ArgumentTypeError(str(e))
 
-    try:
-        u_data = ux.analyze(url)
-    except:
-        u_data = {"score": 50, "issues": ["UX analysis failed"]}
-        
-    try:
-        m_data = await mobile.check(url)
-    except:
-        m_data = {"score": 50, "issues": ["Mobile analysis failed"]}
+def via_daemon(request, label):
+    """
+    Runs `request` (DaemonClient calls) and reports failures without a traceback.
 
+    Returns False only when the daemon could not be reached any more, so the caller
+    should do the work in this process instead. A job that failed in the daemon, or
+    did not finish in time, is not run again here.
+    """
+    import socket
+    from utils.daemon_client import DaemonError
     try:
-        l_data = links.check(url)
-    except:
-        l_data = {"score": 100, "count": 0}
-
-    # Calculate Score
-    calc = ScoreCalculator()
-    overall_score = calc.calculate(p_data, s_data, u_data, m_data, l_data)
-    priorities = calc.get_priority_list(p_data, s_data, u_data, m_data, l_data)
-    
-    # Run AI Audit Analysis
-    print("Running AI Qualitative Analysis...")
-    try:
-        from ai.ai_analyzer import AIAuditAnalyzer
-        ai_analyzer = AIAuditAnalyzer()
-        # We don't have raw HTML here easily unless we refactor, so let analyzer fetch it again for now
-        # Optimization: In future, pass HTML from one of the other analyzers if possible
-        ai_review = ai_analyzer.analyze(url)
-    except Exception as e:
-        print(f"AI Analysis failed: {e}")
-        ai_review = {"error": str(e)}
-
-    audit_data = {
-        "performance": p_data,
-        "seo": s_data,
-        "ux": u_data,
-        "mobile": m_data,
-        "links": l_data,
-        "priorities": priorities,
-        "ai_review": ai_review
-    }
-    
-    # Save Audit
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO audits (lead_id, performance_score, seo_score, ux_score, mobile_score, overall_score, audit_data)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        lead_id,
-        p_data.get('score', 0),
-        s_data.get('score', 0),
-        u_data.get('score', 0),
-        m_data.get('score', 0),
-        overall_score,
-        json.dumps(audit_data)
-    ))
-    conn.commit()
-    conn.close()
+        request()
+    except DaemonError as e:
+        print(f"{label} failed in the daemon: {e}")
+    except socket.timeout:
+        print(f"The daemon did not answer in time; the {label.lower()} may still finish there.")
+    except (OSError, ValueError) as e:
+        print(f"Could not reach the daemon ({e}), running in this process.")
+        return False
+    return True
+
+def enqueue_jobs(args):
+    """Puts work on the pipeline queues for `main.py worker` processes to pick up."""
+    from storage import job_queue
+    from storage.database import auditable_lead_ids
+    from storage.outbox import parse_window
+    parse_window(args.window)
+    campaign = {"strict": args.strict, "send": args.send, "window": args.window, "name": args.name, "tier": args.tier}
+    if args.template_file:
+        with open(args.template_file, encoding="utf-8") as f:
+            campaign["template"] = f.read()
     
-    print(f"Audit completed. Overall Score: {overall_score}")
+    if args.stage == "scrape":
+        if not (args.source and args.keyword and args.location):
+            print("--source, --keyword and --location are required for scrape jobs.")
+            return
+        job_id = job_queue.enqueue("scrape", {
+            "source": args.source, "keyword": args.keyword, "location": args.location,
+            "total": args.total, "tiled": args.tiled, "campaign": campaign
+        })
+        print(f"Queued scrape job {job_id}.")
+    else:
+        # Leads whose website recently failed triage are not worth queueing
+        lead_ids = auditable_lead_ids() if args.all else args.lead_id or []
+        for lead_id in lead_ids:
+            job_queue.enqueue(args.stage, {"lead_id": lead_id, "campaign": campaign})
+        print(f"Queued {len(lead_ids)} {args.stage} jobs.")
+
+def run_triage(args):
+    import asyncio
+    from collections import Counter
+    from pipeline.triage import triage_leads
+    from analysis.site_triage import TRIAGE_STATUSES
+
+    def progress(done, total):
+        if done % 100 == 0 or done == total:
+            print(f"Triaged {done}/{total}")
+
+    statuses = asyncio.run(triage_leads(args.lead_id or None, recheck=args.recheck,
+                                        concurrency=args.concurrency, progress=progress))
+    counts = Counter(statuses.values())
+    for status in TRIAGE_STATUSES:
+        print(f"{status:<12}{counts.get(status, 0):>7}")
+
+def print_queue_stats():
+    from storage import job_queue
+    stats = job_queue.queue_stats()
+    print(f"{'Stage':<10}{'Queued':>8}{'Running':>9}{'Done':>8}{'Dead':>8}")
+    for stage, counts in stats.items():
+        print(f"{stage:<10}{counts.get('queued', 0):>8}{counts.get('running', 0):>9}{counts.get('done', 0):>8}{counts.get('dead', 0):>8}")
+
+def print_timing_stats(args):
+    from storage.timings import timing_stats
+    stats = timing_stats(since_hours=args.hours, kind=args.kind)
+    if not stats:
+        print("No audit timings recorded yet.")
+        return
+    print(f"{'Kind':<10}{'Name':<20}{'Count':>7}{'p50 ms':>9}{'p95 ms':>9}{'Max ms':>9}{'Total s':>9}{'Avg KB':>8}{'Errors':>8}")
+    for s in stats:
+        avg_kb = f"{s['avg_kb']:.0f}" if s['avg_kb'] is not None else "-"
+        print(f"{s['kind']:<10}{s['name'][:19]:<20}{s['count']:>7}{s['p50_ms']:>9.0f}{s['p95_ms']:>9.0f}"
+              f"{s['max_ms']:>9.0f}{s['total_s']:>9.1f}{avg_kb:>8}{s['errors']:>8}")
+    failing = [s for s in stats if s['top_errors']]
+    if failing:
+        print("\nMost common errors:")
+        for s in failing:
+            print(f"  {s['name']}: " + ", ".join(f"{error} x{count}" for error, count in s['top_errors']))
+
+def print_outbox_stats():
+    from storage import outbox
+    stats = outbox.outbox_stats()
+    print(f"{'Queued':>8}{'Due':>6}{'Sending':>9}{'Sent':>8}{'Failed':>8}")
+    print(f"{stats['queued']:>8}{stats['due']:>6}{stats['sending']:>9}{stats['sent']:>8}{stats['failed']:>8}")
+
+def percent_arg(value):
+    percent = float(value)
+    if not 0 < percent <= 100:
+        raise argparse.ArgumentTypeError("must be a percentage between 0 and 100")
+    return percent
+
+def add_profile_argument(subparser):
+    subparser.add_argument("--profile", type=percent_arg, nargs="?", const=100, metavar="PCT",
+                           help="Profile a random PCT%% of audits (default 100) into PROFILE_DIR")
+
+def start_metrics(port):
+    """Serves /metrics on localhost for long-running commands; port 0 leaves it off."""
+    if port is None:
+        from config import METRICS_PORT
+        port = METRICS_PORT
+    if port:
+        from utils.metrics import start_metrics_server
+        start_metrics_server(port)
+        print(f"Metrics at http://127.0.0.1:{port}/metrics")
 
 def main():
     parser = argparse.ArgumentParser(description="AI Website Auditor")
@@ -149,14 +146,83 @@ def main():
     scrape_parser.add_argument("--keyword", required=True)
     scrape_parser.add_argument("--location", required=True)
     scrape_parser.add_argument("--total", type=int, default=5)
+    scrape_parser.add_argument("--no-cache", action="store_true", help="Ignore cached results for this query")
+    scrape_parser.add_argument("--tiled", action="store_true", help="Maps only: split the location into tiles to get past the per-search result cap")
+    scrape_parser.add_argument("--grid", type=positive_int, help="Tiles per side of the location's bounding box (default: MAPS_TILE_GRID)")
+    scrape_parser.add_argument("--bbox", type=bbox_arg, help="Bounding box to tile as south,west,north,east (default: geocoded location)")
+    scrape_parser.add_argument("--neighbourhoods", help="Comma-separated neighbourhoods to search instead of a grid")
     
     # Analyze Command
     analyze_parser = subparsers.add_parser("analyze", help="Analyze a lead")
     analyze_parser.add_argument("--lead_id", type=int, required=True)
+    analyze_parser.add_argument("--no-daemon", action="store_true", help="Audit in this process even if `serve` is running")
+    analyze_parser.add_argument("--recheck", action="store_true",
+                                help="Triage the website again instead of trusting a recent failed check")
+    analyze_parser.add_argument("--tier", choices=["quick", "deep", "auto"], default="deep",
+                                help="quick: static analyzers only; auto: deep only if the quick score shows enough opportunity")
+    analyze_parser.add_argument("--profile", action="store_true",
+                                help="Write a wall-clock profile and top allocations to PROFILE_DIR (runs in-process)")
+    
+    # Triage Command
+    triage_parser = subparsers.add_parser("triage", help="Check which lead websites are live before auditing")
+    triage_parser.add_argument("--lead_id", type=int, nargs="*", help="Leads to check (default: all)")
+    triage_parser.add_argument("--recheck", action="store_true", help="Check again even if a recent result exists")
+    triage_parser.add_argument("--concurrency", type=int, help="Sites checked at once (default: TRIAGE_CONCURRENCY)")
     
     # Report Command
     report_parser = subparsers.add_parser("report", help="Generate PDF Report")
-    report_parser.add_argument("--lead_id", type=int, required=True)
+    report_target = report_parser.add_mutually_exclusive_group(required=True)
+    report_target.add_argument("--lead_id", type=int)
+    report_target.add_argument("--all", action="store_true", help="Every audited lead, rendered in parallel")
+    report_target.add_argument("--campaign", help="Audited leads of one category (the scrape keyword)")
+    report_parser.add_argument("--workers", type=int, help="Processes for --all/--campaign (default: one per CPU)")
+    report_parser.add_argument("--force", action="store_true", help="Re-render reports that are already up to date")
+    report_parser.add_argument("--merged", help="Also write all reports into this one PDF")
+    report_parser.add_argument("--no-daemon", action="store_true", help="Render in this process even if `serve` is running")
+
+    # Warm audit daemon: analyze/report/dashboard audits use it while it runs
+    serve_parser = subparsers.add_parser("serve", help="Run the audit daemon (warm browser and HTTP pools)")
+    serve_parser.add_argument("--metrics-port", type=int, help="Serve /metrics on this port (default: METRICS_PORT)")
+    add_profile_argument(serve_parser)
+
+    # Pipeline: queue jobs, run stage workers, inspect queues
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue pipeline jobs (scrape -> audit -> ai -> outreach)")
+    enqueue_parser.add_argument("stage", choices=STAGES)
+    enqueue_parser.add_argument("--source", choices=["maps", "justdial"])
+    enqueue_parser.add_argument("--keyword")
+    enqueue_parser.add_argument("--location")
+    enqueue_parser.add_argument("--total", type=int, default=5)
+    enqueue_parser.add_argument("--tiled", action="store_true")
+    enqueue_parser.add_argument("--lead_id", type=int, nargs="*", help="Leads to queue for audit/ai/outreach")
+    enqueue_parser.add_argument("--all", action="store_true", help="Queue every lead with a website")
+    enqueue_parser.add_argument("--strict", action="store_true", help="Only audit scraped leads with website and email")
+    enqueue_parser.add_argument("--template-file", help="Email template; enables the outreach stage")
+    enqueue_parser.add_argument("--send", action="store_true", help="Queue emails in the outbox instead of drafting")
+    enqueue_parser.add_argument("--window", help="Daily send window for queued emails, e.g. 09:00-17:00")
+    enqueue_parser.add_argument("--name", help="Campaign name; an address gets at most one email per campaign")
+    enqueue_parser.add_argument("--tier", choices=["quick", "deep", "auto"], help="Audit tier (default: AUDIT_TIER)")
+    
+    worker_parser = subparsers.add_parser("worker", help="Run a pipeline worker for one stage")
+    worker_parser.add_argument("--stage", choices=STAGES, required=True)
+    worker_parser.add_argument("--concurrency", type=int, help="Jobs run at once (default: WORKER_CONCURRENCY)")
+    worker_parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    worker_parser.add_argument("--metrics-port", type=int, help="Serve /metrics on this port (default: METRICS_PORT)")
+    add_profile_argument(worker_parser)
+    
+    queue_parser = subparsers.add_parser("queue", help="Show pipeline queue status")
+    queue_parser.add_argument("--retry-dead", action="store_true", help="Requeue dead-lettered jobs")
+    queue_parser.add_argument("--stage", choices=STAGES)
+
+    stats_parser = subparsers.add_parser("stats", help="Percentiles of recorded audit timings")
+    stats_parser.add_argument("--hours", type=float, help="Only audits from the last N hours (e.g. 24 for last night's batch)")
+    stats_parser.add_argument("--kind", choices=["analyzer", "http", "ai"], help="Only spans of this kind")
+
+    outbox_parser = subparsers.add_parser("outbox", help="Show or send queued outreach emails")
+    outbox_parser.add_argument("--run", action="store_true", help="Send queued emails with the SMTP_* settings")
+    outbox_parser.add_argument("--once", action="store_true", help="With --run: exit when nothing is due")
+    outbox_parser.add_argument("--concurrency", type=int, help="Emails sent at once (default: OUTBOX_CONCURRENCY)")
+    outbox_parser.add_argument("--retry-failed", action="store_true", help="Requeue failed emails")
+    outbox_parser.add_argument("--metrics-port", type=int, help="With --run: serve /metrics on this port (default: METRICS_PORT)")
 
     # Dashboard Command
     subparsers.add_parser("dashboard", help="Run Dashboard")
@@ -167,39 +233,85 @@ def main():
     args = parser.parse_args()
     
     if args.command == "init":
+        from storage.database import init_db
         init_db()
     elif args.command == "scrape":
-        asyncio.run(run_scraper(args.source, args.keyword, args.location, args.total))
+        import asyncio
+        from pipeline.scrape import run_scraper
+        neighbourhoods = [n.strip() for n in args.neighbourhoods.split(",") if n.strip()] if args.neighbourhoods else None
+        asyncio.run(run_scraper(args.source, args.keyword, args.location, args.total, use_cache=not args.no_cache,
+                                tiled=args.tiled or bool(neighbourhoods), grid=args.grid, bbox=args.bbox,
+                                neighbourhoods=neighbourhoods))
     elif args.command == "analyze":
-        asyncio.run(run_analysis(args.lead_id))
+        from utils.daemon_client import DaemonClient
+        daemon = DaemonClient()
+
+        def audit_in_daemon():
+            audit_id = daemon.audit(args.lead_id, tier=args.tier, recheck=args.recheck)
+            print(f"Audit {audit_id} saved by daemon." if audit_id else "Audit failed.")
+
+        if args.no_daemon or args.profile or not daemon.is_running() or not via_daemon(audit_in_daemon, "Audit"):
+            import asyncio
+            from pipeline.audit import run_analysis
+            if args.profile:
+                from utils.profiling import set_profile_rate
+                set_profile_rate(100)
+            asyncio.run(run_analysis(args.lead_id, tier=args.tier, recheck=args.recheck))
+    elif args.command == "report" and args.lead_id is None:
+        from pipeline.report import generate_reports
+        summary = generate_reports(campaign=args.campaign, workers=args.workers, force=args.force,
+                                   merged_path=args.merged)
+        print(f"Rendered {len(summary['rendered'])}, skipped {len(summary['skipped'])} up to date, "
+              f"failed {len(summary['failed'])}.")
+        if summary['merged']:
+            print(f"Merged report saved to {summary['merged']}")
     elif args.command == "report":
-        conn = get_connection()
-        lead = conn.execute("SELECT * FROM leads WHERE id = ?", (args.lead_id,)).fetchone()
-        audit = conn.execute("SELECT * FROM audits WHERE lead_id = ?", (args.lead_id,)).fetchone()
-        conn.close()
-        
-        if lead and audit:
-            try:
-                # Convert Row to dict
-                lead_dict = dict(lead)
-                
-                audit_data = json.loads(audit['audit_data'])
-                # Merge scores
-                audit_data['performance_score'] = audit['performance_score']
-                audit_data['seo_score'] = audit['seo_score']
-                audit_data['ux_score'] = audit['ux_score']
-                audit_data['mobile_score'] = audit['mobile_score']
-                audit_data['overall_score'] = audit['overall_score']
-                
-                gen = PDFReportGenerator()
-                filename = f"report_{lead['id']}.pdf"
-                filepath = os.path.join("reports", filename)
-                gen.generate(lead_dict, audit_data, "AI Suggestions Placeholder", filepath)
-            except Exception as e:
-                print(f"Error generating report: {e}")
-        else:
-            print("Lead or Audit not found.")
+        from utils.daemon_client import DaemonClient
+        daemon = DaemonClient()
+
+        def report_in_daemon():
+            filepath = daemon.report(args.lead_id)
+            print(f"Report saved to {filepath}" if filepath else "Report failed, see daemon log.")
 
+        if args.no_daemon or not daemon.is_running() or not via_daemon(report_in_daemon, "Report"):
+            from pipeline.report import generate_report
+            generate_report(args.lead_id)
+    elif args.command == "serve":
+        import asyncio
+        from pipeline.daemon import AuditDaemon
+        from utils.profiling import set_profile_rate
+        set_profile_rate(args.profile)
+        start_metrics(args.metrics_port)
+        asyncio.run(AuditDaemon().serve())
+    elif args.command == "triage":
+        run_triage(args)
+    elif args.command == "enqueue":
+        enqueue_jobs(args)
+    elif args.command == "worker":
+        import asyncio
+        from pipeline.worker import run_worker
+        from utils.profiling import set_profile_rate
+        set_profile_rate(args.profile)
+        start_metrics(args.metrics_port)
+        asyncio.run(run_worker(args.stage, args.concurrency, once=args.once))
+    elif args.command == "queue":
+        from storage import job_queue
+        if args.retry_dead:
+            print(f"Requeued {job_queue.retry_dead(args.stage)} dead jobs.")
+        print_queue_stats()
+    elif args.command == "stats":
+        print_timing_stats(args)
+    elif args.command == "outbox":
+        from storage import outbox
+        if args.retry_failed:
+            print(f"Requeued {outbox.retry_failed()} failed emails.")
+        if args.run:
+            import asyncio
+            from pipeline.outbox import run_outbox_worker
+            start_metrics(args.metrics_port)
+            attempted = asyncio.run(run_outbox_worker(concurrency=args.concurrency, once=args.once))
+            print(f"Attempted {attempted} emails.")
+        print_outbox_stats()
     elif args.command == "dashboard":
         print("Running dashboard...")
         os.system("streamlit run dashboard/app.py")
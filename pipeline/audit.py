@@ -0,0 +1,272 @@
+import asyncio
+import json
+from storage.database import get_connection
+from analysis.performance_analyzer import PerformanceAnalyzer
+from analysis.seo_analyzer import SEOAnalyzer
+from analysis.ux_analyzer import UXAnalyzer
+from analysis.mobile_test import MobileTest
+from analysis.broken_links_checker import BrokenLinksChecker
+from analysis.asset_inventory import AssetInventory
+from ai.score_calculator import ScoreCalculator, QUICK, DEEP
+from storage.timings import save_timings
+from utils.timing import TimingRecorder, span
+from utils.deadline import Deadline
+from utils import metrics
+from utils.profiling import maybe_profile
+from pipeline.triage import check_lead_site
+from config import DEEP_AUDIT_MIN_OPPORTUNITY, AUDIT_DEADLINE
+
+# Audit tiers accepted by run_analysis
+AUDIT_TIERS = ["quick", "deep", "auto"]
+
+# Steps reported to the `progress` callback of run_analysis, in order (quick audits skip Mobile to AI Review)
+AUDIT_STEPS = ["Performance", "SEO", "UX", "Mobile", "Links", "Assets", "AI Review", "Saving"]
+
+# Relative share of the audit deadline each step may use (see utils/deadline.py)
+STEP_WEIGHTS = {"Performance": 1, "SEO": 0.5, "UX": 0.5, "Mobile": 3, "Links": 2, "Assets": 1, "AI Review": 2}
+
+# "status" of a step that produced no result (see _run_step)
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+async def run_analysis(lead_id, with_ai=True, progress=None, browser_pool=None, tier=DEEP, deadline=None,
+                       recheck=False):
+    """
+    Runs every analyzer on a lead's website and saves the audit.
+
+    With `with_ai=False` the Gemini review is left to the pipeline's "ai" stage
+    (see run_ai_review). `progress(step)` is called before each of AUDIT_STEPS.
+    `browser_pool` (a started BrowserPool) lets the mobile test reuse a warm browser.
+    `tier` is "deep" (every analyzer), "quick" (static analyzers on one fetch, no
+    browser or Gemini) or "auto" (quick, then deep if the lead's opportunity score
+    reaches DEEP_AUDIT_MIN_OPPORTUNITY); the audit records the tier that scored it.
+    The audit gets `deadline` seconds (AUDIT_DEADLINE) spread over its steps; steps
+    that run out of time are cancelled and saved as "timed_out" without a score.
+    Leads whose website fails triage (pipeline/triage.py) are skipped; `recheck`
+    triages the site again instead of trusting a recent result.
+    Returns the new audit id, or None if the lead cannot be audited.
+    """
+    progress = progress or (lambda step: None)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM leads WHERE id = ?", (lead_id,))
+    lead = cursor.fetchone()
+    conn.close()
+    
+    if not lead:
+        print("Lead not found.")
+        return
+
+    url = lead['website']
+    if not url:
+        print("Lead has no website to analyze.")
+        metrics.AUDITS.labels("skipped").inc()
+        return
+
+    # Dead, parked and social-only "websites" would only time out in every analyzer
+    if not await check_lead_site(lead, recheck=recheck):
+        metrics.AUDITS.labels("skipped").inc()
+        return
+
+    # A sampled share of audits is profiled when profiling is on (utils/profiling.py)
+    with maybe_profile(f"lead_{lead_id}"):
+        return await _audit(lead_id, url, with_ai, progress, browser_pool, tier, Deadline(deadline or AUDIT_DEADLINE))
+
+async def _audit(lead_id, url, with_ai, progress, browser_pool, tier, deadline):
+    print(f"Analyzing {url}...")
+    
+    # Initialize analyzers
+    perf = PerformanceAnalyzer()
+    seo = SEOAnalyzer()
+    ux = UXAnalyzer()
+    mobile = MobileTest()
+    links = BrokenLinksChecker()
+    assets = AssetInventory()
+    calc = ScoreCalculator()
+    
+    # Run analysis
+    # The requests-based analyzers are sync; they run in threads so that several
+    # audits can share one event loop (daemon, background executor).
+    # Every analyzer, HTTP request and Gemini call is timed into `recorder`, and
+    # HTTP timeouts are cut to what is left of `deadline`.
+    recorder = TimingRecorder()
+    plan = ["Performance", "SEO", "UX"]
+    if tier != QUICK:
+        plan += ["Mobile", "Links", "Assets"] + (["AI Review"] if with_ai else [])
+
+    async def step(name, analyze):
+        progress(name)
+        return await _run_step(name, analyze, deadline, sum(STEP_WEIGHTS[s] for s in plan[plan.index(name):]))
+
+    with recorder.activate(), deadline.activate():
+        # Quick tier: the page is fetched once (timed by the performance analyzer)
+        # and the static analyzers parse that HTML
+        page = {}
+
+        def measure():
+            p_data, fetched = perf.analyze_page(url)
+            page.update(fetched or {})
+            return p_data
+
+        p_data = await step("Performance", lambda: asyncio.to_thread(measure))
+        html = page.get("text")
+
+        if p_data.get("status") == TIMED_OUT:
+            # Nothing to parse, and no time left for a fetch of their own
+            s_data = _unmeasured(TIMED_OUT, "The page fetch timed out")
+            u_data = dict(s_data)
+        else:
+            s_data = await step("SEO", lambda: _parse_page(seo, url, html))
+            u_data = await step("UX", lambda: _parse_page(ux, url, html))
+
+        # Deep tier: browser, link checks, page weight and Gemini, only for shortlisted leads in "auto"
+        opportunity = calc.opportunity(p_data, s_data, u_data)
+        deep = tier == DEEP or (tier == "auto" and opportunity >= DEEP_AUDIT_MIN_OPPORTUNITY)
+        m_data = l_data = a_data = None
+        if deep:
+            m_data = await step("Mobile", lambda: mobile.check(url, browser_pool=browser_pool))
+            l_data = await step("Links", lambda: asyncio.to_thread(links.check, url))
+            # Page weight: the fetched page's subresources, sized from the asset cache or with HEADs
+            document_kb = max(0, p_data.get("page_size_kb") or 0)
+            a_data = await step("Assets", lambda: asyncio.to_thread(assets.measure, page.get("url", url), html, document_kb))
+
+    # Calculate Score
+    score = calc.score(p_data, s_data, u_data, m_data, l_data)
+    overall_score = score["overall_score"]
+    priorities = calc.get_priority_list(p_data, s_data, u_data, m_data, l_data)
+    
+    audit_data = {
+        "performance": p_data,
+        "seo": s_data,
+        "ux": u_data,
+        "priorities": priorities,
+        "tier": score["tier"],
+        "opportunity": opportunity,
+        "score_weights": score["weights"],
+        "unmeasured": score["unmeasured"]
+    }
+    if deep:
+        audit_data.update(mobile=m_data, links=l_data, assets=a_data)
+    
+    # Run AI Audit Analysis
+    if with_ai and deep:
+        with recorder.activate(), deadline.activate():
+            audit_data["ai_review"] = await step("AI Review", lambda: asyncio.to_thread(ai_review_for, url, html))
+    
+    timed_out = [name for name, data in (("Performance", p_data), ("SEO", s_data), ("UX", u_data), ("Mobile", m_data),
+                                         ("Links", l_data), ("Assets", a_data), ("AI Review", audit_data.get("ai_review")))
+                 if data and data.get("status") == TIMED_OUT]
+    if timed_out:
+        audit_data["timed_out"] = timed_out
+    
+    # Save Audit
+    progress("Saving")
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO audits (lead_id, performance_score, seo_score, ux_score, mobile_score, overall_score, tier, audit_data)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        lead_id,
+        p_data.get('score', 0),
+        s_data.get('score', 0),
+        u_data.get('score', 0),
+        m_data.get('score', 0) if deep else None,
+        overall_score,
+        score["tier"],
+        json.dumps(audit_data)
+    ))
+    audit_id = cursor.lastrowid
+    save_timings(audit_id, lead_id, recorder.spans, conn=conn)
+    conn.commit()
+    conn.close()
+    
+    metrics.AUDITS.labels("completed").inc()
+    steps = ", ".join(f"{s.name} {s.duration:.2f}s" for s in recorder.spans if s.kind == "analyzer")
+    print(f"Audit completed ({score['tier']}). Overall Score: {overall_score} ({steps})"
+          + (f", timed out: {', '.join(timed_out)}" if timed_out else ""))
+    return audit_id
+
+async def _parse_page(analyzer, url, html):
+    """Runs a static analyzer on the already fetched HTML."""
+    if html is None:
+        # The fetch failed; fetching again would only fail (or time out) again. Not
+        # measured rather than scored 0, so it does not drag the overall score down
+        return _unmeasured(FAILED, "Could not fetch website")
+    return await asyncio.to_thread(analyzer.analyze, url, html)
+
+def _unmeasured(status, error):
+    """Stands in for an analyzer's result when it timed out or failed: no score, so it is left out of the overall score."""
+    return {"score": None, "status": status, "error": error, "issues": []}
+
+async def _run_step(name, analyze, deadline, pending_weight):
+    """
+    Awaits one analyzer inside an "analyzer" span, for at most its share of the
+    audit's deadline (`pending_weight` is the weight of this and all later steps).
+    If it runs out of time it is cancelled; if it raises, the error is logged.
+    Either way an unmeasured marker is returned instead of a result.
+
+    The step's share is active as its own deadline while it runs, so a worker
+    thread left behind by the cancel stops at its next request instead of running
+    until the whole audit's deadline.
+    """
+    if deadline.expired():
+        metrics.ANALYZER_RUNS.labels(name, "timeout").inc()
+        return _unmeasured(TIMED_OUT, f"Audit deadline of {deadline.seconds:g}s reached before this step")
+    timeout = deadline.share(STEP_WEIGHTS[name], pending_weight)
+    try:
+        with Deadline(timeout).activate(), span(name, kind="analyzer"), metrics.ANALYZER_SECONDS.labels(name).time():
+            result = await asyncio.wait_for(analyze(), timeout)
+        metrics.ANALYZER_RUNS.labels(name, "ok").inc()
+        return result
+    except asyncio.TimeoutError:
+        metrics.ANALYZER_RUNS.labels(name, "timeout").inc()
+        print(f"{name} analysis timed out after {timeout:.1f}s")
+        return _unmeasured(TIMED_OUT, f"Timed out after {timeout:.1f}s")
+    except Exception as e:
+        metrics.ANALYZER_RUNS.labels(name, "error").inc()
+        print(f"{name} analysis failed: {type(e).__name__}: {e}")
+        return _unmeasured(FAILED, f"{type(e).__name__}: {e}")
+
+def ai_review_for(url, html=None):
+    print("Running AI Qualitative Analysis...")
+    try:
+        from ai.ai_analyzer import AIAuditAnalyzer
+        ai_analyzer = AIAuditAnalyzer()
+        # The audit passes the page it already fetched; the AI stage fetches it again
+        return ai_analyzer.analyze(url, html)
+    except Exception as e:
+        print(f"AI Analysis failed: {e}")
+        return {"error": str(e)}
+
+def run_ai_review(lead_id):
+    """Adds the Gemini review to the lead's latest audit. Returns the audit id, or None."""
+    conn = get_connection()
+    try:
+        row = conn.execute('''
+            SELECT audits.id, audits.audit_data, leads.website FROM audits
+            JOIN leads ON leads.id = audits.lead_id
+            WHERE audits.lead_id = ? ORDER BY audits.created_at DESC, audits.id DESC LIMIT 1
+        ''', (lead_id,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        print("No audit found for AI review.")
+        return None
+    
+    url = row['website']
+    if not url.startswith('http'):
+        url = 'http://' + url
+    audit_data = json.loads(row['audit_data'])
+    recorder = TimingRecorder()
+    with recorder.activate(), span("AI Review", kind="analyzer"):
+        audit_data["ai_review"] = ai_review_for(url)
+    
+    conn = get_connection()
+    try:
+        conn.execute("UPDATE audits SET audit_data = ? WHERE id = ?", (json.dumps(audit_data), row['id']))
+        save_timings(row['id'], lead_id, recorder.spans, conn=conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return row['id']
@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pipeline.audit import run_analysis, AUDIT_STEPS
+from utils.daemon_client import DaemonClient
+from config import BACKGROUND_WORKERS
+
+class BackgroundJob:
+    """State of one background job, safe to read from other threads while it runs."""
+
+    def __init__(self, job_id, label, lead_id=None):
+        self.id = job_id
+        self.label = label
+        self.lead_id = lead_id
+        self.status = "queued"  # queued -> running -> done | failed
+        self.step = ""
+        self.progress = 0.0
+        self.logs = []
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def update(self, step, progress=None):
+        self.step = step
+        if progress is not None:
+            self.progress = progress
+
+    def log(self, message):
+        self.logs.append(message)
+
+class BackgroundExecutor:
+    """
+    Runs audits and other long jobs on a thread pool inside the current process.
+
+    The dashboard keeps one instance for the whole server (st.cache_resource), so
+    every session shares the pool, Streamlit scripts return immediately after
+    submitting, and pages poll job state to show progress.
+    """
+
+    def __init__(self, max_workers=BACKGROUND_WORKERS, history=200):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._history = history
+
+    def submit(self, label, fn, *args, lead_id=None):
+        """Runs fn(job, *args) in the pool. Its return value becomes job.result."""
+        job = BackgroundJob(next(self._ids), label, lead_id)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs
+            while len(self._jobs) > self._history:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.finished:
+                    break
+                self._jobs.popitem(last=False)
+        job.future = self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def submit_audit(self, lead_id, with_ai=True):
+        """Queues a full audit of a lead, reusing the lead's audit if one is already pending."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.lead_id == lead_id and job.label == "audit" and not job.finished:
+                    return job
+        return self.submit("audit", _audit, lead_id, with_ai, lead_id=lead_id)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_jobs(self):
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.finished]
+
+    def _run(self, job, fn, args):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.log(traceback.format_exc(limit=5))
+            job.status = "failed"
+        finally:
+            job.progress = 1.0
+            job.finished_at = time.time()
+        return job.result
+
+def _audit(job, lead_id, with_ai):
+    steps = AUDIT_STEPS if with_ai else [s for s in AUDIT_STEPS if s != "AI Review"]
+
+    def progress(step):
+        job.update(step, steps.index(step) / len(steps) if step in steps else None)
+        job.log(f"{step}...")
+
+    daemon = DaemonClient()
+    if daemon.is_running():
+        # The daemon already has a warm browser; it reports no per-step progress
+        job.update("Auditing on daemon", 0.0)
+        job.log("Sent to audit daemon...")
+        audit_id = daemon.audit(lead_id, with_ai=with_ai)
+    else:
+        # Each pool thread runs its own event loop for the async analyzers (Playwright)
+        audit_id = asyncio.run(run_analysis(lead_id, with_ai=with_ai, progress=progress))
+    if audit_id is None:
+        raise ValueError(f"Lead {lead_id} could not be audited (missing lead or website)")
+    return audit_id
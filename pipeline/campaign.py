@@ -0,0 +1,126 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from storage.database import get_latest_audit, update_outreach_status
+from storage import outbox
+from pipeline.scrape import scrape_leads, store_lead
+from pipeline.audit import run_analysis
+from config import CAMPAIGN_AUDIT_CONCURRENCY
+
+def _has_contact(lead):
+    return (lead.get('email') and lead.get('email') != 'N/A'
+            and lead.get('website') and lead.get('website') != 'N/A')
+
+def run_outreach_campaign(job, source, keyword, location, total, strict, template, send, window=None):
+    """
+    Scrape -> audit -> write emails for a batch of leads as one background job.
+
+    Meant for BackgroundExecutor.submit: progress and log lines go to `job`.
+    Audits run concurrently on a pool of CAMPAIGN_AUDIT_CONCURRENCY threads and
+    each lead's email is written as soon as its own audit finishes. Emails to send
+    go to the outbox (one per address and campaign), where run_outbox_worker picks
+    them up; re-running the campaign does not email anyone twice.
+
+    Args:
+        job (BackgroundJob): Receives progress and log lines.
+        source (str): "maps" or "justdial".
+        keyword (str): Search keyword.
+        location (str): Search location.
+        total (int): Leads to scrape.
+        strict (bool): Only process leads with website and email.
+        template (str): Email template for EmailGenerator.
+        send (bool): Queue emails in the outbox; otherwise they are saved as drafts.
+        window (str): Daily send window for queued emails, e.g. "09:00-17:00".
+
+    Returns:
+        int: Leads successfully processed.
+    """
+    from ai.email_generator import EmailGenerator
+
+    outbox.parse_window(window)  # fail before scraping, not once per lead
+
+    # 1. Scrape
+    job.update("Scraping", 0.0)
+    job.log(f"Step 1: Scraping {total} leads from {source}...")
+    results = asyncio.run(scrape_leads(source, keyword, location, total))
+    if not results:
+        job.log("No leads found. Stopping.")
+        return 0
+    job.log(f"Found {len(results)} raw leads.")
+
+    # 2. Filter
+    if strict:
+        valid_leads = [l for l in results if _has_contact(l)]
+        job.log(f"Strict Mode ON: Filtered to {len(valid_leads)} leads with Email & Website.")
+    else:
+        valid_leads = results
+        job.log(f"Strict Mode OFF: Processing all {len(valid_leads)} leads.")
+
+    # Leads already stored (a repeated search is served from the scrape cache) keep their rows
+    saved_leads = []
+    inserted_count = 0
+    for lead in valid_leads:
+        lead_id, inserted = store_lead(lead)
+        if lead_id:
+            lead['id'] = lead_id
+            saved_leads.append(lead)
+            inserted_count += inserted
+    job.log(f"Saved {inserted_count} new leads to database ({len(saved_leads) - inserted_count} already saved).")
+    if not saved_leads:
+        return 0
+
+    email_gen = EmailGenerator()
+    campaign = f"{source}:{keyword}:{location}".lower()
+
+    # Re-running the campaign: leads already emailed are not audited again
+    if send:
+        emailed = {lead['id'] for lead in saved_leads
+                   if _has_contact(lead) and outbox.get_message(outbox.outreach_key(lead['email'], campaign))}
+        if emailed:
+            job.log(f"{len(emailed)} leads were already emailed in this campaign, skipped.")
+            saved_leads = [lead for lead in saved_leads if lead['id'] not in emailed]
+        if not saved_leads:
+            return 0
+
+    # 3. Audit concurrently, email each lead as its audit completes
+    job.update("Auditing", 0.0)
+    success_count = 0
+    processed = 0
+    with ThreadPoolExecutor(max_workers=CAMPAIGN_AUDIT_CONCURRENCY) as pool:
+        futures = {
+            pool.submit(lambda lead_id: asyncio.run(run_analysis(lead_id)), lead['id']): lead
+            for lead in saved_leads
+        }
+        for future in as_completed(futures):
+            lead = futures[future]
+            processed += 1
+            job.update(f"Processed {processed}/{len(saved_leads)}", processed / len(saved_leads))
+            try:
+                if future.result() is None:
+                    job.log(f"{lead['business_name']}: audit failed.")
+                    continue
+
+                queue = send and _has_contact(lead)
+                key = outbox.outreach_key(lead['email'], campaign) if queue else None
+                if queue and outbox.get_message(key):
+                    job.log(f"{lead['business_name']}: {lead['email']} already emailed in this campaign, skipped.")
+                    continue
+
+                audit_data = get_latest_audit(lead['id'])
+                email_body = email_gen.generate(lead, audit_data, template)
+                if email_body.startswith("Error"):
+                    job.log(f"{lead['business_name']}: email generation failed: {email_body}")
+                    continue
+
+                if queue:
+                    outbox.enqueue_email(lead['id'], lead['email'], f"Question about {lead['business_name']}",
+                                         email_body, idempotency_key=key, window=window)
+                    job.log(f"{lead['business_name']}: email queued for {lead['email']}.")
+                else:
+                    update_outreach_status(lead['id'], "Draft")
+                    job.log(f"{lead['business_name']}: email drafted. Preview: {email_body[:50]}...")
+                success_count += 1
+            except Exception as e:
+                job.log(f"{lead['business_name']}: error processing lead: {e}")
+
+    job.log(f"Campaign completed. Successfully processed {success_count} leads.")
+    return success_count
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import signal
+import time
+from analysis.browser_pool import BrowserPool
+from pipeline.audit import run_analysis
+from pipeline.report import generate_report
+from storage.database import get_lead, get_latest_audit
+from utils.http import get_session
+from config import DAEMON_SOCKET, DAEMON_PORT, DAEMON_USE_UNIX_SOCKET, DAEMON_MAX_AUDITS
+
+class AuditDaemon:
+    """
+    Long-running audit server for `main.py serve`.
+
+    Everything that is slow to set up is done once: modules are imported, the
+    shared HTTP session is created and a Chromium instance is kept warm in a
+    BrowserPool. Clients (utils/daemon_client.py) send audit, report and email
+    jobs over a local socket and get the result back when the job is done.
+    """
+
+    def __init__(self, socket_path=DAEMON_SOCKET, port=DAEMON_PORT, max_audits=DAEMON_MAX_AUDITS):
+        self.socket_path = socket_path
+        self.port = port
+        self.max_audits = max_audits
+        self.browser_pool = None
+        self.started_at = time.time()
+        self.running = 0
+        self.completed = 0
+
+    async def serve(self):
+        get_session()
+        self.browser_pool = BrowserPool()
+        await self.browser_pool.start()
+        self.audit_slots = asyncio.Semaphore(self.max_audits)
+
+        if DAEMON_USE_UNIX_SOCKET:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)  # left over from a crashed daemon
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+            os.chmod(self.socket_path, 0o600)
+            where = self.socket_path
+        else:
+            server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+            where = f"127.0.0.1:{self.port}"
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        print(f"Audit daemon listening on {where} (pid {os.getpid()})")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            await self.browser_pool.close()
+            if DAEMON_USE_UNIX_SOCKET and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            print("Audit daemon stopped")
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    result = await self.dispatch(request.get("method"), request.get("params") or {})
+                    response = {"result": result}
+                except Exception as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, params):
+        if method == "ping":
+            return {
+                "pid": os.getpid(),
+                "uptime": round(time.time() - self.started_at, 1),
+                "audits_running": self.running,
+                "audits_completed": self.completed
+            }
+        if method == "audit":
+            async with self.audit_slots:
+                self.running += 1
+                try:
+                    audit_id = await run_analysis(
+                        params["lead_id"], with_ai=params.get("with_ai", True), browser_pool=self.browser_pool,
+                        tier=params.get("tier", "deep"), recheck=params.get("recheck", False)
+                    )
+                finally:
+                    self.running -= 1
+                    self.completed += 1
+            return {"audit_id": audit_id}
+        if method == "report":
+            suggestions = params.get("suggestions") or "AI Suggestions Placeholder"
+            path = await asyncio.to_thread(generate_report, params["lead_id"], suggestions)
+            return {"path": path}
+        if method == "email":
+            return {"body": await asyncio.to_thread(self._generate_email, params["lead_id"], params["template"])}
+        raise ValueError(f"Unknown method: {method}")
+
+    def _generate_email(self, lead_id, template):
+        from ai.email_generator import EmailGenerator
+        lead = get_lead(lead_id)
+        audit_data = get_latest_audit(lead_id)
+        if not lead or not audit_data:
+            raise ValueError(f"Lead {lead_id} has no audit")
+        return EmailGenerator().generate(lead, audit_data, template)
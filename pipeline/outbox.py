@@ -0,0 +1,100 @@
+import asyncio
+import os
+import re
+import signal
+import socket
+from storage import outbox
+from config import OUTBOX_CONCURRENCY
+
+# SMTP replies like "(550, b'No such user')" mean retrying will not help; neither
+# does a send that may already have been delivered (utils.email_sender.UNCONFIRMED)
+PERMANENT_SMTP_ERROR = re.compile(r"\(5\d\d,|^Delivery unconfirmed")
+
+async def _deliver(message, worker_id, sender):
+    ok, msg = await sender.send_email_async(message['to_email'], message['subject'], message['body'])
+    if ok:
+        await asyncio.to_thread(outbox.mark_sent, message['id'], worker_id)
+        print(f"[outbox] sent {message['id']} to {message['to_email']}")
+        return
+    permanent = msg == "SMTP credentials not configured." or bool(PERMANENT_SMTP_ERROR.search(msg))
+    outcome = await asyncio.to_thread(outbox.mark_failed, message['id'], worker_id, msg, permanent)
+    print(f"[outbox] {message['to_email']} failed ({outcome}): {msg}")
+
+async def run_outbox_worker(sender=None, concurrency=None, poll_interval=2.0, once=False, keep_running=None):
+    """
+    Sends queued outbox emails, up to `concurrency` at a time.
+
+    Emails are leased from the outbox table, so several workers (or a worker and the
+    dashboard) can drain it together. Send windows and per-domain throttling are
+    applied when leasing. On SIGINT/SIGTERM the worker stops leasing and finishes
+    the emails in flight.
+
+    Args:
+        sender (EmailSender): Defaults to the process-wide sender (SMTP_* settings).
+        concurrency (int): Emails sent at once (default: OUTBOX_CONCURRENCY).
+        poll_interval (float): Seconds between polls when nothing is due.
+        once (bool): Exit when nothing is due any more. Emails waiting for a
+            throttled domain are due; emails scheduled later (send window, retry
+            backoff) are left for the next run.
+        keep_running (callable): With `once`, keep polling while this returns True,
+            e.g. while a campaign is still queuing emails.
+
+    Returns:
+        int: Emails attempted.
+    """
+    if sender is None:
+        from utils.email_sender import get_email_sender
+        sender = get_email_sender()
+    concurrency = concurrency or OUTBOX_CONCURRENCY
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:outbox"
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows loops and non-main threads (dashboard) have no signal handlers
+            pass
+
+    running = set()
+    attempted = 0
+    while not stop.is_set():
+        free = concurrency - len(running)
+        messages = []
+        if free > 0:
+            messages = await asyncio.to_thread(outbox.lease_messages, worker_id, free)
+            for message in messages:
+                task = asyncio.create_task(_deliver(message, worker_id, sender))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            attempted += len(messages)
+
+        if once and not running and not messages:
+            stats = await asyncio.to_thread(outbox.outbox_stats)
+            if not stats['due'] and not (keep_running and keep_running()):
+                break
+
+        waiters = set(running) | {asyncio.create_task(stop.wait())}
+        done, pending = await asyncio.wait(waiters, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending - running:
+            task.cancel()
+
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
+    return attempted
+
+def drain_outbox(job, smtp, keep_running=None):
+    """
+    BackgroundExecutor job: sends everything in the outbox with the given SMTP
+    settings (server, port, user, password) that is due, then returns the emails attempted.
+    `keep_running` keeps it polling, e.g. until the campaign filling the outbox ends.
+    """
+    from utils.email_sender import EmailSender
+
+    job.update("Sending", None)
+    with EmailSender(smtp.get('server'), smtp.get('port'), smtp.get('user'), smtp.get('password')) as sender:
+        attempted = asyncio.run(run_outbox_worker(sender=sender, once=True, keep_running=keep_running))
+    stats = outbox.outbox_stats()
+    job.log(f"Outbox: {attempted} attempted, {stats['sent']} sent, {stats['failed']} failed, {stats['queued']} still queued.")
+    return attempted
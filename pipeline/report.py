@@ -0,0 +1,143 @@
+import os
+from storage import database
+from storage.database import get_connection, get_lead, get_latest_audit
+from storage import report_cache
+from storage.report_cache import get_report_cache
+from config import REPORT_OUTPUT_DIR, REPORT_WORKERS
+
+DEFAULT_SUGGESTIONS = "AI Suggestions Placeholder"
+
+def report_path(lead_id):
+    return os.path.join(REPORT_OUTPUT_DIR, f"report_{lead_id}.pdf")
+
+def _audit_marker(path):
+    # Id of the audit a report was rendered from, kept next to the PDF
+    return path + ".audit"
+
+def generate_report(lead_id, suggestions=DEFAULT_SUGGESTIONS, filepath=None):
+    """Renders the PDF report for a lead's latest audit. Returns the file path, or None."""
+    lead = get_lead(lead_id)
+    audit_data = get_latest_audit(lead_id)
+    if not lead or not audit_data:
+        print("Lead or Audit not found.")
+        return None
+
+    filepath = filepath or report_path(lead['id'])
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    try:
+        # Same lead, audit and suggestions are served from the report cache without rendering
+        data = get_report_cache().get_or_render(lead, audit_data, suggestions)
+        with open(filepath, "wb") as f:
+            f.write(data)
+        if os.path.abspath(filepath) == os.path.abspath(report_path(lead['id'])):
+            with open(_audit_marker(filepath), "w") as f:
+                f.write(str(audit_data['audit_id']))
+        print(f"Report generated: {filepath}")
+        return filepath
+    except Exception as e:
+        print(f"Error generating report: {e}")
+    return None
+
+def audited_leads(campaign=None, lead_ids=None):
+    """
+    Returns {lead_id: id of the latest audit} for leads that have an audit.
+
+    `campaign` matches the lead category, which is the search keyword the leads
+    were scraped with (e.g. "Dentist").
+    """
+    query = "SELECT a.lead_id, MAX(a.id) AS audit_id FROM audits a JOIN leads l ON l.id = a.lead_id"
+    clauses, params = [], []
+    if campaign:
+        clauses.append("LOWER(l.category) = LOWER(?)")
+        params.append(campaign.strip())
+    if lead_ids:
+        clauses.append(f"a.lead_id IN ({','.join('?' * len(lead_ids))})")
+        params += list(lead_ids)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " GROUP BY a.lead_id ORDER BY a.lead_id"
+
+    conn = get_connection()
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+    return {row['lead_id']: row['audit_id'] for row in rows}
+
+def is_up_to_date(lead_id, audit_id):
+    """
+    True if the lead's report was rendered from audit `audit_id`. Compared by id,
+    not file time: audits.created_at only has whole-second resolution.
+    """
+    path = report_path(lead_id)
+    try:
+        with open(_audit_marker(path)) as f:
+            return os.path.exists(path) and int(f.read().strip()) == audit_id
+    except (OSError, ValueError):
+        return False
+
+def _init_report_worker(db_path, output_dir, cache_dir):
+    # Runs once per worker process: same database and folders as the parent, styles built up front
+    global REPORT_OUTPUT_DIR
+    database.DB_PATH = db_path
+    REPORT_OUTPUT_DIR = output_dir
+    report_cache.REPORT_CACHE_DIR = cache_dir
+    import reporting.pdf_generator  # noqa: F401
+
+def _render(lead_id):
+    return lead_id, generate_report(lead_id)
+
+def generate_reports(campaign=None, lead_ids=None, workers=None, force=False, merged_path=None):
+    """
+    Renders the PDF reports of many leads in parallel worker processes.
+
+    Args:
+        campaign (str): Only leads of this category (search keyword).
+        lead_ids (list): Only these leads. Default: every audited lead.
+        workers (int): Worker processes (default: REPORT_WORKERS, or one per CPU).
+        force (bool): Re-render reports already rendered from the latest audit.
+        merged_path (str): Also write every report into this single PDF, one per page break.
+
+    Returns:
+        dict: Lists of lead ids under "rendered", "skipped" and "failed", plus "merged" (path or None).
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    audited = audited_leads(campaign, lead_ids)
+    stale = [lead_id for lead_id, audit_id in audited.items() if force or not is_up_to_date(lead_id, audit_id)]
+    summary = {
+        "rendered": [], "failed": [], "merged": None,
+        "skipped": [lead_id for lead_id in audited if lead_id not in stale]
+    }
+    print(f"{len(audited)} audited leads: {len(stale)} to render, {len(summary['skipped'])} up to date.")
+
+    if stale:
+        workers = min(workers or REPORT_WORKERS or os.cpu_count() or 1, len(stale))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_report_worker,
+                                 initargs=(database.DB_PATH, REPORT_OUTPUT_DIR, report_cache.REPORT_CACHE_DIR)) as pool:
+            futures = [pool.submit(_render, lead_id) for lead_id in stale]
+            for future in as_completed(futures):
+                try:
+                    lead_id, path = future.result()
+                except Exception as e:
+                    print(f"Report worker failed: {e}")
+                    continue
+                summary["rendered" if path else "failed"].append(lead_id)
+        summary["failed"] += [l for l in stale if l not in summary["rendered"] and l not in summary["failed"]]
+
+    if merged_path and audited:
+        summary["merged"] = merge_reports(list(audited), merged_path)
+    return summary
+
+def merge_reports(lead_ids, filepath, suggestions=DEFAULT_SUGGESTIONS):
+    """Writes the reports of `lead_ids` into one PDF. Returns the path, or None."""
+    from reporting.pdf_generator import PDFReportGenerator
+    reports = []
+    for lead_id in lead_ids:
+        lead = get_lead(lead_id)
+        audit_data = get_latest_audit(lead_id)
+        if lead and audit_data:
+            reports.append((lead, audit_data, suggestions))
+    if not reports:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    return filepath if PDFReportGenerator().generate_merged(reports, filepath) else None
@@ -0,0 +1,63 @@
+from scraper.maps_scraper import MapsScraper
+from scraper.justdial_scraper import JustDialScraper
+from storage.database import insert_lead, find_lead
+from storage.scrape_cache import scrape_with_cache, lead_key
+from config import MAPS_TILE_GRID
+
+async def scrape_leads(source, keyword, location, total, use_cache=True, tiled=False, grid=None, bbox=None,
+                       neighbourhoods=None, on_lead=None):
+    """
+    Scrapes leads through the scrape cache without saving them.
+
+    `source` is "maps" or "justdial". `on_lead` is called with each JustDial lead
+    as soon as its page is parsed.
+    """
+    def scrape(count, skip):
+        if source.lower() == "maps" and tiled:
+            return MapsScraper().scrape_tiled(keyword, location, count, tiles=neighbourhoods, bbox=bbox,
+                                              grid=grid or MAPS_TILE_GRID, skip=skip)
+        elif source.lower() == "maps":
+            return MapsScraper().scrape(keyword, location, count, skip=skip)
+        elif source.lower() == "justdial":
+            return JustDialScraper().scrape(keyword, location, count, on_lead=on_lead, skip=skip)
+        return []
+    
+    return await scrape_with_cache(source.lower(), keyword, location, total, scrape, use_cache=use_cache)
+
+def store_lead(lead):
+    """
+    Saves a scraped lead unless it is already stored (a repeated search served
+    from the scrape cache). Returns (lead id or None, True if it was inserted).
+    """
+    lead_id = find_lead(lead)
+    if lead_id:
+        return lead_id, False
+    return insert_lead(lead), True
+
+async def run_scraper(source, keyword, location, total, use_cache=True, tiled=False, grid=None, bbox=None, neighbourhoods=None):
+    """
+    Scrapes leads (through the scrape cache) and saves the ones not stored yet.
+    Returns the ids of all scraped leads; leads served from the cache on a
+    repeated search keep their existing rows.
+    """
+    print(f"Starting scraper: {source} for {keyword} in {location}")
+    
+    saved = set()
+    lead_ids = []
+    def save(lead):
+        saved.add(lead_key(lead))
+        lead_id, inserted = store_lead(lead)
+        if lead_id:
+            lead_ids.append(lead_id)
+            if inserted:
+                print(f"Saved lead: {lead['business_name']} (ID: {lead_id})")
+    
+    # JustDial streams each lead into storage as its page is parsed
+    results = await scrape_leads(source, keyword, location, total, use_cache=use_cache, tiled=tiled, grid=grid,
+                                 bbox=bbox, neighbourhoods=neighbourhoods, on_lead=save)
+    
+    print(f"Found {len(results)} leads.")
+    for lead in results:
+        if lead_key(lead) not in saved:
+            save(lead)
+    return lead_ids
@@ -0,0 +1,93 @@
+import asyncio
+from storage.database import get_lead, get_latest_audit, update_outreach_status
+from storage.job_queue import enqueue, PermanentJobError
+from storage import outbox
+from pipeline.scrape import run_scraper
+from pipeline.audit import run_analysis, run_ai_review
+from pipeline.triage import triage_leads
+from analysis.site_triage import LIVE
+from ai.score_calculator import QUICK
+from config import AUDIT_TIER
+
+# Every job carries a "campaign" dict that is passed on to the next stage:
+#   strict (bool)   - only audit leads that have both a website and an email
+#   template (str)  - email template; without it the pipeline stops after the AI stage
+#   subject (str)   - email subject, "{Business}" is replaced with the business name
+#   send (bool)     - queue the email in the outbox instead of drafting; `main.py outbox --run` sends it
+#   window (str)    - daily send window for the outbox, e.g. "09:00-17:00"
+#   name (str)      - campaign name; an address gets at most one email per campaign name
+#   tier (str)      - audit tier, "quick", "deep" or "auto" (default: AUDIT_TIER)
+
+def _has_contact(lead):
+    return (lead.get('email') and lead['email'] != 'N/A'
+            and lead.get('website') and lead['website'] != 'N/A')
+
+async def handle_scrape(payload):
+    campaign = payload.get('campaign') or {}
+    lead_ids = await run_scraper(
+        payload['source'], payload['keyword'], payload['location'], payload.get('total', 5),
+        tiled=payload.get('tiled', False)
+    )
+    if campaign.get('strict'):
+        lead_ids = [lead_id for lead_id in lead_ids if _has_contact(get_lead(lead_id) or {})]
+    # Only leads with a live website go on to the (slow) audit stage
+    statuses = await triage_leads(lead_ids)
+    live = [lead_id for lead_id in lead_ids if statuses.get(lead_id) == LIVE]
+    for lead_id in live:
+        enqueue('audit', {'lead_id': lead_id, 'campaign': campaign})
+    print(f"Queued {len(live)} of {len(lead_ids)} leads for audit.")
+
+async def handle_audit(payload):
+    tier = (payload.get('campaign') or {}).get('tier') or AUDIT_TIER
+    audit_id = await run_analysis(payload['lead_id'], with_ai=False, tier=tier)
+    if audit_id is None:
+        raise PermanentJobError(f"Lead {payload['lead_id']} cannot be audited")
+    # Leads that only got a quick audit were not shortlisted: no Gemini review or outreach
+    if get_latest_audit(payload['lead_id']).get('tier') == QUICK:
+        print(f"Lead {payload['lead_id']} not shortlisted for a deep audit.")
+        return
+    enqueue('ai', payload)
+
+async def handle_ai(payload):
+    audit_id = await asyncio.to_thread(run_ai_review, payload['lead_id'])
+    if audit_id is None:
+        raise PermanentJobError(f"No audit for lead {payload['lead_id']}")
+    if (payload.get('campaign') or {}).get('template'):
+        enqueue('outreach', payload)
+
+def _queue_outreach(payload):
+    """Writes a lead's email and puts it in the outbox (or saves a draft). Sending is the outbox worker's job."""
+    from ai.email_generator import EmailGenerator
+
+    campaign = payload.get('campaign') or {}
+    lead = get_lead(payload['lead_id'])
+    audit_data = get_latest_audit(payload['lead_id'])
+    if not lead or not audit_data:
+        raise PermanentJobError(f"Lead {payload['lead_id']} has no audit to write about")
+    key = outbox.outreach_key(lead.get('email') or "", campaign.get('name'))
+    if lead.get('outreach_status') == 'Sent' or (campaign.get('send') and outbox.get_message(key)):
+        print(f"Skipping {lead['business_name']}: already emailed or queued.")
+        return
+
+    email_body = EmailGenerator().generate(lead, audit_data, campaign['template'])
+    if email_body.startswith("Error"):
+        # Gemini failures (rate limits, outages) are worth retrying
+        raise RuntimeError(email_body)
+
+    if not campaign.get('send'):
+        update_outreach_status(lead['id'], "Draft")
+        return
+
+    subject = campaign.get('subject', "Question about {Business}").replace("{Business}", lead['business_name'])
+    outbox.enqueue_email(lead['id'], lead['email'], subject, email_body, idempotency_key=key,
+                         window=campaign.get('window'))
+
+async def handle_outreach(payload):
+    await asyncio.to_thread(_queue_outreach, payload)
+
+HANDLERS = {
+    "scrape": handle_scrape,
+    "audit": handle_audit,
+    "ai": handle_ai,
+    "outreach": handle_outreach,
+}
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from storage.database import get_connection, save_site_statuses
+from analysis.site_triage import SiteTriage, LIVE
+from utils import metrics
+from config import TRIAGE_CONCURRENCY, TRIAGE_MAX_AGE, TRIAGE_RETRY_AGE
+
+# Results are saved in batches so a long run over thousands of leads keeps its progress
+SAVE_EVERY = 100
+
+def _is_transient(status, detail):
+    """Failures a later check may not repeat: no answer, or a server error (HTTP 5xx)."""
+    return status == "unreachable" or (status == "http_error" and (detail or "").startswith("HTTP 5"))
+
+def _is_fresh(lead):
+    if lead['site_status'] is None:
+        return False
+    max_age = TRIAGE_RETRY_AGE if _is_transient(lead['site_status'], lead['site_detail']) else TRIAGE_MAX_AGE
+    return time.time() - (lead['site_checked_at'] or 0) < max_age
+
+async def triage_leads(lead_ids=None, recheck=False, concurrency=None, progress=None):
+    """
+    Checks that leads' websites are live (see analysis/site_triage.py) and saves
+    the outcome on each lead. Leads triaged within TRIAGE_MAX_AGE (TRIAGE_RETRY_AGE
+    for transient failures) keep their result unless `recheck` is set.
+
+    Args:
+        lead_ids (list): Leads to triage; None for every lead.
+        recheck (bool): Triage again even if a recent result exists.
+        concurrency (int): Sites checked at once (default: TRIAGE_CONCURRENCY).
+        progress (callable): Called with (done, total) as sites are checked.
+
+    Returns:
+        dict: {lead_id: status} for every requested lead that exists.
+    """
+    conn = get_connection()
+    try:
+        query = "SELECT id, website, site_status, site_detail, site_checked_at FROM leads"
+        if lead_ids is not None:
+            lead_ids = list(lead_ids)
+            if not lead_ids:
+                return {}
+            query += f" WHERE id IN ({','.join('?' * len(lead_ids))})"
+        leads = conn.execute(query, lead_ids or []).fetchall()
+    finally:
+        conn.close()
+
+    statuses = {lead['id']: lead['site_status'] for lead in leads if not recheck and _is_fresh(lead)}
+    pending = [lead for lead in leads if lead['id'] not in statuses]
+    if not pending:
+        return statuses
+
+    concurrency = concurrency or TRIAGE_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="triage")
+    triage = SiteTriage(executor=executor)
+
+    async def check(lead):
+        async with semaphore:
+            return lead['id'], await triage.check(lead['website'])
+
+    unsaved = []
+    try:
+        for done, task in enumerate(asyncio.as_completed([check(lead) for lead in pending]), 1):
+            lead_id, result = await task
+            statuses[lead_id] = result['status']
+            metrics.TRIAGE.labels(result['status']).inc()
+            unsaved.append((lead_id, result))
+            if len(unsaved) >= SAVE_EVERY:
+                await asyncio.to_thread(save_site_statuses, unsaved)
+                unsaved = []
+            if progress:
+                progress(done, len(pending))
+    finally:
+        await asyncio.to_thread(save_site_statuses, unsaved)
+        executor.shutdown(wait=False, cancel_futures=True)
+    return statuses
+
+async def check_lead_site(lead, recheck=False):
+    """
+    Whether a lead's website is worth a full audit, triaging it first if it has
+    no recent result (or `recheck` is set). Prints the reason when it is not.
+    """
+    if not recheck and _is_fresh(lead):
+        status = lead['site_status']
+        detail = lead['site_detail']
+    else:
+        result = await SiteTriage().check(lead['website'])
+        metrics.TRIAGE.labels(result['status']).inc()
+        await asyncio.to_thread(save_site_statuses, [(lead['id'], result)])
+        status, detail = result['status'], result['detail']
+    if status != LIVE:
+        print(f"Skipping {lead['website']}: {status}" + (f" ({detail})" if detail else ""))
+        return False
+    return True
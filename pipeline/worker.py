@@ -0,0 +1,82 @@
+import asyncio
+import os
+import signal
+import socket
+import traceback
+from storage import job_queue
+from storage.job_queue import PermanentJobError
+from pipeline.stages import HANDLERS
+from config import JOB_LEASE_SECONDS, WORKER_CONCURRENCY
+
+async def _heartbeat(job_id, worker_id):
+    """Keeps the lease of a running job alive so no other worker steals it."""
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        if not await asyncio.to_thread(job_queue.extend_lease, job_id, worker_id):
+            print(f"Lost lease on job {job_id}")
+            return
+
+async def _run_job(job, worker_id):
+    handler = HANDLERS[job['stage']]
+    heartbeat = asyncio.create_task(_heartbeat(job['id'], worker_id))
+    print(f"[{job['stage']}] job {job['id']} attempt {job['attempts']}: {job['payload']}")
+    try:
+        await handler(job['payload'])
+        await asyncio.to_thread(job_queue.complete, job['id'], worker_id)
+        print(f"[{job['stage']}] job {job['id']} done")
+    except PermanentJobError as e:
+        await asyncio.to_thread(job_queue.fail, job['id'], worker_id, str(e), True)
+        print(f"[{job['stage']}] job {job['id']} dead: {e}")
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+        outcome = await asyncio.to_thread(job_queue.fail, job['id'], worker_id, error)
+        print(f"[{job['stage']}] job {job['id']} failed ({outcome}): {e}")
+    finally:
+        heartbeat.cancel()
+
+async def run_worker(stage, concurrency=None, poll_interval=2.0, once=False):
+    """
+    Pulls jobs from one stage queue and runs up to `concurrency` of them at a time.
+
+    Run one worker process per stage (or several for slow stages); they coordinate
+    through leases in the database. On SIGINT/SIGTERM the worker stops leasing and
+    waits for its in-flight jobs. With `once=True` it exits when the queue is empty.
+    """
+    if stage not in HANDLERS:
+        raise ValueError(f"Unknown stage: {stage}")
+    concurrency = concurrency or WORKER_CONCURRENCY.get(stage, 1)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{stage}"
+    print(f"Worker {worker_id} started (concurrency {concurrency})")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops don't support signal handlers; Ctrl+C still interrupts
+            pass
+
+    running = set()
+    while not stop.is_set():
+        free = concurrency - len(running)
+        jobs = []
+        if free > 0:
+            jobs = await asyncio.to_thread(job_queue.lease, stage, worker_id, free)
+            for job in jobs:
+                task = asyncio.create_task(_run_job(job, worker_id))
+                running.add(task)
+                task.add_done_callback(running.discard)
+
+        if once and not running and not jobs:
+            break
+
+        waiters = set(running) | {asyncio.create_task(stop.wait())}
+        done, pending = await asyncio.wait(waiters, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending - running:
+            task.cancel()
+
+    if running:
+        print(f"Waiting for {len(running)} running jobs...")
+        await asyncio.gather(*running, return_exceptions=True)
+    print(f"Worker {worker_id} stopped")
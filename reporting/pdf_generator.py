@@ -1,21 +1,95 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+import io
 import os
+from utils import metrics
+from ai.score_calculator import format_score, format_page_weight, format_vitals
+
+# Styles are built once per process and shared by every report it renders
+STYLES = getSampleStyleSheet()
+
+INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+SCORE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+REVIEW_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('WORDWRAP', (0, 0), (-1, -1), True)
+])
 
 class PDFReportGenerator:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
+        self.styles = STYLES
         self.title_style = self.styles['Heading1']
         self.heading_style = self.styles['Heading2']
         self.normal_style = self.styles['BodyText']
         
     def generate(self, lead_data, audit_data, suggestions, filename):
         """Generates a PDF report for the audit."""
-        
         doc = SimpleDocTemplate(filename, pagesize=letter)
+        return self._build(doc, self.build_story(lead_data, audit_data, suggestions), filename)
+
+    def render(self, lead_data, audit_data, suggestions):
+        """Renders the report in memory and returns the PDF bytes."""
+        buffer = io.BytesIO()
+        with metrics.RENDER_SECONDS.labels("pdf").time():
+            doc = SimpleDocTemplate(buffer, pagesize=letter)
+            doc.build(self.build_story(lead_data, audit_data, suggestions))
+        return buffer.getvalue()
+
+    def generate_merged(self, reports, filename):
+        """
+        Generates one PDF holding several reports, each starting on a new page.
+
+        Args:
+            reports (list): (lead_data, audit_data, suggestions) tuples.
+            filename (str): Output path.
+        """
+        story = []
+        for i, (lead_data, audit_data, suggestions) in enumerate(reports):
+            if i:
+                story.append(PageBreak())
+            story.extend(self.build_story(lead_data, audit_data, suggestions))
+        doc = SimpleDocTemplate(filename, pagesize=letter)
+        return self._build(doc, story, filename)
+
+    def _build(self, doc, story, filename):
+        try:
+            doc.build(story)
+            print(f"Report generated: {filename}")
+            return True
+        except Exception as e:
+            print(f"Error generating PDF: {e}")
+            return False
+
+    def build_story(self, lead_data, audit_data, suggestions):
+        """Returns the flowables of one report."""
         story = []
         
         # Title
@@ -32,15 +106,7 @@ class PDFReportGenerator:
             ["Address", lead_data.get('address', 'N/A')]
         ]
         t = Table(info_data, colWidths=[150, 300])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        t.setStyle(INFO_TABLE_STYLE)
         story.append(t)
         story.append(Spacer(1, 20))
         
@@ -48,23 +114,21 @@ class PDFReportGenerator:
         story.append(Paragraph("Audit Scores", self.heading_style))
         score_data = [
             ["Metric", "Score"],
-            ["Performance", f"{audit_data.get('performance_score', 0)}/100"],
-            ["SEO", f"{audit_data.get('seo_score', 0)}/100"],
-            ["UX", f"{audit_data.get('ux_score', 0)}/100"],
-            ["Mobile", f"{audit_data.get('mobile_score', 0)}/100"],
-            ["Overall Score", f"{audit_data.get('overall_score', 0)}/100"]
+            ["Performance", format_score(audit_data.get('performance_score', 0))],
+            ["SEO", format_score(audit_data.get('seo_score', 0))],
+            ["UX", format_score(audit_data.get('ux_score', 0))],
+            ["Mobile", format_score(audit_data.get('mobile_score', 0))],
+            ["Overall Score", format_score(audit_data.get('overall_score', 0))]
         ]
+        page_weight = format_page_weight(audit_data.get('assets'), detail=False)
+        if page_weight:
+            score_data.append(["Page Weight", page_weight])
+        vitals = format_vitals(audit_data.get('mobile'))
+        if vitals:
+            score_data.append(["Mobile Load", vitals])
         
-        t_scores = Table(score_data, colWidths=[200, 100])
-        t_scores.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        t_scores = Table(score_data, colWidths=[200, 250])
+        t_scores.setStyle(SCORE_TABLE_STYLE)
         story.append(t_scores)
         story.append(Spacer(1, 20))
         
@@ -96,17 +160,7 @@ class PDFReportGenerator:
             ]
             
             t_review = Table(review_data, colWidths=[100, 50, 350])
-            t_review.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('WORDWRAP', (0, 0), (-1, -1), True)
-            ]))
+            t_review.setStyle(REVIEW_TABLE_STYLE)
             story.append(t_review)
             story.append(Spacer(1, 10))
             
@@ -120,15 +174,7 @@ class PDFReportGenerator:
             story.append(Paragraph(suggestions.replace("\n", "<br/>"), self.normal_style))
         else:
             story.append(Paragraph("No AI suggestions available.", self.normal_style))
-            
-        # Build PDF
-        try:
-            doc.build(story)
-            print(f"Report generated: {filename}")
-            return True
-        except Exception as e:
-            print(f"Error generating PDF: {e}")
-            return False
+        return story
 
 if __name__ == "__main__":
     # Test
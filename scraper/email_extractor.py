@@ -1,55 +1,193 @@
 import requests
-from bs4 import BeautifulSoup
 import re
-from urllib.parse import urljoin
-from config import USER_AGENT
+import html
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlparse
+from config import (USER_AGENT, EMAIL_PROBE_BUDGET, EMAIL_PROBE_TIMEOUT, EMAIL_MAX_BYTES, EMAIL_CACHE_TTL,
+                    EMAIL_MISS_TTL, EMAIL_CACHE_MAX_DOMAINS)
+
+# Compiled once and run directly over the raw response bytes
+EMAIL_REGEX = re.compile(rb'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+MAILTO_REGEX = re.compile(rb'mailto:([^"\'?>\s]+)', re.IGNORECASE)
+CONTACT_LINK_REGEX = re.compile(
+    rb'href\s*=\s*["\']([^"\'#>]*(?:contact|about|reach-us|get-in-touch|impressum|support)[^"\'#>]*)["\']',
+    re.IGNORECASE
+)
+
+# Common false positives (image names like logo@2x.png, placeholder domains)
+IGNORED_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', 'example.com', 'sentry.io', 'wixpress.com')
+
+# Fallback paths probed when the homepage does not link a contact page
+DEFAULT_CONTACT_PATHS = ["/contact", "/contact-us", "/about", "/about-us"]
 
 class EmailExtractor:
-    def __init__(self):
+    # Results are shared by every extractor in the process: domain -> (email, expires).
+    # Misses expire after EMAIL_MISS_TTL so a site that was down briefly is retried;
+    # least recently used domains are dropped beyond EMAIL_CACHE_MAX_DOMAINS.
+    _domain_cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, budget=EMAIL_PROBE_BUDGET, timeout=EMAIL_PROBE_TIMEOUT):
         self.headers = {"User-Agent": USER_AGENT}
-        self.email_regex = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        
+        self.email_regex = EMAIL_REGEX
+        self.budget = budget
+        self.timeout = timeout
+
     def extract(self, url):
         """Extracts email from the given URL."""
         if not url:
             return None
-            
+
         if not url.startswith('http'):
             url = 'http://' + url
-            
+
+        domain = self._domain(url)
+        with self._cache_lock:
+            cached = self._domain_cache.get(domain)
+            if cached and cached[1] > time.monotonic():
+                self._domain_cache.move_to_end(domain)
+                return cached[0]
+
         print(f"Extracting email from: {url}")
+        session = requests.Session()
+        session.headers.update(self.headers)
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            if response.status_code != 200:
-                return None
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text = soup.get_text()
-            
-            # Find all emails
-            emails = re.findall(self.email_regex, text)
-            
-            # Filter out common false positives (like image extensions or example.com)
-            valid_emails = [e for e in emails if not e.endswith(('.png', '.jpg', '.jpeg', '.gif', 'example.com'))]
-            
-            if valid_emails:
-                return valid_emails[0] # Return the first one found
-            
-            # If not found in text, check mailto links
-            mailto_links = soup.select('a[href^="mailto:"]')
-            for link in mailto_links:
-                href = link.get('href')
-                if href:
-                    email = href.replace('mailto:', '').split('?')[0]
-                    if re.match(self.email_regex, email):
-                        return email
-                        
-            return None
-            
+            email = self._discover(session, url, domain)
         except Exception as e:
             print(f"Error extracting email from {url}: {e}")
+            email = None
+        finally:
+            session.close()
+
+        with self._cache_lock:
+            self._domain_cache[domain] = (email, time.monotonic() + (EMAIL_CACHE_TTL if email else EMAIL_MISS_TTL))
+            self._domain_cache.move_to_end(domain)
+            while len(self._domain_cache) > EMAIL_CACHE_MAX_DOMAINS:
+                self._domain_cache.popitem(last=False)
+        return email
+
+    def _discover(self, session, url, domain):
+        """Scans the homepage, then probes likely contact pages concurrently within the budget."""
+        body, final_url = self._fetch(session, url)
+        if body is None:
             return None
 
+        # Redirects (http -> https://www.) change the host we compare against
+        domain = self._domain(final_url) or domain
+        best, confident = self._scan(body, domain)
+        if confident:
+            return best
+
+        candidates = self._contact_urls(body, final_url or url, domain)[:self.budget]
+        if not candidates:
+            return best
+
+        # Probes make their own requests: the ones left behind after a confident hit
+        # may still be running when extract() closes the homepage session
+        executor = ThreadPoolExecutor(max_workers=len(candidates))
+        try:
+            pending = {executor.submit(self._fetch, None, link) for link in candidates}
+            while pending:
+                done, pending = wait(pending, timeout=self.timeout * 2, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    page_body, _ = future.result()
+                    if page_body is None:
+                        continue
+                    email, confident = self._scan(page_body, domain)
+                    if confident:
+                        # Stop at the first confident hit, leave the rest behind
+                        return email
+                    if email and not best:
+                        best = email
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return best
+
+    def _fetch(self, session, url):
+        """
+        Fetches at most EMAIL_MAX_BYTES of a page (with `session`, or a one-off
+        request if None). Returns (bytes, final_url) or (None, None).
+        """
+        try:
+            response = (session or requests).get(url, headers=self.headers, timeout=self.timeout, stream=True)
+            try:
+                if response.status_code != 200:
+                    return None, None
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=16384):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= EMAIL_MAX_BYTES:
+                        break
+                return b"".join(chunks), response.url
+            finally:
+                response.close()
+        except Exception:
+            return None, None
+
+    def _scan(self, body, domain):
+        """
+        Finds the best email in raw page bytes without building a DOM.
+
+        Returns:
+            tuple: (email or None, confident). An address is confident when it comes
+            from a mailto: link or belongs to the site's own domain.
+        """
+        site = domain[4:] if domain.startswith('www.') else domain
+        email, confident = self._pick(body, site)
+        # Entity-encoded addresses (info&#64;site.com) only show up after unescaping,
+        # and may be the site's own address even when a plain off-site one was found
+        if not confident and (b'&#' in body or b'%40' in body):
+            text = html.unescape(body.decode('utf-8', 'ignore')).replace('%40', '@')
+            unescaped, confident = self._pick(text.encode('utf-8'), site)
+            email = unescaped or email
+        return email, confident
+
+    def _pick(self, body, site):
+        """Best address in `body` as (email or None, confident)."""
+        mailtos = [e for e in (self._clean(m) for m in MAILTO_REGEX.findall(body)) if self._valid(e)]
+        emails = [e for e in (self._clean(m) for m in self.email_regex.findall(body)) if self._valid(e)]
+
+        for email in mailtos + emails:
+            if site and email.lower().endswith('@' + site):
+                return email, True
+        if mailtos:
+            return mailtos[0], True
+        if emails:
+            return emails[0], False
+        return None, False
+
+    def _contact_urls(self, body, base_url, domain):
+        """Collects same-domain contact/about links, falling back to common paths."""
+        urls = []
+        for href in CONTACT_LINK_REGEX.findall(body):
+            link = urljoin(base_url, href.decode('utf-8', 'ignore').strip())
+            if self._domain(link) == domain and link not in urls:
+                urls.append(link)
+        for path in DEFAULT_CONTACT_PATHS:
+            link = urljoin(base_url, path)
+            if link not in urls:
+                urls.append(link)
+        return urls
+
+    def _clean(self, raw):
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8', 'ignore')
+        return raw.strip().strip('.')
+
+    def _valid(self, email):
+        return bool(email) and '@' in email and not email.lower().endswith(IGNORED_SUFFIXES)
+
+    def _domain(self, url):
+        return urlparse(url).netloc.lower()
+
 if __name__ == "__main__":
     extractor = EmailExtractor()
     print(extractor.extract("https://www.example.com"))
@@ -0,0 +1,87 @@
+import math
+import requests
+from urllib.parse import quote_plus
+from config import USER_AGENT
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+def geocode_bbox(location):
+    """
+    Looks up the bounding box of a place name with OpenStreetMap Nominatim.
+
+    Returns:
+        tuple: (south, west, north, east) or None if the place is unknown.
+    """
+    try:
+        response = requests.get(
+            NOMINATIM_URL,
+            params={"q": location, "format": "json", "limit": 1},
+            headers={"User-Agent": USER_AGENT},
+            timeout=10
+        )
+        if response.status_code != 200 or not response.json():
+            return None
+        south, north, west, east = (float(v) for v in response.json()[0]["boundingbox"])
+        return south, west, north, east
+    except Exception as e:
+        print(f"Error geocoding {location}: {e}")
+        return None
+
+def parse_bbox(text):
+    """
+    Parses 'south,west,north,east' into a tuple of floats.
+
+    Raises:
+        ValueError: If it is not four numbers, or not a valid box (south below
+            north, west of east, latitudes within ±90 and longitudes within ±180).
+    """
+    parts = text.split(",")
+    try:
+        if len(parts) != 4:
+            raise ValueError
+        south, west, north, east = (float(v) for v in parts)
+    except ValueError:
+        raise ValueError(f"Bounding box must be four numbers 'south,west,north,east', got '{text}'")
+    if not (-90 <= south <= 90 and -90 <= north <= 90):
+        raise ValueError(f"Latitudes must be between -90 and 90, got south={south}, north={north}")
+    if not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError(f"Longitudes must be between -180 and 180, got west={west}, east={east}")
+    if south >= north:
+        raise ValueError(f"South ({south}) must be below north ({north})")
+    if west >= east:
+        raise ValueError(f"West ({west}) must be west of east ({east})")
+    return south, west, north, east
+
+def grid_tiles(bbox, grid):
+    """
+    Splits a bounding box into grid x grid cells.
+
+    Returns:
+        list: (lat, lng, zoom) cell centres, with a Maps zoom level that
+        roughly frames one cell.
+    """
+    if grid < 1:
+        raise ValueError(f"Grid must be at least 1 tile per side, got {grid}")
+    south, west, north, east = bbox
+    lat_step = (north - south) / grid
+    lng_step = (east - west) / grid
+    # A ~1400px wide map at zoom z spans about 1406 / 2**z degrees of longitude
+    zoom = int(max(10, min(18, math.log2(1406 / max(lng_step, 1e-6)))))
+
+    tiles = []
+    for row in range(grid):
+        for col in range(grid):
+            lat = south + lat_step * (row + 0.5)
+            lng = west + lng_step * (col + 0.5)
+            tiles.append((round(lat, 6), round(lng, 6), zoom))
+    return tiles
+
+def tile_url(keyword, location, tile):
+    """
+    Maps search URL for one tile. A tile is either a neighbourhood name
+    (searched as "keyword in neighbourhood, location") or a (lat, lng, zoom) cell.
+    """
+    if isinstance(tile, str):
+        return f"https://www.google.com/maps/search/{quote_plus(f'{keyword} in {tile}, {location}')}"
+    lat, lng, zoom = tile
+    return f"https://www.google.com/maps/search/{quote_plus(keyword)}/@{lat},{lng},{zoom}z"
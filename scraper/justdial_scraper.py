@@ -1,53 +1,142 @@
 import requests
-from bs4 import BeautifulSoup
-from config import USER_AGENT
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from lxml import etree, html as lxml_html
+from storage.scrape_cache import lead_key
+from utils import metrics
+from config import USER_AGENT, JUSTDIAL_CONCURRENCY, JUSTDIAL_PAGE_DELAY, JUSTDIAL_MAX_PAGES
+
+def _by_class(name):
+    """Compiled XPath equivalent of the CSS class selector `.name`."""
+    return etree.XPath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]")
+
+# Selectors for JustDial (subject to change), compiled once for lxml
+CARD_XPATH = _by_class('resultbox')
+NAME_XPATH = _by_class('resultbox_title_anchor')
+PHONE_XPATH = _by_class('contact-info')
+ADDRESS_XPATH = _by_class('address-info')
+WEBSITE_XPATH = _by_class('website_icon')
 
 class JustDialScraper:
-    def __init__(self):
+    def __init__(self, concurrency=JUSTDIAL_CONCURRENCY, page_delay=JUSTDIAL_PAGE_DELAY, max_pages=JUSTDIAL_MAX_PAGES):
         self.base_url = "https://www.justdial.com"
         self.headers = {"User-Agent": USER_AGENT}
+        self.concurrency = concurrency
+        self.page_delay = page_delay
+        self.max_pages = max_pages
 
-    def scrape(self, keyword, location, total=10):
-        """Scrapes JustDial for businesses."""
-        # JustDial URL structure: https://www.justdial.com/{location}/{keyword}
+    def page_url(self, keyword, location, page):
+        # JustDial URL structure: https://www.justdial.com/{location}/{keyword}/page-{n}
         url = f"{self.base_url}/{location}/{keyword}"
-        print(f"Scraping JustDial: {url}")
-        
+        return url if page == 1 else f"{url}/page-{page}"
+
+    def scrape(self, keyword, location, total=10, on_lead=None, skip=None):
+        """
+        Scrapes JustDial for businesses across result pages.
+
+        Pages are fetched concurrently (at most `concurrency` in flight, started at
+        least `page_delay` seconds apart) and parsed as they arrive. Each new unique
+        lead is passed to `on_lead` immediately so callers can store it while later
+        pages are still downloading. Stops once `total` unique leads are collected.
+        Leads whose key is in `skip` (already cached) are ignored.
+        """
+        print(f"Scraping JustDial: {self.page_url(keyword, location, 1)}")
+        session = requests.Session()
+        session.headers.update(self.headers)
+
+        results = []
+        seen = set(skip or ())
+        last_page = self.max_pages
+        retried = set()
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
         try:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code != 200:
-                print(f"Failed to fetch JustDial page: {response.status_code}")
-                return []
-            
-            return self.parse_html(response.text, total)
+            in_flight = {}
+            next_page = 1
+            while True:
+                # Keep the pool full while there is work left
+                while (len(in_flight) < self.concurrency and next_page <= last_page
+                       and len(results) < total):
+                    if next_page > 1:
+                        time.sleep(self.page_delay)
+                    url = self.page_url(keyword, location, next_page)
+                    in_flight[executor.submit(self.fetch_page, session, url)] = next_page
+                    next_page += 1
+
+                if not in_flight or len(results) >= total:
+                    break
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = in_flight.pop(future)
+                    html = future.result()
+                    if html is None:
+                        # A failed fetch is retried once, then skipped; it does not end the crawl
+                        if page not in retried:
+                            retried.add(page)
+                            url = self.page_url(keyword, location, page)
+                            in_flight[executor.submit(self.fetch_page, session, url)] = page
+                        continue
+                    # Errors are caught per page, so one bad page or callback keeps the rest of the crawl
+                    try:
+                        leads = self.parse_html(html)
+                        if not leads:
+                            # Empty page: nothing beyond it is worth requesting
+                            last_page = min(last_page, page - 1)
+                            continue
+                        for lead in leads:
+                            key = lead_key(lead)
+                            if key in seen or len(results) >= total:
+                                continue
+                            seen.add(key)
+                            results.append(lead)
+                            metrics.LEADS_SCRAPED.labels("justdial").inc()
+                            if on_lead:
+                                on_lead(lead)
+                    except Exception as e:
+                        print(f"Error processing JustDial page {page}: {e}")
         except Exception as e:
             print(f"Error scraping JustDial: {e}")
-            return []
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            session.close()
+
+        return results
 
-    def parse_html(self, html, total):
-        soup = BeautifulSoup(html, 'html.parser')
+    def fetch_page(self, session, url):
+        """Fetches one listing page. Returns the HTML or None."""
+        try:
+            response = session.get(url, timeout=15)
+            if response.status_code != 200:
+                print(f"Failed to fetch JustDial page {url}: {response.status_code}")
+                return None
+            return response.content
+        except Exception as e:
+            print(f"Error fetching JustDial page {url}: {e}")
+            return None
+
+    def parse_html(self, html, total=None):
+        if not html:
+            return []
+        tree = lxml_html.fromstring(html)
         results = []
-        
-        # Selectors for JustDial (subject to change)
-        # Looking for result cards
-        cards = soup.select('.resultbox') 
-        
-        for card in cards[:total]:
+
+        cards = CARD_XPATH(tree)
+        if total is not None:
+            cards = cards[:total]
+
+        for card in cards:
             try:
-                name_el = card.select_one('.resultbox_title_anchor')
-                name = name_el.text.strip() if name_el else "Unknown"
-                
+                name = self._text(card, NAME_XPATH) or "Unknown"
+
                 # Phone numbers are often obfuscated or require clicking.
                 # Sometimes present in class 'contact-info'
-                phone_el = card.select_one('.contact-info')
-                phone = phone_el.text.strip() if phone_el else "N/A"
-                
-                address_el = card.select_one('.address-info')
-                address = address_el.text.strip() if address_el else "N/A"
-                
-                website_el = card.select_one('.website_icon')
-                website = website_el['href'] if website_el else None
-                
+                phone = self._text(card, PHONE_XPATH) or "N/A"
+                address = self._text(card, ADDRESS_XPATH) or "N/A"
+
+                website_el = WEBSITE_XPATH(card)
+                website = website_el[0].get('href') if website_el else None
+
                 business = {
                     "business_name": name,
                     "category": "N/A",
@@ -59,9 +148,13 @@ class JustDialScraper:
                 results.append(business)
             except Exception as e:
                 continue
-                
+
         return results
 
+    def _text(self, card, xpath):
+        found = xpath(card)
+        return found[0].text_content().strip() if found else None
+
 if __name__ == "__main__":
     scraper = JustDialScraper()
     # Note: JustDial scraping often requires specific location formatting or might block requests.
@@ -5,109 +5,225 @@ import time
 import random
 
 from scraper.email_extractor import EmailExtractor
+from scraper.geo_tiles import geocode_bbox, grid_tiles, tile_url
+from storage.scrape_cache import normalize
+from utils import metrics
+from config import MAPS_MAX_SCROLLS, MAPS_TILE_GRID, MAPS_TILE_CONCURRENCY
 
 class MapsScraper:
     def __init__(self):
         self.results = []
         self.email_extractor = EmailExtractor()
 
-    async def scrape(self, keyword, location, total=10):
-        """Scrapes Google Maps for businesses."""
+    async def scrape(self, keyword, location, total=10, skip=None):
+        """
+        Scrapes Google Maps for businesses.
+
+        `skip` is a set of lead keys (see storage.scrape_cache.lead_key) that are
+        already known; those listings are not clicked and do not count towards `total`.
+        """
         search_term = f"{keyword} in {location}"
         print(f"Scraping Maps for: {search_term}")
+        self._start_run(total, skip)
+        
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            with metrics.BROWSER_CONTEXTS.track_inprogress():
+                page = await browser.new_page()
+                
+                await page.goto("https://www.google.com/maps", timeout=60000)
+                await page.wait_for_selector("input#searchboxinput")
+                
+                await page.fill("input#searchboxinput", search_term)
+                await page.keyboard.press("Enter")
+                
+                await self._collect(page, keyword)
+                
+                await browser.close()
+            await self._finish_emails()
+        
+        return self.results
+
+    async def scrape_tiled(self, keyword, location, total=1000, tiles=None, bbox=None, grid=MAPS_TILE_GRID,
+                           concurrency=MAPS_TILE_CONCURRENCY, skip=None):
+        """
+        Scrapes Google Maps tile by tile to get past the result cap of a single feed.
+
+        Args:
+            keyword (str): Search keyword.
+            location (str): City or area.
+            total (int): Number of unique leads wanted across all tiles.
+            tiles (list, optional): Neighbourhood names to search as "keyword in <name>, location".
+            bbox (tuple, optional): (south, west, north, east) split into grid x grid cells.
+                Looked up with geocode_bbox() when neither tiles nor bbox is given.
+            grid (int): Cells per side of the bounding box grid.
+            concurrency (int): Browser contexts scraping tiles at the same time.
+            skip (set, optional): Lead keys that are already known.
+
+        Returns:
+            list: Leads deduplicated across tiles.
+        """
+        if tiles is None:
+            bbox = bbox or geocode_bbox(location)
+            if not bbox:
+                print(f"Could not find the area of {location}, falling back to a single search.")
+                return await self.scrape(keyword, location, total, skip=skip)
+            tiles = grid_tiles(bbox, grid)
+
+        print(f"Scraping Maps for: {keyword} in {location} across {len(tiles)} tiles")
+        self._start_run(total, skip)
         
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+            semaphore = asyncio.Semaphore(concurrency)
             
-            await page.goto("https://www.google.com/maps", timeout=60000)
-            await page.wait_for_selector("input#searchboxinput")
+            async def run_tile(tile):
+                async with semaphore:
+                    if self._collected >= self._target:
+                        return
+                    # Each tile gets its own context so tiles scrape in parallel
+                    context = await browser.new_context(locale="en-US")
+                    metrics.BROWSER_CONTEXTS.inc()
+                    try:
+                        page = await context.new_page()
+                        await page.goto(tile_url(keyword, location, tile), timeout=60000)
+                        found = await self._collect(page, keyword)
+                        print(f"Tile {tile}: {found} new leads ({self._collected}/{self._target})")
+                    except Exception as e:
+                        print(f"Error scraping tile {tile}: {e}")
+                    finally:
+                        await context.close()
+                        metrics.BROWSER_CONTEXTS.dec()
             
-            await page.fill("input#searchboxinput", search_term)
-            await page.keyboard.press("Enter")
+            await asyncio.gather(*(run_tile(tile) for tile in tiles))
             
-            # Wait for results to load
+            await browser.close()
+            await self._finish_emails()
+        
+        return self.results
+
+    def _start_run(self, total, skip):
+        self._target = total
+        self._collected = 0
+        self._skip_names = {key.split("|", 1)[0] for key in (skip or ())}
+        # Listings already clicked in this run, shared by all tiles
+        self._seen_places = set()
+        self._email_tasks = []
+
+    async def _collect(self, page, keyword):
+        """Walks the results feed on `page` and collects listings until the run target is met."""
+        # Wait for results to load
+        try:
+            await page.wait_for_selector('div[role="feed"]', timeout=10000)
+        except:
+            print("Could not find results feed. Trying to find single result...")
+            pass
+
+        # Scroll to load more results, further when known leads will be skipped
+        feed_selector = 'div[role="feed"]'
+        wanted = self._target - self._collected + len(self._skip_names)
+        loaded = 0
+        for scroll in range(MAPS_MAX_SCROLLS):
             try:
-                await page.wait_for_selector('div[role="feed"]', timeout=10000)
+                await page.hover(feed_selector)
+                await page.mouse.wheel(0, 5000)
+                await asyncio.sleep(2)
             except:
-                print("Could not find results feed. Trying to find single result...")
                 pass
-
-            # Scroll to load more results
-            feed_selector = 'div[role="feed"]'
-            for _ in range(3): # Scroll a few times
-                try:
-                    await page.hover(feed_selector)
-                    await page.mouse.wheel(0, 5000)
-                    await asyncio.sleep(2)
-                except:
-                    pass
-            
-            # Extract items
-            items = await page.query_selector_all('div[role="article"]')
-            print(f"Found {len(items)} potential items. Processing top {total}...")
+            count = len(await page.query_selector_all('div[role="article"]'))
+            # Stop when enough listings are loaded or the feed stopped growing
+            if scroll >= 2 and (count >= wanted or count == loaded):
+                break
+            loaded = count
+        
+        # Extract items
+        items = await page.query_selector_all('div[role="article"]')
+        print(f"Found {len(items)} potential items. Processing top {self._target - self._collected}...")
+        
+        found = 0
+        for item in items:
+            if self._collected >= self._target:
+                break
             
-            count = 0
-            for item in items:
-                if count >= total:
-                    break
+            try:
+                # Get name from aria-label BEFORE clicking (more reliable)
+                name = await item.get_attribute('aria-label')
+                if not name:
+                    continue
+                if normalize(name) in self._skip_names:
+                    continue
                 
-                try:
-                    # Get name from aria-label BEFORE clicking (more reliable)
-                    name = await item.get_attribute('aria-label')
-                    if not name:
-                        continue
-
-                    # Click the item to load details
-                    await item.click()
-                    await asyncio.sleep(2) # Wait for detail panel to load
-                    
-                    # Website
-                    # Look for a link with data-item-id="authority" or similar
-                    website_el = await page.query_selector('a[data-item-id="authority"]')
-                    website = await website_el.get_attribute('href') if website_el else None
-                    
-                    # If no website, skip
-                    if not website:
-                        print(f"Skipping {name} (No website)")
-                        continue
-                        
-                    # Phone
-                    phone_el = await page.query_selector('button[data-item-id^="phone"]')
-                    phone = await phone_el.get_attribute('aria-label') if phone_el else None
-                    if phone:
-                        phone = phone.replace("Phone: ", "").strip()
-                    
-                    # Address
-                    address_el = await page.query_selector('button[data-item-id="address"]')
-                    address = await address_el.get_attribute('aria-label') if address_el else None
-                    if address:
-                        address = address.replace("Address: ", "").strip()
-                        
-                    # Email Extraction (New)
-                    email = self.email_extractor.extract(website)
+                # The place link identifies a listing across overlapping tiles
+                link_el = await item.query_selector('a[href*="/maps/place/"]')
+                place = await link_el.get_attribute('href') if link_el else None
+                place = place.split("?")[0] if place else normalize(name)
+                if place in self._seen_places:
+                    continue
+                self._seen_places.add(place)
 
-                    business = {
-                        "business_name": name,
-                        "category": keyword,
-                        "address": address or "N/A",
-                        "phone": phone or "N/A",
-                        "email": email or "N/A",
-                        "website": website,
-                        "source": "Google Maps"
-                    }
+                # Click the item to load details
+                await item.click()
+                await asyncio.sleep(2) # Wait for detail panel to load
+                
+                # Website
+                # Look for a link with data-item-id="authority" or similar
+                website_el = await page.query_selector('a[data-item-id="authority"]')
+                website = await website_el.get_attribute('href') if website_el else None
+                
+                # If no website, skip
+                if not website:
+                    print(f"Skipping {name} (No website)")
+                    continue
                     
-                    self.results.append(business)
-                    print(f"Extracted: {name} - {website} - {email}")
-                    count += 1
+                # Phone
+                phone_el = await page.query_selector('button[data-item-id^="phone"]')
+                phone = await phone_el.get_attribute('aria-label') if phone_el else None
+                if phone:
+                    phone = phone.replace("Phone: ", "").strip()
+                
+                # Address
+                address_el = await page.query_selector('button[data-item-id="address"]')
+                address = await address_el.get_attribute('aria-label') if address_el else None
+                if address:
+                    address = address.replace("Address: ", "").strip()
+                
+                if self._collected >= self._target:
+                    break
                     
-                except Exception as e:
-                    print(f"Error processing item: {e}")
-                    continue
-            
-            await browser.close()
+                business = {
+                    "business_name": name,
+                    "category": keyword,
+                    "address": address or "N/A",
+                    "phone": phone or "N/A",
+                    "email": "N/A",
+                    "website": website,
+                    "source": "Google Maps"
+                }
+                
+                # Email Extraction runs in the background while we keep clicking through the feed
+                self._email_tasks.append((business, asyncio.create_task(
+                    asyncio.to_thread(self.email_extractor.extract, website)
+                )))
+                
+                self.results.append(business)
+                self._collected += 1
+                metrics.LEADS_SCRAPED.labels("maps").inc()
+                found += 1
+                
+            except Exception as e:
+                print(f"Error processing item: {e}")
+                continue
         
-        return self.results
+        return found
+
+    async def _finish_emails(self):
+        for business, task in self._email_tasks:
+            try:
+                business["email"] = await task or "N/A"
+            except Exception as e:
+                print(f"Error extracting email for {business['business_name']}: {e}")
+            print(f"Extracted: {business['business_name']} - {business['website']} - {business['email']}")
+        self._email_tasks = []
 
     def parse_html(self, html, keyword):
         # Legacy method, not used in new logic but kept for interface compatibility if needed
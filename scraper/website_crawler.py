@@ -1,5 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
+from utils.http import response_text
 from config import USER_AGENT
 
 class WebsiteCrawler:
@@ -14,7 +15,7 @@ class WebsiteCrawler:
         try:
             response = requests.get(url, headers=self.headers, timeout=10)
             if response.status_code == 200:
-                return True, response.text, response.url
+                return True, response_text(response), response.url
             else:
                 return False, None, url
         except Exception as e:
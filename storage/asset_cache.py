@@ -0,0 +1,61 @@
+import sqlite3
+import time
+from storage.database import get_connection
+
+# Sizes of page subresources (scripts, stylesheets, images, fonts), keyed by URL and
+# validator (ETag or Last-Modified, '' when the server sends neither). CDN assets such
+# as jQuery or Google Fonts recur across thousands of leads and are measured once;
+# a stale entry with a validator is revalidated with a conditional request.
+
+# Chunk size for IN (...) lookups, below SQLite's variable limit
+LOOKUP_CHUNK = 500
+
+def get_cached_assets(urls):
+    """
+    Returns {url: {"validator", "size", "content_type", "checked_at"}} with the most
+    recently checked entry of each cached URL in `urls`.
+    """
+    urls = list(dict.fromkeys(urls))
+    cached = {}
+    conn = get_connection()
+    try:
+        for i in range(0, len(urls), LOOKUP_CHUNK):
+            chunk = urls[i:i + LOOKUP_CHUNK]
+            rows = conn.execute(
+                f"SELECT url, validator, size, content_type, checked_at FROM asset_cache "
+                f"WHERE url IN ({','.join('?' * len(chunk))}) ORDER BY checked_at", chunk
+            ).fetchall()
+            # Ordered by age, so the newest entry of a URL wins
+            cached.update((row['url'], dict(row)) for row in rows)
+    except sqlite3.OperationalError as e:
+        # Table missing on DBs created before the cache existed; `main.py init` adds it
+        print(f"Asset cache unavailable: {e}")
+        return {}
+    finally:
+        conn.close()
+    return cached
+
+def save_assets(entries):
+    """Stores measured assets: dicts of url, validator, size and content_type."""
+    if not entries:
+        return
+    now = time.time()
+    conn = get_connection()
+    try:
+        conn.executemany('''
+            INSERT OR REPLACE INTO asset_cache (url, validator, size, content_type, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(e['url'], e.get('validator') or '', e['size'], e.get('content_type'), now) for e in entries])
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        print(f"Could not save asset cache: {e}")
+    finally:
+        conn.close()
+
+def clear_cache():
+    conn = get_connection()
+    try:
+        conn.execute("DELETE FROM asset_cache")
+        conn.commit()
+    finally:
+        conn.close()
@@ -1,6 +1,8 @@
 import sqlite3
 import os
-from config import DB_PATH
+import json
+import time
+from config import DB_PATH, TRIAGE_MAX_AGE, TRIAGE_RETRY_AGE
 
 def get_connection():
     """Establishes a connection to the SQLite database."""
@@ -20,7 +22,6 @@ def init_db():
             business_name TEXT NOT NULL,
             category TEXT,
             address TEXT,
-            address TEXT,
             phone TEXT,
             email TEXT,
             website TEXT,
@@ -45,6 +46,140 @@ def init_db():
         )
     ''')
     
+    # Scrape Cache Table (see storage/scrape_cache.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scrape_cache (
+            source TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            location TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            results JSON NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (source, keyword, location)
+        )
+    ''')
+    
+    # Job Queue Tables (see storage/job_queue.py). One queue per pipeline stage.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stage TEXT NOT NULL,
+            payload JSON,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            run_after REAL NOT NULL,
+            lease_owner TEXT,
+            lease_until REAL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_runnable ON jobs (stage, status, run_after)")
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dead_letter_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            payload JSON,
+            attempts INTEGER,
+            last_error TEXT,
+            failed_at REAL NOT NULL,
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        )
+    ''')
+    
+    # Outreach outbox (see storage/outbox.py): one row per email, unique per idempotency key
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            lead_id INTEGER,
+            to_email TEXT NOT NULL,
+            domain TEXT NOT NULL,
+            subject TEXT,
+            body TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            send_after REAL NOT NULL,
+            window_start INTEGER,
+            window_end INTEGER,
+            lease_owner TEXT,
+            lease_until REAL,
+            last_error TEXT,
+            sent_at REAL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            FOREIGN KEY (lead_id) REFERENCES leads (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, send_after)")
+    
+    # Earliest time the next email may go to each recipient domain
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbox_domains (
+            domain TEXT PRIMARY KEY,
+            next_send_at REAL NOT NULL
+        )
+    ''')
+    
+    # Timed spans of each audit: analyzers, HTTP requests, Gemini calls (see utils/timing.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS audit_timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            audit_id INTEGER NOT NULL,
+            lead_id INTEGER,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            detail TEXT,
+            start_ms REAL,
+            duration_ms REAL NOT NULL,
+            bytes INTEGER,
+            error TEXT,
+            created_at REAL NOT NULL,
+            FOREIGN KEY (audit_id) REFERENCES audits (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timings_created ON audit_timings (created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timings_audit ON audit_timings (audit_id)")
+    
+    # Sizes of page subresources, shared by every lead that uses them (see storage/asset_cache.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS asset_cache (
+            url TEXT NOT NULL,
+            validator TEXT NOT NULL DEFAULT '',
+            size INTEGER,
+            content_type TEXT,
+            checked_at REAL NOT NULL,
+            PRIMARY KEY (url, validator)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_asset_cache_checked ON asset_cache (url, checked_at)")
+    
+    # WAL lets the dashboard read while workers write
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
+    # Write counters per table. Triggers bump them on every write from any process,
+    # so the dashboard can cache query results until the version changes.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('leads', 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS leads_version_{event.lower()} AFTER {event} ON leads
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'leads';
+            END
+        ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_created ON leads (created_at)")
+    
     # Migration: Add email column if it doesn't exist (for existing DBs)
     try:
         cursor.execute("ALTER TABLE leads ADD COLUMN email TEXT")
@@ -60,6 +195,22 @@ def init_db():
     except sqlite3.OperationalError:
         pass
 
+    # Migration: Add site triage columns (see pipeline/triage.py)
+    try:
+        cursor.execute("ALTER TABLE leads ADD COLUMN site_status TEXT")
+        cursor.execute("ALTER TABLE leads ADD COLUMN site_detail TEXT")
+        cursor.execute("ALTER TABLE leads ADD COLUMN site_checked_at REAL")
+        print("Migrated DB: Added site triage columns.")
+    except sqlite3.OperationalError:
+        pass
+
+    # Migration: Add audit tier column (NULL for audits made before tiers, which were all deep)
+    try:
+        cursor.execute("ALTER TABLE audits ADD COLUMN tier TEXT")
+        print("Migrated DB: Added audit tier column.")
+    except sqlite3.OperationalError:
+        pass
+
     conn.commit()
     conn.close()
     print(f"Database initialized at {DB_PATH}")
@@ -91,11 +242,213 @@ def insert_lead(lead_data):
     finally:
         conn.close()
 
+def find_lead(lead_data):
+    """
+    Id of a stored lead from the same source with the same name and website
+    (or phone, or address), compared case-insensitively, or None.
+    """
+    identity = lead_data.get('website') or lead_data.get('phone') or lead_data.get('address') or ''
+    conn = get_connection()
+    try:
+        row = conn.execute('''
+            SELECT id FROM leads
+            WHERE source IS ? AND lower(trim(business_name)) = lower(trim(?))
+              AND lower(trim(COALESCE(NULLIF(website, ''), NULLIF(phone, ''), NULLIF(address, ''), ''))) = lower(trim(?))
+            ORDER BY id LIMIT 1
+        ''', (lead_data.get('source'), lead_data.get('business_name') or '', identity)).fetchone()
+        return row['id'] if row else None
+    finally:
+        conn.close()
+
+def get_lead(lead_id):
+    """Fetches a single lead as a dict, or None."""
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT * FROM leads WHERE id = ?", (lead_id,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def get_latest_audit(lead_id):
+    """
+    Fetches the lead's most recent audit as the dict the report and email
+    generators expect: the parsed audit_data with the score columns merged in.
+    """
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT * FROM audits WHERE lead_id = ? ORDER BY created_at DESC, id DESC LIMIT 1", (lead_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    audit_data = json.loads(row['audit_data']) if row['audit_data'] else {}
+    for column in ('performance_score', 'seo_score', 'ux_score', 'mobile_score', 'overall_score'):
+        audit_data[column] = row[column]
+    audit_data['tier'] = row['tier'] or 'deep'
+    audit_data['audit_id'] = row['id']
+    return audit_data
+
+def update_outreach_status(lead_id, status):
+    conn = get_connection()
+    try:
+        conn.execute(
+            "UPDATE leads SET outreach_status = ?, outreach_time = CURRENT_TIMESTAMP WHERE id = ?", (status, lead_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def save_site_statuses(results):
+    """Stores site triage results: (lead_id, result) pairs, result as returned by SiteTriage.check."""
+    rows = [(result['status'], result.get('detail'), time.time(), lead_id) for lead_id, result in results]
+    if not rows:
+        return
+    conn = get_connection()
+    try:
+        conn.executemany("UPDATE leads SET site_status = ?, site_detail = ?, site_checked_at = ? WHERE id = ?", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+# Triage results that may be transient (see pipeline/triage.py), in SQL
+TRANSIENT_SITE_SQL = "(site_status = 'unreachable' OR (site_status = 'http_error' AND site_detail LIKE 'HTTP 5%'))"
+
+def auditable_lead_ids():
+    """
+    Ids of leads with a website worth queueing for audit: live, never triaged, or
+    whose failed triage is old enough to be checked again (TRIAGE_RETRY_AGE for
+    transient failures, TRIAGE_MAX_AGE for the rest).
+    """
+    conn = get_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT id FROM leads
+            WHERE website IS NOT NULL AND (
+                site_status IS NULL OR site_status = 'live'
+                OR COALESCE(site_checked_at, 0) < ? - CASE WHEN {TRANSIENT_SITE_SQL} THEN ? ELSE ? END
+            )
+            ORDER BY id
+        ''', (time.time(), TRIAGE_RETRY_AGE, TRIAGE_MAX_AGE)).fetchall()
+        return [row['id'] for row in rows]
+    finally:
+        conn.close()
+
+# Columns the leads list may be sorted by (user input never reaches SQL directly)
+LEAD_SORT_COLUMNS = ["created_at", "business_name", "category", "outreach_status", "id"]
+
+def get_leads_version():
+    """Returns a counter that changes whenever the leads table is written."""
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT version FROM table_versions WHERE name = 'leads'").fetchone()
+        return row['version'] if row else 0
+    finally:
+        conn.close()
+
+def _lead_filters(search=None, category=None, status=None, has_email=False, has_website=False):
+    clauses, params = [], []
+    if search:
+        clauses.append("(business_name LIKE ? OR email LIKE ? OR website LIKE ?)")
+        params += [f"%{search}%"] * 3
+    if category:
+        clauses.append("category = ?")
+        params.append(category)
+    if status:
+        clauses.append("COALESCE(outreach_status, 'Pending') = ?")
+        params.append(status)
+    if has_email:
+        clauses.append("email IS NOT NULL AND email NOT IN ('', 'N/A')")
+    if has_website:
+        clauses.append("website IS NOT NULL AND website NOT IN ('', 'N/A')")
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def query_leads(search=None, category=None, status=None, has_email=False, has_website=False,
+                sort="created_at", descending=True, limit=50, offset=0):
+    """
+    Fetches one page of leads with filtering and sorting done in SQL.
+
+    Args:
+        search (str): Substring of business name, email or website.
+        category (str): Exact category.
+        status (str): Outreach status ('Pending' matches leads never contacted).
+        has_email (bool): Only leads with an email.
+        has_website (bool): Only leads with a website.
+        sort (str): One of LEAD_SORT_COLUMNS.
+        descending (bool): Sort direction.
+        limit (int): Page size; None for every matching lead.
+        offset (int): Rows to skip.
+
+    Returns:
+        tuple: (list of lead dicts, total number of matching leads)
+    """
+    if sort not in LEAD_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort leads by {sort}")
+    where, params = _lead_filters(search, category, status, has_email, has_website)
+    order = f" ORDER BY {sort} {'DESC' if descending else 'ASC'}, id {'DESC' if descending else 'ASC'}"
+    page = " LIMIT ? OFFSET ?" if limit is not None else ""
+    conn = get_connection()
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM leads{where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM leads{where}{order}{page}", params + ([limit, offset] if limit is not None else [])
+        ).fetchall()
+        return [dict(row) for row in rows], total
+    finally:
+        conn.close()
+
+def get_lead_categories():
+    """Distinct lead categories, for filter drop-downs."""
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT category FROM leads WHERE category IS NOT NULL AND category != '' ORDER BY category"
+        ).fetchall()
+        return [row['category'] for row in rows]
+    finally:
+        conn.close()
+
+def delete_leads(lead_ids):
+    """Deletes several leads and their audits (and audit timings) in one transaction. Returns the number deleted."""
+    lead_ids = list(lead_ids)
+    if not lead_ids:
+        return 0
+    conn = get_connection()
+    try:
+        marks = ",".join("?" * len(lead_ids))
+        conn.execute(f"DELETE FROM audit_timings WHERE lead_id IN ({marks})", lead_ids)
+        conn.execute(f"DELETE FROM audits WHERE lead_id IN ({marks})", lead_ids)
+        deleted = conn.execute(f"DELETE FROM leads WHERE id IN ({marks})", lead_ids).rowcount
+        conn.commit()
+        return deleted
+    except Exception as e:
+        print(f"Error deleting leads: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def update_outreach_statuses(lead_ids, status):
+    """Sets the outreach status of several leads at once."""
+    lead_ids = list(lead_ids)
+    if not lead_ids:
+        return
+    conn = get_connection()
+    try:
+        conn.execute(
+            f"UPDATE leads SET outreach_status = ?, outreach_time = CURRENT_TIMESTAMP WHERE id IN ({','.join('?' * len(lead_ids))})",
+            [status] + lead_ids
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
 def delete_lead(lead_id):
-    """Deletes a lead and its audits from the database."""
+    """Deletes a lead and its audits (and audit timings) from the database."""
     conn = get_connection()
     cursor = conn.cursor()
     try:
+        cursor.execute("DELETE FROM audit_timings WHERE lead_id = ?", (lead_id,))
         cursor.execute("DELETE FROM audits WHERE lead_id = ?", (lead_id,))
         cursor.execute("DELETE FROM leads WHERE id = ?", (lead_id,))
         conn.commit()
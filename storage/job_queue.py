@@ -0,0 +1,203 @@
+import json
+import random
+import time
+from storage.database import get_connection
+from utils import metrics
+from config import JOB_MAX_ATTEMPTS, JOB_LEASE_SECONDS, JOB_BACKOFF_BASE, JOB_BACKOFF_MAX
+
+# Pipeline stages, in order. Each stage is its own queue inside the jobs table.
+STAGES = ["scrape", "audit", "ai", "outreach"]
+
+class PermanentJobError(Exception):
+    """Raised by a stage handler when retrying cannot help (e.g. lead has no website)."""
+
+def _connect():
+    conn = get_connection()
+    # Several worker processes share the DB; wait for locks instead of failing
+    conn.execute("PRAGMA busy_timeout = 30000")
+    return conn
+
+def _row_to_job(row):
+    job = dict(row)
+    job['payload'] = json.loads(job['payload']) if job['payload'] else {}
+    return job
+
+def enqueue(stage, payload, max_attempts=JOB_MAX_ATTEMPTS, delay=0):
+    """
+    Adds a job to a stage queue.
+
+    Args:
+        stage (str): One of STAGES.
+        payload (dict): JSON-serialisable job arguments.
+        max_attempts (int): Attempts before the job goes to the dead-letter queue.
+        delay (float): Seconds to wait before the job becomes runnable.
+
+    Returns:
+        int: The job id.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage}")
+    now = time.time()
+    conn = _connect()
+    try:
+        cursor = conn.execute('''
+            INSERT INTO jobs (stage, payload, status, attempts, max_attempts, run_after, created_at, updated_at)
+            VALUES (?, ?, 'queued', 0, ?, ?, ?, ?)
+        ''', (stage, json.dumps(payload), max_attempts, now + delay, now, now))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def lease(stage, worker_id, limit=1, lease_seconds=JOB_LEASE_SECONDS):
+    """
+    Claims up to `limit` runnable jobs of a stage for `worker_id`.
+
+    A job is runnable when it is queued and due, or when it is running but its
+    lease has expired (the worker holding it died). Claiming happens in one
+    write transaction, so two workers never get the same job.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute('''
+            SELECT * FROM jobs
+            WHERE stage = ?
+              AND ((status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until < ?))
+            ORDER BY run_after, id
+            LIMIT ?
+        ''', (stage, now, now, limit)).fetchall()
+        jobs = []
+        for row in rows:
+            if row['status'] == 'running' and row['attempts'] >= row['max_attempts']:
+                # The worker died on the last attempt; don't let a crashing job loop forever
+                _dead_letter(conn, row, "Lease expired on final attempt", now)
+                continue
+            conn.execute('''
+                UPDATE jobs SET status = 'running', lease_owner = ?, lease_until = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            ''', (worker_id, now + lease_seconds, now, row['id']))
+            job = _row_to_job(row)
+            job['attempts'] += 1
+            jobs.append(job)
+        conn.commit()
+        return jobs
+    finally:
+        conn.close()
+
+def extend_lease(job_id, worker_id, lease_seconds=JOB_LEASE_SECONDS):
+    """Heartbeat for long jobs. Returns False if the lease was lost to another worker."""
+    conn = _connect()
+    try:
+        cursor = conn.execute('''
+            UPDATE jobs SET lease_until = ?, updated_at = ?
+            WHERE id = ? AND lease_owner = ? AND status = 'running'
+        ''', (time.time() + lease_seconds, time.time(), job_id, worker_id))
+        conn.commit()
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+def complete(job_id, worker_id):
+    conn = _connect()
+    try:
+        conn.execute('''
+            UPDATE jobs SET status = 'done', lease_owner = NULL, lease_until = NULL, updated_at = ?
+            WHERE id = ? AND lease_owner = ?
+        ''', (time.time(), job_id, worker_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def backoff(attempts):
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped."""
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+def fail(job_id, worker_id, error, permanent=False):
+    """
+    Records a failed attempt. The job is retried after a backoff, or moved to
+    the dead-letter queue once it is out of attempts (or the error is permanent).
+
+    Returns:
+        str: 'retry', 'dead', or 'lost' if another worker took over the lease.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT * FROM jobs WHERE id = ? AND lease_owner = ?", (job_id, worker_id)).fetchone()
+        if not row:
+            conn.rollback()
+            return 'lost'
+        if permanent or row['attempts'] >= row['max_attempts']:
+            _dead_letter(conn, row, error, now)
+            outcome = 'dead'
+        else:
+            conn.execute('''
+                UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_until = NULL,
+                    run_after = ?, last_error = ?, updated_at = ?
+                WHERE id = ?
+            ''', (now + backoff(row['attempts']), error, now, job_id))
+            outcome = 'retry'
+        conn.commit()
+        return outcome
+    finally:
+        conn.close()
+
+def _dead_letter(conn, row, error, now):
+    conn.execute('''
+        INSERT INTO dead_letter_jobs (job_id, stage, payload, attempts, last_error, failed_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (row['id'], row['stage'], row['payload'], row['attempts'], error, now))
+    conn.execute('''
+        UPDATE jobs SET status = 'dead', lease_owner = NULL, lease_until = NULL, last_error = ?, updated_at = ?
+        WHERE id = ?
+    ''', (error, now, row['id']))
+
+def retry_dead(stage=None):
+    """Puts dead-lettered jobs back on their queue with a fresh set of attempts."""
+    conn = _connect()
+    try:
+        query = "SELECT id, job_id FROM dead_letter_jobs"
+        params = ()
+        if stage:
+            query += " WHERE stage = ?"
+            params = (stage,)
+        rows = conn.execute(query, params).fetchall()
+        for row in rows:
+            conn.execute('''
+                UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, last_error = NULL, updated_at = ?
+                WHERE id = ?
+            ''', (time.time(), time.time(), row['job_id']))
+            conn.execute("DELETE FROM dead_letter_jobs WHERE id = ?", (row['id'],))
+        conn.commit()
+        return len(rows)
+    finally:
+        conn.close()
+
+def get_job(job_id):
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+    finally:
+        conn.close()
+
+def queue_stats():
+    """Returns {stage: {status: count}} including a 'dead' count per stage."""
+    conn = _connect()
+    try:
+        stats = {stage: {"queued": 0, "running": 0, "done": 0, "dead": 0} for stage in STAGES}
+        for row in conn.execute("SELECT stage, status, COUNT(*) AS n FROM jobs GROUP BY stage, status"):
+            stats.setdefault(row['stage'], {})[row['status']] = row['n']
+        return stats
+    finally:
+        conn.close()
+
+# Scraped by the metrics endpoint rather than kept current on every transition
+metrics.QUEUE_DEPTH.set_function(
+    lambda: {(stage,): counts.get('queued', 0) for stage, counts in queue_stats().items()}
+)
@@ -0,0 +1,244 @@
+import re
+import time
+from datetime import datetime, timedelta
+from storage.database import get_connection
+from storage.job_queue import backoff
+from utils import metrics
+from config import OUTBOX_MAX_ATTEMPTS, OUTBOX_LEASE_SECONDS, OUTBOX_DOMAIN_INTERVAL
+
+# Outreach emails waiting to be sent. Generating an email only queues it here; the
+# outbox worker (pipeline/outbox.py) sends it when its send window is open and its
+# recipient domain is not throttled.
+#   queued -> sending -> sent | failed        (failed: retried with backoff until out of attempts)
+
+def _connect():
+    conn = get_connection()
+    conn.execute("PRAGMA busy_timeout = 30000")
+    return conn
+
+def outreach_key(to_email, campaign=None):
+    """
+    Idempotency key of an outreach email: one email per recipient address per campaign.
+    Keyed on the address, not the lead id, because re-scraping saves the same business
+    again as a new lead.
+    """
+    return f"{campaign or 'outreach'}:{to_email.strip().lower()}"
+
+def recipient_domain(email):
+    return email.rsplit("@", 1)[-1].strip().lower()
+
+def parse_window(window):
+    """
+    Parses a daily send window "HH:MM-HH:MM" (server local time) into minutes of the day.
+    Windows may wrap midnight ("22:00-06:00"). Returns (None, None) for no window.
+    """
+    if not window:
+        return None, None
+    match = re.fullmatch(r"\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*", window)
+    if not match:
+        raise ValueError(f"Send window must look like 09:00-17:00, got {window!r}")
+    h1, m1, h2, m2 = map(int, match.groups())
+    return h1 * 60 + m1, h2 * 60 + m2
+
+def next_window_open(now, start, end):
+    """Returns `now` if it is inside the window, else the epoch time the window next opens."""
+    if start is None:
+        return now
+    local = datetime.fromtimestamp(now)
+    minute = local.hour * 60 + local.minute
+    inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+    if inside:
+        return now
+    opens = local.replace(hour=start // 60, minute=start % 60, second=0, microsecond=0)
+    if opens <= local:
+        opens += timedelta(days=1)
+    return opens.timestamp()
+
+def enqueue_email(lead_id, to_email, subject, body, idempotency_key=None, send_after=None, window=None,
+                  max_attempts=OUTBOX_MAX_ATTEMPTS):
+    """
+    Queues an email unless one with the same idempotency key already exists.
+
+    Args:
+        lead_id (int): Lead the email is for; marked 'Queued' and later 'Sent'.
+        to_email (str): Recipient.
+        subject (str): Subject line.
+        body (str): Plain-text body.
+        idempotency_key (str): Defaults to outreach_key(to_email).
+        send_after (float): Epoch time before which the email is not sent.
+        window (str): Daily send window, e.g. "09:00-17:00".
+        max_attempts (int): Send attempts before the email is marked failed for good.
+
+    Returns:
+        tuple: (message id, True if it was queued now / False if it already existed)
+    """
+    key = idempotency_key or outreach_key(to_email)
+    start, end = parse_window(window)
+    now = time.time()
+    conn = _connect()
+    try:
+        cursor = conn.execute('''
+            INSERT OR IGNORE INTO outbox (idempotency_key, lead_id, to_email, domain, subject, body, status,
+                attempts, max_attempts, send_after, window_start, window_end, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, 'queued', 0, ?, ?, ?, ?, ?, ?)
+        ''', (key, lead_id, to_email, recipient_domain(to_email), subject, body, max_attempts,
+              send_after or now, start, end, now, now))
+        if cursor.rowcount:
+            if lead_id:
+                conn.execute(
+                    "UPDATE leads SET outreach_status = 'Queued', outreach_time = CURRENT_TIMESTAMP WHERE id = ?",
+                    (lead_id,)
+                )
+            conn.commit()
+            return cursor.lastrowid, True
+        row = conn.execute("SELECT id FROM outbox WHERE idempotency_key = ?", (key,)).fetchone()
+        return row['id'], False
+    finally:
+        conn.close()
+
+def get_message(idempotency_key):
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM outbox WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def lease_messages(worker_id, limit=1, lease_seconds=OUTBOX_LEASE_SECONDS, domain_interval=OUTBOX_DOMAIN_INTERVAL):
+    """
+    Claims up to `limit` emails that may be sent now: due, inside their send window,
+    and at most one per recipient domain every `domain_interval` seconds.
+
+    An email whose lease expired while 'sending' is marked failed instead of being
+    sent again: the worker may have died after the server accepted it, and a
+    duplicate is worse than a missed email. `retry_failed` puts it back.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute('''
+            UPDATE outbox SET status = 'failed', lease_owner = NULL, lease_until = NULL, updated_at = ?,
+                last_error = 'Worker stopped while sending; not resent to avoid a duplicate'
+            WHERE status = 'sending' AND lease_until < ?
+        ''', (now, now))
+        rows = conn.execute('''
+            SELECT o.* FROM outbox o
+            LEFT JOIN outbox_domains d ON d.domain = o.domain
+            WHERE o.status = 'queued' AND o.send_after <= ? AND COALESCE(d.next_send_at, 0) <= ?
+            ORDER BY o.send_after, o.id
+            LIMIT ?
+        ''', (now, now, limit * 10)).fetchall()
+
+        messages, domains = [], set()
+        for row in rows:
+            if len(messages) >= limit:
+                break
+            if row['domain'] in domains:
+                continue
+            opens = next_window_open(now, row['window_start'], row['window_end'])
+            if opens > now:
+                conn.execute("UPDATE outbox SET send_after = ?, updated_at = ? WHERE id = ?", (opens, now, row['id']))
+                continue
+            conn.execute('''
+                UPDATE outbox SET status = 'sending', lease_owner = ?, lease_until = ?, attempts = attempts + 1,
+                    updated_at = ?
+                WHERE id = ?
+            ''', (worker_id, now + lease_seconds, now, row['id']))
+            conn.execute('''
+                INSERT INTO outbox_domains (domain, next_send_at) VALUES (?, ?)
+                ON CONFLICT(domain) DO UPDATE SET next_send_at = excluded.next_send_at
+            ''', (row['domain'], now + domain_interval))
+            domains.add(row['domain'])
+            message = dict(row)
+            message['attempts'] += 1
+            messages.append(message)
+        conn.commit()
+        return messages
+    finally:
+        conn.close()
+
+def mark_sent(message_id, worker_id):
+    """Records a sent email and marks its lead 'Sent' in the same transaction."""
+    now = time.time()
+    conn = _connect()
+    try:
+        cursor = conn.execute('''
+            UPDATE outbox SET status = 'sent', lease_owner = NULL, lease_until = NULL, sent_at = ?, updated_at = ?
+            WHERE id = ? AND lease_owner = ?
+        ''', (now, now, message_id, worker_id))
+        conn.execute('''
+            UPDATE leads SET outreach_status = 'Sent', outreach_time = CURRENT_TIMESTAMP
+            WHERE id = (SELECT lead_id FROM outbox WHERE id = ?)
+        ''', (message_id,))
+        conn.commit()
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+def mark_failed(message_id, worker_id, error, permanent=False):
+    """
+    Records a failed send. The email is retried after a backoff unless it is out
+    of attempts or the error is permanent (e.g. the address was refused).
+
+    Returns:
+        str: 'retry', 'failed', or 'lost' if the lease was taken over.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT * FROM outbox WHERE id = ? AND lease_owner = ?", (message_id, worker_id)).fetchone()
+        if not row:
+            conn.rollback()
+            return 'lost'
+        if permanent or row['attempts'] >= row['max_attempts']:
+            conn.execute('''
+                UPDATE outbox SET status = 'failed', lease_owner = NULL, lease_until = NULL, last_error = ?, updated_at = ?
+                WHERE id = ?
+            ''', (error, now, message_id))
+            conn.execute("UPDATE leads SET outreach_status = 'Failed' WHERE id = ?", (row['lead_id'],))
+            outcome = 'failed'
+        else:
+            conn.execute('''
+                UPDATE outbox SET status = 'queued', lease_owner = NULL, lease_until = NULL, send_after = ?,
+                    last_error = ?, updated_at = ?
+                WHERE id = ?
+            ''', (now + backoff(row['attempts']), error, now, message_id))
+            outcome = 'retry'
+        conn.commit()
+        return outcome
+    finally:
+        conn.close()
+
+def retry_failed():
+    """Requeues failed emails with a fresh set of attempts. Returns how many."""
+    now = time.time()
+    conn = _connect()
+    try:
+        cursor = conn.execute('''
+            UPDATE outbox SET status = 'queued', attempts = 0, send_after = ?, last_error = NULL, updated_at = ?
+            WHERE status = 'failed'
+        ''', (now, now))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def outbox_stats():
+    """Returns {status: count}, plus 'due' (queued emails that could be sent now)."""
+    conn = _connect()
+    try:
+        stats = {"queued": 0, "sending": 0, "sent": 0, "failed": 0}
+        for row in conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status"):
+            stats[row['status']] = row['n']
+        stats["due"] = conn.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status = 'queued' AND send_after <= ?", (time.time(),)
+        ).fetchone()[0]
+        return stats
+    finally:
+        conn.close()
+
+metrics.OUTBOX_DEPTH.set_function(
+    lambda: {(status,): n for status, n in outbox_stats().items() if status != "due"}
+)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from config import REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES, REPORT_CACHE_MEMORY_ITEMS
+
+# Bump when the PDF layout changes so old cached reports are not served
+REPORT_FORMAT_VERSION = 1
+
+# Lead fields printed in the report; outreach status changes must not invalidate it
+REPORT_LEAD_FIELDS = ("id", "business_name", "category", "website", "phone", "address")
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def audit_key(lead, audit_data):
+    """Content hash of what a report is computed from (AI suggestions are keyed on this)."""
+    return _digest(REPORT_FORMAT_VERSION, {k: lead.get(k) for k in REPORT_LEAD_FIELDS}, audit_data)
+
+def report_key(lead, audit_data, suggestions):
+    """Content hash of a rendered report: same lead, audit and suggestions give the same PDF."""
+    return _digest(audit_key(lead, audit_data), suggestions)
+
+class ReportCache:
+    """
+    Content-addressed store for rendered PDFs and their AI suggestions.
+
+    Entries live on disk as <key>.pdf / <key>.txt and the most recent ones are also
+    kept in memory. Reads touch the file's mtime, and once the directory grows past
+    `max_bytes` the least recently used files are deleted. Files are written to a
+    temp name and renamed, so several processes can share the directory.
+    """
+
+    def __init__(self, directory=None, max_bytes=REPORT_CACHE_MAX_BYTES,
+                 memory_items=REPORT_CACHE_MEMORY_ITEMS):
+        self.directory = directory or REPORT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _get(self, key, ext):
+        path = self._path(key, ext)
+        with self._lock:
+            data = self._memory.get((key, ext))
+            if data is not None:
+                self._memory.move_to_end((key, ext))
+        if data is not None:
+            try:
+                os.utime(path)  # keep the disk LRU order in step with memory hits
+            except OSError:
+                pass
+            return data
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+        except OSError:
+            return None
+        self._remember(key, ext, data)
+        return data
+
+    def _put(self, key, ext, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, ext)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._remember(key, ext, data)
+        self.evict()
+
+    def _remember(self, key, ext, data):
+        with self._lock:
+            self._memory[(key, ext)] = data
+            self._memory.move_to_end((key, ext))
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def evict(self):
+        """Deletes least recently used files until the directory fits in max_bytes."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.is_file() and not e.name.endswith(".tmp")]
+        except OSError:
+            return
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def get_pdf(self, key):
+        return self._get(key, "pdf")
+
+    def put_pdf(self, key, data):
+        self._put(key, "pdf", data)
+
+    def get_suggestions(self, lead, audit_data):
+        data = self._get(audit_key(lead, audit_data), "txt")
+        return data.decode("utf-8") if data is not None else None
+
+    def put_suggestions(self, lead, audit_data, suggestions):
+        self._put(audit_key(lead, audit_data), "txt", suggestions.encode("utf-8"))
+
+    def get_or_render(self, lead, audit_data, suggestions):
+        """Returns the PDF bytes for this lead/audit/suggestions, rendering only on a cache miss."""
+        key = report_key(lead, audit_data, suggestions)
+        data = self.get_pdf(key)
+        if data is None:
+            from reporting.pdf_generator import PDFReportGenerator
+            data = PDFReportGenerator().render(lead, audit_data, suggestions)
+            self.put_pdf(key, data)
+        return data
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_report_cache():
+    """Returns the process-wide ReportCache (of REPORT_CACHE_DIR)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.directory != REPORT_CACHE_DIR:
+            _cache = ReportCache()
+        return _cache
@@ -0,0 +1,111 @@
+import inspect
+import json
+import re
+import sqlite3
+import time
+from storage.database import get_connection
+from config import SCRAPE_CACHE_TTL
+
+def normalize(text):
+    """Lowercases and collapses whitespace so 'Dentist ' and 'dentist' share a cache entry."""
+    return re.sub(r'\s+', ' ', (text or '').strip().lower())
+
+def lead_key(lead):
+    """Identity of a scraped lead, used to dedup cached and freshly scraped results."""
+    return "|".join([
+        normalize(lead.get('business_name')),
+        normalize(lead.get('website') or lead.get('phone') or lead.get('address'))
+    ])
+
+def get_cached(source, keyword, location, ttl=SCRAPE_CACHE_TTL):
+    """
+    Returns (depth, results) of the last scrape for this query, or (0, []) if
+    there is none or it is older than `ttl` seconds.
+
+    `depth` is how many results were *requested*; a run that asked for 60 but
+    found 45 has exhausted the source and does not need a top-up for 50.
+    """
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT depth, results, updated_at FROM scrape_cache WHERE source = ? AND keyword = ? AND location = ?",
+            (normalize(source), normalize(keyword), normalize(location))
+        ).fetchone()
+    except sqlite3.OperationalError as e:
+        # Table missing on DBs created before the cache existed; `main.py init` adds it
+        print(f"Scrape cache unavailable: {e}")
+        return 0, []
+    finally:
+        conn.close()
+
+    if not row or time.time() - row['updated_at'] > ttl:
+        return 0, []
+    return row['depth'], json.loads(row['results'])
+
+def save_cached(source, keyword, location, depth, results):
+    conn = get_connection()
+    try:
+        conn.execute('''
+            INSERT OR REPLACE INTO scrape_cache (source, keyword, location, depth, results, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (normalize(source), normalize(keyword), normalize(location), depth, json.dumps(results), time.time()))
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        print(f"Could not save scrape cache: {e}")
+    finally:
+        conn.close()
+
+def clear_cache():
+    conn = get_connection()
+    try:
+        conn.execute("DELETE FROM scrape_cache")
+        conn.commit()
+    finally:
+        conn.close()
+
+async def scrape_with_cache(source, keyword, location, total, scrape_fn, ttl=SCRAPE_CACHE_TTL, use_cache=True):
+    """
+    Serves a scrape from the cache, topping it up when more results are requested.
+
+    Args:
+        source (str): Scraper name ("maps", "justdial", ...).
+        keyword (str): Search keyword.
+        location (str): Search location.
+        total (int): Number of leads wanted.
+        scrape_fn (callable): scrape_fn(count, skip) -> list of leads (may be async).
+            `count` is how many *new* leads to fetch and `skip` is the set of
+            lead_key() values already cached, which the scraper should not return.
+        ttl (int): Max cache age in seconds.
+        use_cache (bool): False forces a fresh scrape (the result is still cached).
+
+    Returns:
+        list: Up to `total` leads, cached ones first. A scrape that found nothing
+        new is not cached, so the next call tries again.
+    """
+    depth, cached = get_cached(source, keyword, location, ttl) if use_cache else (0, [])
+
+    if depth >= total:
+        print(f"Scrape cache hit: {len(cached)} leads for '{keyword}' in '{location}'")
+        return cached[:total]
+
+    missing = total - len(cached)
+    if cached:
+        print(f"Scrape cache has {len(cached)} leads, fetching {missing} more...")
+
+    skip = {lead_key(lead) for lead in cached}
+    fresh = scrape_fn(missing, skip)
+    if inspect.isawaitable(fresh):
+        fresh = await fresh
+
+    results = list(cached)
+    for lead in fresh or []:
+        key = lead_key(lead)
+        if key not in skip:
+            skip.add(key)
+            results.append(lead)
+
+    # Scrapers swallow their errors and return nothing when blocked or offline; saving
+    # that would mark the query as exhausted and serve the empty result until the TTL
+    if len(results) > len(cached):
+        save_cached(source, keyword, location, total, results)
+    return results[:total]
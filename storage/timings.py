@@ -0,0 +1,91 @@
+import time
+from collections import Counter
+from storage.database import get_connection
+from utils.timing import percentile
+
+# Spans recorded during audits (utils/timing.py), one row each, for `main.py stats`.
+
+def save_timings(audit_id, lead_id, spans, conn=None):
+    """
+    Stores an audit's spans. Pass `conn` to write in the caller's transaction
+    (the caller commits); otherwise a connection is opened and committed here.
+    """
+    now = time.time()
+    rows = [
+        (audit_id, lead_id, s.name, s.kind, s.detail, round(s.start * 1000, 2), round(s.duration * 1000, 2),
+         s.bytes, s.error, now)
+        for s in spans
+    ]
+    own = conn is None
+    conn = conn or get_connection()
+    try:
+        conn.executemany('''
+            INSERT INTO audit_timings (audit_id, lead_id, name, kind, detail, start_ms, duration_ms, bytes, error, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        if own:
+            conn.commit()
+    finally:
+        if own:
+            conn.close()
+
+def get_timings(audit_id):
+    """Spans of one audit in the order they started."""
+    conn = get_connection()
+    try:
+        rows = conn.execute("SELECT * FROM audit_timings WHERE audit_id = ? ORDER BY start_ms, id", (audit_id,))
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def timing_stats(since_hours=None, kind=None):
+    """
+    Aggregates recorded spans by kind and name, slowest total first.
+
+    Args:
+        since_hours (float): Only spans recorded in the last N hours.
+        kind (str): Only spans of this kind ("analyzer", "http", "ai", ...).
+
+    Returns:
+        list: Dicts with kind, name, count, p50_ms, p95_ms, max_ms, total_s,
+            avg_kb, errors and top_errors ([(error, count)], most common first).
+    """
+    query = "SELECT kind, name, duration_ms, bytes, error FROM audit_timings WHERE 1 = 1"
+    params = []
+    if since_hours:
+        query += " AND created_at >= ?"
+        params.append(time.time() - since_hours * 3600)
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+
+    groups = {}
+    conn = get_connection()
+    try:
+        for row in conn.execute(query, params):
+            group = groups.setdefault((row['kind'], row['name']), {"durations": [], "bytes": [], "errors": Counter()})
+            group["durations"].append(row['duration_ms'])
+            if row['bytes'] is not None:
+                group["bytes"].append(row['bytes'])
+            if row['error']:
+                group["errors"][row['error']] += 1
+    finally:
+        conn.close()
+
+    stats = []
+    for (span_kind, name), group in groups.items():
+        durations = group["durations"]
+        stats.append({
+            "kind": span_kind,
+            "name": name,
+            "count": len(durations),
+            "p50_ms": percentile(durations, 50),
+            "p95_ms": percentile(durations, 95),
+            "max_ms": max(durations),
+            "total_s": sum(durations) / 1000,
+            "avg_kb": sum(group["bytes"]) / len(group["bytes"]) / 1024 if group["bytes"] else None,
+            "errors": sum(group["errors"].values()),
+            "top_errors": group["errors"].most_common(3),
+        })
+    stats.sort(key=lambda s: s["total_s"], reverse=True)
+    return stats
@@ -0,0 +1,70 @@
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+from analysis.asset_inventory import AssetInventory
+from ai.score_calculator import format_page_weight
+from benchmarks.site_farm import SiteFarm, build_corpus
+
+def test_collect_assets():
+    print("Testing subresource collection...")
+    html = """<html><head><base href="https://cdn.test/site/">
+        <link rel="stylesheet" href="style.css"><link rel="preload" as="font" href="/f/a.woff2">
+        <link rel="icon" href="favicon.ico"><script src="https://code.jquery.test/jquery.js"></script>
+        <style>@font-face { src: url('fonts/b.woff2'); } body { background: url(data:image/png;base64,AAA) }</style>
+        </head><body><img src="logo.png"><img src="logo.png#dup"><picture><source srcset="hero.webp 1x, hero2.webp 2x"></picture>
+        <video poster="poster.jpg" src="intro.mp4"></video><script>inline()</script></body></html>"""
+    assets = AssetInventory().collect("https://example.test/", html)
+    assert assets == [
+        ("https://code.jquery.test/jquery.js", "script"),
+        ("https://cdn.test/site/style.css", "stylesheet"),
+        ("https://cdn.test/f/a.woff2", "font"),
+        ("https://cdn.test/site/favicon.ico", "image"),
+        ("https://cdn.test/site/logo.png", "image"),
+        ("https://cdn.test/site/hero.webp", "image"),
+        ("https://cdn.test/site/intro.mp4", "media"),
+        ("https://cdn.test/site/poster.jpg", "image"),
+        ("https://cdn.test/site/fonts/b.woff2", "font"),
+    ], assets
+
+def test_measure_with_cache():
+    print("Testing asset sizing and the cross-site asset cache...")
+    site = build_corpus(1, seed=5)[0]
+    farm = SiteFarm([site]).start()
+    base = farm.url(site)
+    html = (f'<html><head><script src="{base}app.js"></script>'
+            f'<style>@font-face {{ src: url("{base}missing.woff2") }}</style></head>'
+            f'<body><img src="{base}img/1.png"><img src="{base}img/2.png"></body></html>')
+    original_db = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        try:
+            database.init_db()
+            inventory = AssetInventory()
+            first = inventory.measure(base, html, document_kb=1)
+            assert first["count"] == 4 and first["sized"] == 3 and first["cached"] == 0
+            assert first["by_kind"]["image"] == {"count": 2, "kb": round(2 * 520 / 1024, 2)}
+            assert abs(first["page_weight_kb"] - (1 + first["total_kb"])) < 0.01
+
+            # Another lead using the same assets is served from the cache; only the unsized one is retried
+            requests_before = farm.requests
+            second = inventory.measure(base, html, document_kb=1)
+            assert second["cached"] == 3 and second["total_kb"] == first["total_kb"]
+            assert farm.requests - requests_before == 2  # HEAD, then ranged GET, of the missing font
+
+            assert format_page_weight(second, detail=False) == "2 KB (4 files)"
+        finally:
+            database.DB_PATH = original_db
+            farm.stop()
+
+if __name__ == "__main__":
+    try:
+        test_collect_assets()
+        test_measure_with_cache()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,67 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+import pipeline.audit as audit
+from ai.score_calculator import ScoreCalculator
+from storage.timings import get_timings
+from benchmarks.site_farm import SiteFarm, build_corpus
+
+def test_score_tiers():
+    print("Testing tiered scores...")
+    calc = ScoreCalculator()
+    p, s, u, m, l = {"score": 80}, {"score": 80}, {"score": 80}, {"score": 80}, {"score": 100}
+    deep = calc.score(p, s, u, m, l)
+    assert deep["overall_score"] == 82 and deep["tier"] == "deep"
+
+    # Quick scores are rescaled to the categories that were measured
+    quick = calc.score(p, s, {"score": 10})
+    assert quick["tier"] == "quick" and abs(sum(quick["weights"].values()) - 1) < 0.01
+    assert quick["overall_score"] == 60 and calc.opportunity(p, s, {"score": 10}) == 40
+    assert calc.get_priority_list(p, s, u) == []
+
+def test_audit_tiers():
+    print("Testing quick, deep and auto audits...")
+    corpus = [site for site in build_corpus(6, seed=2) if site["kind"] == "small"][:1]
+    farm = SiteFarm(corpus).start()
+    original_db, original_threshold = database.DB_PATH, audit.DEEP_AUDIT_MIN_OPPORTUNITY
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        try:
+            database.init_db()
+            lead_id = database.insert_lead({"business_name": "Tiered", "website": farm.url(corpus[0])})
+
+            audit_id = asyncio.run(audit.run_analysis(lead_id, with_ai=False, tier="quick"))
+            quick = database.get_latest_audit(lead_id)
+            assert quick["tier"] == "quick" and quick["mobile_score"] is None and "mobile" not in quick
+            # One fetch of the page serves every static analyzer
+            spans = get_timings(audit_id)
+            assert [s["name"] for s in spans if s["kind"] == "analyzer"] == ["Performance", "SEO", "UX"]
+            assert len([s for s in spans if s["kind"] == "http"]) == 1
+
+            # "auto" only goes deep when the quick score leaves enough room for improvement
+            audit.DEEP_AUDIT_MIN_OPPORTUNITY = 101
+            asyncio.run(audit.run_analysis(lead_id, with_ai=False, tier="auto"))
+            assert database.get_latest_audit(lead_id)["tier"] == "quick"
+
+            audit.DEEP_AUDIT_MIN_OPPORTUNITY = 0
+            asyncio.run(audit.run_analysis(lead_id, with_ai=False, tier="auto"))
+            deep = database.get_latest_audit(lead_id)
+            assert deep["tier"] == "deep" and "mobile" in deep and "links" in deep
+        finally:
+            database.DB_PATH = original_db
+            audit.DEEP_AUDIT_MIN_OPPORTUNITY = original_threshold
+            farm.stop()
+
+if __name__ == "__main__":
+    try:
+        test_score_tiers()
+        test_audit_tiers()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,40 @@
+import sys
+import os
+import threading
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from pipeline.background import BackgroundExecutor
+
+def test_background_jobs():
+    print("Testing BackgroundExecutor...")
+    executor = BackgroundExecutor(max_workers=2)
+    release = threading.Event()
+
+    def slow(job, value):
+        job.update("Working", 0.5)
+        release.wait(5)
+        return value * 2
+
+    def broken(job):
+        raise RuntimeError("boom")
+
+    job = executor.submit("slow", slow, 21)
+    failing = executor.submit("broken", broken)
+    failing.future.result(5)
+    assert failing.status == "failed" and "boom" in failing.error
+
+    # submit() returns immediately; state is visible while the job runs
+    assert not job.finished and job in executor.active_jobs()
+    release.set()
+    job.future.result(5)
+    assert job.status == "done" and job.result == 42 and job.progress == 1.0
+    assert executor.get(job.id) is job
+
+if __name__ == "__main__":
+    try:
+        test_background_jobs()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
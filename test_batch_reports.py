@@ -0,0 +1,65 @@
+import sys
+import os
+import json
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+import pipeline.report as report
+import storage.report_cache as report_cache
+
+def add_audit(lead_id):
+    conn = database.get_connection()
+    conn.execute(
+        "INSERT INTO audits (lead_id, performance_score, seo_score, ux_score, mobile_score, overall_score, audit_data) VALUES (?, 80, 70, 60, 50, 65, ?)",
+        (lead_id, json.dumps({"priorities": [{"priority": "High", "category": "SEO", "issue": "Missing title"}]}))
+    )
+    conn.commit()
+    conn.close()
+
+def add_audited_lead(i, category):
+    lead_id = database.insert_lead({"business_name": f"Biz {i}", "category": category, "website": f"http://biz{i}.com"})
+    add_audit(lead_id)
+    return lead_id
+
+def test_batch_reports():
+    print("Testing batch report generation...")
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        report.REPORT_OUTPUT_DIR = os.path.join(tmp, "reports")
+        report_cache.REPORT_CACHE_DIR = os.path.join(tmp, "cache")
+        database.init_db()
+        dentists = [add_audited_lead(i, "Dentist") for i in range(3)]
+        gym = add_audited_lead(3, "Gym")
+        database.insert_lead({"business_name": "Not audited", "category": "Dentist"})
+
+        merged = os.path.join(tmp, "campaign.pdf")
+        summary = report.generate_reports(campaign="dentist", workers=2, merged_path=merged)
+        assert sorted(summary["rendered"]) == dentists and not summary["failed"]
+        assert all(os.path.exists(report.report_path(lead_id)) for lead_id in dentists)
+        assert not os.path.exists(report.report_path(gym))
+
+        # One merged PDF with a page per lead
+        assert summary["merged"] == merged
+        with open(merged, "rb") as f:
+            assert f.read().count(b"/Type /Page\n") >= 3
+
+        # Reports of the latest audit are skipped unless forced
+        again = report.generate_reports(campaign="Dentist", workers=2)
+        assert sorted(again["skipped"]) == dentists and not again["rendered"]
+
+        # A re-audit within the same second as the report is still picked up
+        add_audit(dentists[0])
+        again = report.generate_reports(campaign="Dentist", workers=2)
+        assert again["rendered"] == [dentists[0]]
+        forced = report.generate_reports(lead_ids=[gym], force=True, workers=1)
+        assert forced["rendered"] == [gym]
+
+if __name__ == "__main__":
+    try:
+        test_batch_reports()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
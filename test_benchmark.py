@@ -0,0 +1,73 @@
+import sys
+import os
+import requests
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from benchmarks.site_farm import SiteFarm, build_corpus, SITE_KINDS
+from benchmarks.gemini_stub import GeminiStub
+from benchmarks.run import compare, merge_runs
+from ai.ai_analyzer import AIAuditAnalyzer
+
+def test_site_farm():
+    print("Testing benchmark site farm...")
+    corpus = build_corpus(len(SITE_KINDS), seed=1)
+    assert corpus == build_corpus(len(SITE_KINDS), seed=1)
+    farm = SiteFarm(corpus).start()
+    try:
+        sites = {site["kind"]: site for site in corpus}
+        large = requests.get(farm.url(sites["large"]), timeout=5)
+        assert large.status_code == 200 and len(large.content) > 1000 * 1024
+
+        redirect = requests.get(farm.url(sites["redirect"]), timeout=5)
+        assert redirect.status_code == 200 and len(redirect.history) == 3
+
+        broken = f"{farm.url(sites['broken'])}page/"
+        assert requests.head(broken + "0", timeout=5).status_code == 200
+        assert requests.head(broken + "1", timeout=5).status_code == 404
+
+        spa = requests.get(farm.url(sites["spa"]), timeout=5).text
+        assert '<div id="root"></div>' in spa and "<h1>" not in spa
+    finally:
+        farm.stop()
+
+def test_gemini_stub():
+    print("Testing Gemini stub...")
+    stub = GeminiStub(latency=0).start()
+    try:
+        analyzer = AIAuditAnalyzer(api_key="test")
+        analyzer.api_url = f"{stub.base_url}/v1beta/models/test:generateContent?key=test"
+        review = analyzer.analyze("http://example.test", html_content="<h1>Hello</h1>")
+        assert review["cta"]["score"] == 5 and stub.requests == 1
+    finally:
+        stub.stop()
+
+def test_baseline_compare():
+    print("Testing benchmark baseline comparison...")
+    baseline = {"audits_per_sec": 2.0, "emails_per_sec": 50.0, "peak_rss_mb": 100.0,
+                "timings": {"SEO": {"n": 10, "p50": 0.1, "p95": 0.5}, "report": {"n": 10, "p50": 0.01, "p95": 0.02}}}
+    same = dict(baseline, timings={"SEO": {"n": 10, "p50": 0.1, "p95": 0.55}, "report": {"n": 10, "p50": 0.03, "p95": 0.06}})
+    # Within tolerance, or slower only by noise-sized amounts
+    assert compare(same, baseline, 0.25) == []
+
+    worse = dict(baseline, audits_per_sec=1.0, peak_rss_mb=200.0,
+                 timings={"SEO": {"n": 10, "p50": 0.1, "p95": 1.5}, "report": baseline["timings"]["report"]})
+    regressions = compare(worse, baseline, 0.25)
+    assert len(regressions) == 3 and any(r.startswith("SEO p95") for r in regressions)
+
+    # A stage the baseline never measured is not silently skipped
+    added = dict(same, timings=dict(same["timings"], Assets={"n": 10, "p50": 0.1, "p95": 0.2}))
+    assert compare(added, baseline, 0.25) == ["Assets: no baseline entry, record one with --update-baseline"]
+
+    merged = merge_runs([dict(baseline, audits_per_sec=v) for v in (1.0, 3.0, 2.0)])
+    assert merged["audits_per_sec"] == 2.0 and merged["repeat"] == 3
+
+if __name__ == "__main__":
+    try:
+        test_site_farm()
+        test_gemini_stub()
+        test_baseline_compare()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
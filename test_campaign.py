@@ -0,0 +1,57 @@
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+import pipeline.campaign as campaign
+import ai.email_generator as email_generator
+from pipeline.background import BackgroundJob
+
+LEADS = [{"business_name": f"Biz {i}", "website": f"http://biz{i}.com", "email": f"info@biz{i}.com",
+          "source": "Google Maps"} for i in range(3)]
+
+async def fake_scrape_leads(source, keyword, location, total):
+    # Same results every time, as a scrape cache hit returns them
+    return [dict(lead) for lead in LEADS[:total]]
+
+class FakeGenerator:
+    def generate(self, lead, audit_data, template):
+        return f"Hi {lead['business_name']}"
+
+def test_repeated_campaign():
+    print("Testing that a repeated campaign reuses its leads...")
+    audited = []
+
+    async def fake_run_analysis(lead_id):
+        audited.append(lead_id)
+        return lead_id
+
+    originals = (database.DB_PATH, campaign.scrape_leads, campaign.run_analysis, email_generator.EmailGenerator)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        campaign.scrape_leads, campaign.run_analysis = fake_scrape_leads, fake_run_analysis
+        email_generator.EmailGenerator = FakeGenerator
+        try:
+            database.init_db()
+            run = lambda: campaign.run_outreach_campaign(BackgroundJob("c", "Campaign"), "maps", "Dentist", "Delhi",
+                                                         3, True, "{Business}", send=True)
+            assert run() == 3 and len(audited) == 3
+
+            # Served from the cache again: no new rows, and nobody is audited or emailed twice
+            assert run() == 0 and len(audited) == 3
+            conn = database.get_connection()
+            assert conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0] == 3
+            assert conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0] == 3
+            conn.close()
+        finally:
+            database.DB_PATH, campaign.scrape_leads, campaign.run_analysis, email_generator.EmailGenerator = originals
+
+if __name__ == "__main__":
+    try:
+        test_repeated_campaign()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,83 @@
+import sys
+import os
+import asyncio
+import socket
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from pipeline.daemon import AuditDaemon
+from utils.daemon_client import DaemonClient, DaemonError
+from config import DAEMON_USE_UNIX_SOCKET
+from main import via_daemon
+
+def test_daemon_protocol():
+    print("Testing audit daemon protocol...")
+    if not DAEMON_USE_UNIX_SOCKET:
+        print("Unix sockets not available, skipping.")
+        return
+    socket_path = os.path.join(tempfile.mkdtemp(), "auditor.sock")
+    daemon = AuditDaemon(socket_path=socket_path)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def start():
+        # Only the protocol is under test: no browser pool
+        server = await asyncio.start_unix_server(daemon._handle, path=socket_path)
+        ready.set()
+        return server
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(start(), loop).result(5)
+    ready.wait(5)
+
+    try:
+        client = DaemonClient(socket_path=socket_path, timeout=5)
+        assert client.is_running()
+        status = client.call("ping")
+        assert status["pid"] == os.getpid() and status["audits_running"] == 0
+
+        try:
+            client.call("explode")
+            assert False, "unknown method should fail"
+        except DaemonError as e:
+            assert "Unknown method" in str(e)
+
+        # Nothing listening: callers fall back to running in-process
+        assert not DaemonClient(socket_path=socket_path + ".missing").is_running()
+
+        # CLI: a failed job is reported, not retried here; a daemon that went away means run in-process
+        assert via_daemon(lambda: client.call("explode"), "Audit")
+        assert not via_daemon(lambda: DaemonClient(socket_path=socket_path + ".missing").call("ping"), "Audit")
+    finally:
+        async def stop():
+            server.close()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(stop(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+def test_daemon_timeout():
+    print("Testing a daemon that does not answer in time...")
+
+    def slow():
+        raise socket.timeout("timed out")
+
+    # The job may still finish in the daemon, so it is not run again in-process
+    assert via_daemon(slow, "Report")
+
+if __name__ == "__main__":
+    try:
+        test_daemon_protocol()
+        test_daemon_timeout()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
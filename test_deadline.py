@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+import pipeline.audit as audit
+from ai.score_calculator import ScoreCalculator, format_score
+from utils.deadline import Deadline, DeadlineExceeded, clamp_timeout
+from benchmarks.site_farm import SiteFarm, build_corpus
+
+def test_deadline_budget():
+    print("Testing deadline shares and timeout clamping...")
+    deadline = Deadline(10)
+    assert 4.9 < deadline.share(1, 2) <= 5
+    assert 9.9 < deadline.share(3, 2) <= 10
+
+    # Without an active deadline timeouts pass through unchanged
+    assert clamp_timeout(30) == 30 and clamp_timeout(None) is None
+    with deadline.activate():
+        assert clamp_timeout(5) == 5
+        assert 9.9 < clamp_timeout(None) <= 10
+        assert clamp_timeout((3, 30))[0] == 3 and clamp_timeout((3, 30))[1] <= 10
+
+    expired = Deadline(0.01)
+    time.sleep(0.02)
+    with expired.activate():
+        try:
+            clamp_timeout(5)
+            assert False, "expected DeadlineExceeded"
+        except DeadlineExceeded:
+            pass
+
+def test_step_deadline():
+    print("Testing that an abandoned step stops at its own deadline...")
+    stopped = []
+
+    def work():
+        try:
+            while True:
+                clamp_timeout(1)  # as every request through the shared session does
+                time.sleep(0.01)
+        except DeadlineExceeded:
+            stopped.append(time.perf_counter())
+            raise
+
+    async def run():
+        deadline = Deadline(30)
+        with deadline.activate():
+            # A share of about 0.1s of the 30s audit
+            pending = audit.STEP_WEIGHTS["SEO"] * 300
+            return await audit._run_step("SEO", lambda: asyncio.to_thread(work), deadline, pending)
+
+    started = time.perf_counter()
+    assert asyncio.run(run())["status"] == audit.TIMED_OUT
+    assert stopped and stopped[0] - started < 1
+
+def test_unmeasured_scores():
+    print("Testing scores with unmeasured categories...")
+    calc = ScoreCalculator()
+    timed_out = {"score": None, "status": "timed_out", "issues": []}
+    score = calc.score({"score": 80}, {"score": 80}, timed_out, timed_out, {"score": 80})
+    assert score["overall_score"] == 80 and score["unmeasured"] == ["ux", "mobile"]
+    assert format_score(None) == "not measured" and format_score(75) == "75/100"
+
+    # SEO and UX of a page that could not be fetched are marked as failed, not scored 0
+    failed = asyncio.run(audit._parse_page(None, "http://example.test", None))
+    assert failed["status"] == audit.FAILED and failed["score"] is None
+    score = calc.score({"score": 80}, failed, failed, {"score": 60}, {"score": 80})
+    assert score["unmeasured"] == ["seo", "ux"] and 60 <= score["overall_score"] <= 80
+
+def test_audit_deadline():
+    print("Testing an audit that runs out of time...")
+    corpus = [site for site in build_corpus(6, seed=3) if site["kind"] == "slow"][:1]
+    farm = SiteFarm(corpus).start()
+    original_db = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        try:
+            database.init_db()
+            lead_id = database.insert_lead({"business_name": "Slow", "website": farm.url(corpus[0])})
+
+            started = time.perf_counter()
+            audit_id = asyncio.run(audit.run_analysis(lead_id, with_ai=False, tier="quick", deadline=0.2))
+            assert audit_id is not None and time.perf_counter() - started < 2
+
+            # Saved partially: the steps are marked instead of given made-up scores
+            saved = database.get_latest_audit(lead_id)
+            assert saved["timed_out"] == ["Performance", "SEO", "UX"]
+            assert saved["performance_score"] is None and saved["seo_score"] is None
+            assert saved["performance"]["status"] == audit.TIMED_OUT
+        finally:
+            database.DB_PATH = original_db
+            farm.stop()
+
+if __name__ == "__main__":
+    try:
+        test_deadline_budget()
+        test_step_deadline()
+        test_unmeasured_scores()
+        test_audit_deadline()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,90 @@
+import sys
+import os
+import threading
+import socket
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import scraper.email_extractor as email_extractor
+from scraper.email_extractor import EmailExtractor
+
+PAGES = {
+    "/": b'<html><body><a href="/contact-us">Contact</a><img src="logo@2x.png"></body></html>',
+    "/contact-us": b'<html><body><p>Write to <a href="mailto:hello@127.0.0.1.test">us</a></p></body></html>',
+}
+
+class SiteHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        SiteHandler.hits.append(self.path)
+        body = PAGES.get(self.path)
+        self.send_response(200 if body else 404)
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+    def log_message(self, *args):
+        pass
+
+def test_scan_raw_bytes():
+    print("Testing EmailExtractor._scan...")
+    extractor = EmailExtractor()
+    email, confident = extractor._scan(b'<p>info&#64;acme.com or sales@other.org</p>', "www.acme.com")
+    # The site's own (entity-encoded) address beats a plain off-site one
+    assert email == "info@acme.com" and confident
+    email, confident = extractor._scan(b'<p>sales@other.org</p>', "www.acme.com")
+    assert email == "sales@other.org" and not confident
+    email, confident = extractor._scan(b'<p>info&#64;acme.com</p>', "www.acme.com")
+    assert email == "info@acme.com" and confident
+    email, confident = extractor._scan(b'<img src="hero@2x.png">', "acme.com")
+    assert email is None
+
+def test_contact_page_discovery():
+    print("Testing contact page discovery...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/"
+        extractor = EmailExtractor(budget=2, timeout=2)
+        assert extractor.extract(url) == "hello@127.0.0.1.test"
+
+        # Second lookup for the same domain is served from the cache
+        hits = len(SiteHandler.hits)
+        assert EmailExtractor().extract(url) == "hello@127.0.0.1.test"
+        assert len(SiteHandler.hits) == hits
+    finally:
+        server.shutdown()
+
+def test_miss_cache():
+    print("Testing that misses expire and the cache stays bounded...")
+    # A port nothing listens on: the homepage fetch fails
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    original = email_extractor.EMAIL_CACHE_MAX_DOMAINS
+    email_extractor.EMAIL_CACHE_MAX_DOMAINS = 2
+    try:
+        extractor = EmailExtractor(budget=0, timeout=1)
+        assert extractor.extract(f"http://127.0.0.1:{port}/") is None
+        # Cached only briefly, so a site that was down is retried soon
+        _, expires = EmailExtractor._domain_cache[f"127.0.0.1:{port}"]
+        assert expires - time.monotonic() <= email_extractor.EMAIL_MISS_TTL
+
+        for other in ("a.invalid", "b.invalid"):
+            extractor.extract(f"http://{other}/")
+        assert len(EmailExtractor._domain_cache) == 2 and f"127.0.0.1:{port}" not in EmailExtractor._domain_cache
+    finally:
+        email_extractor.EMAIL_CACHE_MAX_DOMAINS = original
+
+if __name__ == "__main__":
+    try:
+        test_scan_raw_bytes()
+        test_contact_page_discovery()
+        test_miss_cache()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,85 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from utils.email_sender import EmailSender, UNCONFIRMED
+from benchmarks.smtp_sink import SMTPSink
+
+def start_stub():
+    return SMTPSink().start()
+
+def make_sender(server, **kwargs):
+    kwargs.setdefault("rate_per_minute", 0)
+    return EmailSender("127.0.0.1", server.server_address[1], "user@example.com", "secret", use_tls=False, **kwargs)
+
+def test_persistent_connection():
+    print("Testing pooled SMTP sending...")
+    server = start_stub()
+    try:
+        with make_sender(server) as sender:
+            results = sender.send_batch([(f"lead{i}@example.com", "Hi", f"Body {i}") for i in range(5)])
+            assert results == [(True, "Email sent successfully.")] * 5
+            assert sender.send_email("one@example.com", "Hi", "Body")[0]
+            assert sender.connections_opened == 1 and len(server.messages) == 6
+
+            # A refused address fails alone and keeps the connection
+            ok, msg = sender.send_email("bad@example.com", "Hi", "Body")
+            assert not ok and "550" in msg
+            assert sender.send_email("two@example.com", "Hi", "Body")[0]
+            assert sender.connections_opened == 1
+
+            # Server drops the connection: the next send reconnects and succeeds
+            server.drop_connections()
+            time.sleep(0.1)
+            assert sender.send_email("three@example.com", "Hi", "Body")[0]
+            assert sender.connections_opened == 2
+
+            # Async variant for the pipeline
+            ok, _ = asyncio.run(sender.send_email_async("four@example.com", "Hi", "Body"))
+            assert ok and len(server.messages) == 9
+
+            # Dropped after DATA: the server may have the message, so it fails rather than being sent twice
+            server.drop_after_data = 1
+            ok, msg = sender.send_email("five@example.com", "Hi", "Body")
+            assert not ok and msg.startswith(UNCONFIRMED) and len(server.messages) == 10
+            assert sender.send_email("six@example.com", "Hi", "Body")[0]
+            assert len(server.messages) == 11
+
+            # Refused after DATA (final reply 554): reported as failed, not sent
+            server.reject_data = b"Cheap pills"
+            ok, msg = sender.send_email("seven@example.com", "Hi", "Cheap pills")
+            assert not ok and "554" in msg and len(server.messages) == 11
+            assert sender.send_email("eight@example.com", "Hi", "Body")[0]
+    finally:
+        server.stop()
+
+def test_recycle_and_rate_limit():
+    print("Testing SMTP connection recycling and rate limit...")
+    server = start_stub()
+    try:
+        with make_sender(server, max_per_connection=2) as sender:
+            assert all(ok for ok, _ in sender.send_batch([(f"l{i}@example.com", "Hi", "Body") for i in range(5)]))
+            assert sender.connections_opened == 3
+
+        with make_sender(server, rate_per_minute=600) as sender:
+            start = time.monotonic()
+            sender.send_batch([(f"r{i}@example.com", "Hi", "Body") for i in range(3)])
+            assert time.monotonic() - start >= 0.2  # 0.1 s between messages
+
+        # Without credentials nothing is attempted
+        assert EmailSender("127.0.0.1", server.server_address[1], "", "").send_email("x@example.com", "Hi", "B") == \
+            (False, "SMTP credentials not configured.")
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    try:
+        test_persistent_connection()
+        test_recycle_and_rate_limit()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
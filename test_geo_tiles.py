@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from scraper.geo_tiles import grid_tiles, parse_bbox, tile_url
+
+def test_grid_tiles():
+    print("Testing grid_tiles...")
+    tiles = grid_tiles((28.4, 76.8, 28.9, 77.4), 2)
+    # Row by row from the south-west corner; 0.3 degrees of longitude per cell frames at zoom 12
+    assert tiles == [(28.525, 76.95, 12), (28.525, 77.25, 12), (28.775, 76.95, 12), (28.775, 77.25, 12)], tiles
+    assert len(grid_tiles((28.4, 76.8, 28.9, 77.4), 5)) == 25
+    # Zoom stays within the levels Maps serves useful listings at
+    assert grid_tiles((0, 0, 0.001, 0.001), 1)[0][2] == 18
+    assert grid_tiles((-60, -170, 70, 170), 1)[0][2] == 10
+    for grid in (0, -2):
+        try:
+            grid_tiles((28.4, 76.8, 28.9, 77.4), grid)
+            assert False, f"grid {grid} should be rejected"
+        except ValueError:
+            pass
+
+def test_parse_bbox():
+    print("Testing parse_bbox...")
+    assert parse_bbox("28.4, 76.8,28.9,77.4") == (28.4, 76.8, 28.9, 77.4)
+    for text in ["28.4,76.8,28.9", "a,b,c,d", "28.9,76.8,28.4,77.4", "28.4,77.4,28.9,76.8",
+                 "28.4,76.8,28.4,77.4", "-95,76.8,28.9,77.4", "28.4,76.8,28.9,181"]:
+        try:
+            parse_bbox(text)
+        except ValueError as e:
+            assert str(e)
+        else:
+            assert False, f"{text} should be rejected"
+
+def test_tile_url():
+    print("Testing tile_url...")
+    assert tile_url("dentist clinic", "Delhi", (28.5, 76.95, 12)) == \
+        "https://www.google.com/maps/search/dentist+clinic/@28.5,76.95,12z"
+    assert tile_url("dentist", "Delhi", "Saket") == "https://www.google.com/maps/search/dentist+in+Saket%2C+Delhi"
+
+if __name__ == "__main__":
+    try:
+        test_grid_tiles()
+        test_parse_bbox()
+        test_tile_url()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import utils.host_health as host_health
+from utils.host_health import HostTracker, HostUnavailable, get_host_tracker
+from analysis.broken_links_checker import BrokenLinksChecker
+from utils.http import get_session
+
+class HangingLinks(BaseHTTPRequestHandler):
+    """Home page with ten internal links whose HEAD requests hang."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = "".join(f'<a href="/page/{i}">Page {i}</a>' for i in range(10)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        time.sleep(2)
+
+def test_breaker_and_timeouts():
+    print("Testing host breaker and adaptive timeouts...")
+    tracker = HostTracker()
+    assert tracker.timeout_for("a.test", 15) == 15
+
+    for latency in (0.2, 0.3, 0.25):
+        tracker.record_success("a.test", latency)
+    # Fast host: timeouts adapt down to the floor, tuples included
+    assert tracker.timeout_for("a.test", 15) == host_health.HOST_TIMEOUT_MIN
+    assert tracker.timeout_for("a.test", (1, 15)) == (1, host_health.HOST_TIMEOUT_MIN)
+
+    for _ in range(host_health.HOST_BREAKER_FAILURES):
+        tracker.acquire("a.test")
+        tracker.record_failure("a.test")
+    try:
+        tracker.acquire("a.test")
+        assert False, "expected HostUnavailable"
+    except HostUnavailable:
+        pass
+    assert tracker.open_count() == 1 and tracker.health("a.test")["error_rate"] > 0
+
+    # After the cooldown one probe goes through; its success closes the breaker
+    original = host_health.HOST_BREAKER_COOLDOWN
+    host_health.HOST_BREAKER_COOLDOWN = 0
+    try:
+        tracker.acquire("a.test")
+        tracker.record_success("a.test", 0.2)
+        assert tracker.open_count() == 0
+    finally:
+        host_health.HOST_BREAKER_COOLDOWN = original
+
+def test_slow_host_fails_fast():
+    print("Testing that a hanging host costs one short timeout per breaker trip...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), HangingLinks)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    original = host_health.HOST_TIMEOUT_MIN
+    host_health.HOST_TIMEOUT_MIN = 0.3
+    get_host_tracker().reset()
+    try:
+        # Known-fast host: its HEADs get a timeout near its observed latency, not 5 s
+        for _ in range(3):
+            get_session().get(url, timeout=5)
+        started = time.perf_counter()
+        result = BrokenLinksChecker().check(url)
+        elapsed = time.perf_counter() - started
+
+        assert result["count"] == host_health.HOST_BREAKER_FAILURES
+        assert result["unchecked"] == 10 - host_health.HOST_BREAKER_FAILURES
+        assert elapsed < 2, elapsed
+    finally:
+        host_health.HOST_TIMEOUT_MIN = original
+        get_host_tracker().reset()
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    try:
+        test_breaker_and_timeouts()
+        test_slow_host_fails_fast()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,70 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+from storage import job_queue
+from pipeline import worker
+from pipeline.stages import HANDLERS
+
+def use_temp_db(tmp):
+    database.DB_PATH = os.path.join(tmp, "leads.db")
+    database.init_db()
+
+def test_lease_retry_and_dead_letter():
+    print("Testing job queue leases and retries...")
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_db(tmp)
+        job_id = job_queue.enqueue("audit", {"lead_id": 1}, max_attempts=2)
+
+        jobs = job_queue.lease("audit", "w1")
+        assert [j['id'] for j in jobs] == [job_id]
+        # A leased job is invisible to other workers
+        assert job_queue.lease("audit", "w2") == []
+
+        assert job_queue.fail(job_id, "w1", "boom") == "retry"
+        job = job_queue.get_job(job_id)
+        assert job['status'] == "queued" and job['run_after'] > job['updated_at']
+
+        # Expired lease: a crashed worker's job is picked up again
+        database.get_connection().execute("UPDATE jobs SET run_after = 0").connection.commit()
+        jobs = job_queue.lease("audit", "w2", lease_seconds=-1)
+        assert jobs[0]['attempts'] == 2
+        assert job_queue.fail(job_id, "w2", "boom again") == "dead"
+        assert job_queue.queue_stats()["audit"]["dead"] == 1
+
+        assert job_queue.retry_dead("audit") == 1
+        assert job_queue.get_job(job_id)['status'] == "queued"
+
+def test_worker_drains_stage():
+    print("Testing worker...")
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_db(tmp)
+        seen = []
+
+        async def fake_audit(payload):
+            seen.append(payload['lead_id'])
+
+        original = HANDLERS["audit"]
+        HANDLERS["audit"] = fake_audit
+        try:
+            for lead_id in range(5):
+                job_queue.enqueue("audit", {"lead_id": lead_id})
+            asyncio.run(worker.run_worker("audit", concurrency=3, poll_interval=0.05, once=True))
+        finally:
+            HANDLERS["audit"] = original
+
+        assert sorted(seen) == list(range(5))
+        assert job_queue.queue_stats()["audit"]["done"] == 5
+
+if __name__ == "__main__":
+    try:
+        test_lease_retry_and_dead_letter()
+        test_worker_drains_stage()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,81 @@
+import sys
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from scraper.justdial_scraper import JustDialScraper
+from storage.scrape_cache import lead_key
+
+def card(i):
+    return (f'<div class="resultbox"><a class="resultbox_title_anchor">Biz {i}</a>'
+            f'<span class="contact-info">555-010{i}</span><a class="website_icon" href="http://biz{i}.com"></a></div>')
+
+# Listing pages of /delhi/dentist; page 2 repeats Biz 0, page 4 is the (empty) end
+PAGES = {
+    "/delhi/dentist": [0, 1, 2],
+    "/delhi/dentist/page-2": [3, 4, 5, 0],
+    "/delhi/dentist/page-3": [6, 7, 8],
+    "/delhi/dentist/page-4": [],
+}
+
+class ListingHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        ListingHandler.hits.append(self.path)
+        cards = PAGES.get(self.path)
+        # Page 2 fails on the first request only
+        if cards is None or (self.path.endswith("page-2") and ListingHandler.hits.count(self.path) == 1):
+            self.send_response(503)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(("<html><body>" + "".join(card(i) for i in cards) + "</body></html>").encode())
+
+    def log_message(self, *args):
+        pass
+
+def test_paginated_crawl():
+    print("Testing JustDial pagination, retries and lead streaming...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        scraper = JustDialScraper(concurrency=2, page_delay=0, max_pages=10)
+        scraper.base_url = f"http://127.0.0.1:{server.server_port}"
+        streamed = []
+
+        def on_lead(lead):
+            streamed.append(lead["business_name"])
+            if lead["business_name"] == "Biz 4":
+                raise ValueError("storage failed")
+
+        skip = {lead_key({"business_name": "Biz 1", "website": "http://biz1.com"})}
+        results = scraper.scrape("dentist", "delhi", total=100, on_lead=on_lead, skip=skip)
+
+        # The failed page is retried; a callback error loses only the rest of its page;
+        # the empty page ends the crawl
+        names = [lead["business_name"] for lead in results]
+        assert sorted(names) == ["Biz 0", "Biz 2", "Biz 3", "Biz 4", "Biz 6", "Biz 7", "Biz 8"], names
+        assert sorted(streamed) == sorted(names)
+        assert ListingHandler.hits.count("/delhi/dentist/page-2") == 2
+
+        # Stops as soon as `total` unique leads are collected
+        ListingHandler.hits = []
+        streamed = []
+        results = scraper.scrape("dentist", "delhi", total=2, on_lead=streamed.append)
+        assert len(results) == 2 and len(streamed) == 2
+        assert "/delhi/dentist/page-3" not in ListingHandler.hits
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    try:
+        test_paginated_crawl()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,61 @@
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+
+def test_query_leads_and_version():
+    print("Testing paginated lead queries...")
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        database.init_db()
+        version = database.get_leads_version()
+
+        ids = []
+        for i in range(30):
+            ids.append(database.insert_lead({
+                "business_name": f"Biz {i:02d}",
+                "category": "Dentist" if i % 2 else "Gym",
+                "email": f"biz{i}@example.com" if i % 3 else "N/A",
+                "website": f"http://biz{i}.com"
+            }))
+        assert database.get_leads_version() > version
+
+        page, total = database.query_leads(limit=10, offset=10, sort="business_name", descending=False)
+        assert total == 30 and [l["business_name"] for l in page] == [f"Biz {i:02d}" for i in range(10, 20)]
+
+        dentists, total = database.query_leads(category="Dentist", has_email=True, limit=100)
+        assert total == len(dentists) == 10
+        assert all(l["category"] == "Dentist" and l["email"] != "N/A" for l in dentists)
+
+        found, total = database.query_leads(search="biz7.com")
+        assert total == 1 and found[0]["id"] == ids[7]
+        assert database.get_lead_categories() == ["Dentist", "Gym"]
+
+        try:
+            database.query_leads(sort="id; DROP TABLE leads")
+            assert False, "unknown sort column should be rejected"
+        except ValueError:
+            pass
+
+        # Bulk writes bump the version so cached pages are refreshed
+        version = database.get_leads_version()
+        database.update_outreach_statuses(ids[:5], "Sent")
+        assert database.get_leads_version() > version
+        assert database.query_leads(status="Sent")[1] == 5
+        assert database.query_leads(status="Pending")[1] == 25
+
+        version = database.get_leads_version()
+        assert database.delete_leads(ids[:5]) == 5
+        assert database.get_leads_version() > version
+        assert database.query_leads()[1] == 25
+
+if __name__ == "__main__":
+    try:
+        test_query_leads_and_version()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
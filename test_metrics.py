@@ -0,0 +1,104 @@
+import sys
+import os
+import requests
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from utils import metrics
+from utils.metrics import Registry, Counter, Gauge, Histogram, start_metrics_server
+from utils.email_sender import EmailSender
+from utils.http import get_session
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.site_farm import SiteFarm, build_corpus
+
+def sample(text, line_start):
+    """Value of the first exposition line starting with `line_start`."""
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_exposition_format():
+    print("Testing metrics exposition format...")
+    registry = Registry()
+    sent = Counter("test_sent_total", "Sent", ["outcome"], registry=registry)
+    depth = Gauge("test_depth", "Depth", ["stage"], registry=registry)
+    latency = Histogram("test_seconds", "Latency", buckets=(0.1, 1), registry=registry)
+
+    sent.labels("ok").inc()
+    sent.labels("ok").inc(2)
+    sent.labels('a "quoted"\nvalue').inc()
+    depth.set_function(lambda: {("audit",): 4, ("ai",): 1})
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    text = registry.render()
+    assert "# TYPE test_sent_total counter" in text
+    assert 'test_sent_total{outcome="ok"} 3' in text
+    assert 'test_sent_total{outcome="a \\"quoted\\"\\nvalue"} 1' in text
+    assert 'test_depth{stage="audit"} 4' in text and 'test_depth{stage="ai"} 1' in text
+    assert 'test_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_seconds_bucket{le="1"} 2' in text
+    assert 'test_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_seconds_sum 5.55" in text and "test_seconds_count 3" in text
+
+    # A failing gauge function drops its samples instead of breaking the scrape
+    depth.set_function(lambda: 1 / 0)
+    assert "test_depth{" not in registry.render()
+
+    try:
+        sent.labels("ok", "extra")
+        assert False, "wrong label count accepted"
+    except ValueError:
+        pass
+
+def test_metrics_endpoint():
+    print("Testing /metrics endpoint...")
+    registry = Registry()
+    Counter("test_up_total", "Up", registry=registry).inc()
+    server = start_metrics_server(0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        response = requests.get(f"{url}/metrics", timeout=5)
+        assert response.status_code == 200 and "test_up_total 1" in response.text
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert requests.get(f"{url}/other", timeout=5).status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_pipeline_metrics():
+    print("Testing metrics fed by the email sender and HTTP session...")
+    sink = SMTPSink().start()
+    try:
+        before = metrics.REGISTRY.render()
+        with EmailSender("127.0.0.1", sink.port, "user@example.com", "secret", use_tls=False, rate_per_minute=0) as sender:
+            sender.send_batch([("ok@example.com", "Hi", "Body"), ("bad@example.com", "Hi", "Body")])
+        after = metrics.REGISTRY.render()
+        for outcome in ("sent", "failed"):
+            line = f'auditor_emails_total{{outcome="{outcome}"}}'
+            assert sample(after, line) == sample(before, line) + 1
+    finally:
+        sink.stop()
+
+    corpus = build_corpus(1, seed=3)
+    farm = SiteFarm(corpus).start()
+    try:
+        line = 'auditor_fetch_seconds_count{method="GET"}'
+        before = sample(metrics.REGISTRY.render(), line)
+        get_session().get(farm.url(corpus[0]), timeout=5)
+        after = metrics.REGISTRY.render()
+        assert sample(after, line) == before + 1
+        assert "auditor_http_host_pools " in after
+    finally:
+        farm.stop()
+
+if __name__ == "__main__":
+    try:
+        test_exposition_format()
+        test_metrics_endpoint()
+        test_pipeline_metrics()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,100 @@
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+from storage import outbox
+from pipeline.outbox import run_outbox_worker
+
+class FakeSender:
+    """Records sends; addresses containing 'bad' are refused, 'flaky' fail once."""
+
+    def __init__(self):
+        self.sent = []
+        self.failed_once = set()
+
+    async def send_email_async(self, to_email, subject, body):
+        if "bad" in to_email:
+            return False, "(550, b'No such user')"
+        if "flaky" in to_email and to_email not in self.failed_once:
+            self.failed_once.add(to_email)
+            return False, "Connection unexpectedly closed"
+        self.sent.append(to_email)
+        return True, "Email sent successfully."
+
+def fresh_db(tmp):
+    database.DB_PATH = os.path.join(tmp, "leads.db")
+    database.init_db()
+
+def add_lead(email):
+    return database.insert_lead({"business_name": email, "email": email, "website": "http://example.com"})
+
+def test_enqueue_and_lease():
+    print("Testing outbox idempotency, domain throttle and send windows...")
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh_db(tmp)
+        lead = add_lead("a@one.com")
+        key = outbox.outreach_key("A@one.com ", "dentists")
+        first, created = outbox.enqueue_email(lead, "a@one.com", "Hi", "Body", idempotency_key=key)
+        again, created_again = outbox.enqueue_email(lead, "a@one.com", "Hi", "Body", idempotency_key=key)
+        assert created and not created_again and first == again
+        assert database.get_lead(lead)['outreach_status'] == 'Queued'
+
+        # Same domain: one per lease batch, then throttled until the interval passes
+        outbox.enqueue_email(add_lead("b@one.com"), "b@one.com", "Hi", "Body")
+        outbox.enqueue_email(add_lead("c@two.com"), "c@two.com", "Hi", "Body")
+        leased = outbox.lease_messages("w1", limit=5, domain_interval=60)
+        assert sorted(m['domain'] for m in leased) == ["one.com", "two.com"]
+        assert outbox.lease_messages("w1", limit=5, domain_interval=60) == []
+
+        # Outside the send window the email is pushed to the next opening
+        now = datetime.now()
+        closed = f"{(now.hour + 2) % 24:02d}:00-{(now.hour + 3) % 24:02d}:00"
+        outbox.enqueue_email(add_lead("d@three.com"), "d@three.com", "Hi", "Body", window=closed)
+        assert outbox.lease_messages("w1", limit=5) == []
+        assert outbox.get_message(outbox.outreach_key("d@three.com"))['send_after'] > time.time() + 3600
+        assert outbox.outbox_stats()['due'] == 1  # b@one.com, waiting for its domain
+
+def test_worker_delivers():
+    print("Testing outbox worker delivery, retries and failures...")
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh_db(tmp)
+        leads = {email: add_lead(email) for email in ["good@a.com", "bad@b.com", "flaky@c.com"]}
+        for email, lead_id in leads.items():
+            outbox.enqueue_email(lead_id, email, "Hi", "Body")
+        good, bad = leads["good@a.com"], leads["bad@b.com"]
+
+        sender = FakeSender()
+        attempted = asyncio.run(run_outbox_worker(sender=sender, poll_interval=0.05, once=True))
+        assert attempted == 3 and sender.sent == ["good@a.com"]
+        assert database.get_lead(good)['outreach_status'] == 'Sent'
+        # A refused address fails for good; a dropped connection is retried later
+        assert database.get_lead(bad)['outreach_status'] == 'Failed'
+        flaky = outbox.get_message(outbox.outreach_key("flaky@c.com"))
+        assert flaky['status'] == 'queued' and flaky['send_after'] > time.time()
+        assert outbox.outbox_stats()['failed'] == 1
+
+        # Retried emails go out on a later run; nothing is sent twice
+        assert outbox.retry_failed() == 1
+        conn = database.get_connection()
+        conn.execute("UPDATE outbox SET send_after = 0")
+        conn.execute("DELETE FROM outbox_domains")
+        conn.commit()
+        conn.close()
+        asyncio.run(run_outbox_worker(sender=sender, poll_interval=0.05, once=True))
+        assert sorted(sender.sent) == ["flaky@c.com", "good@a.com"]
+        assert outbox.outbox_stats()['sent'] == 2
+
+if __name__ == "__main__":
+    try:
+        test_enqueue_and_lease()
+        test_worker_delivers()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import analysis.performance_analyzer as performance_analyzer
+from analysis.performance_analyzer import PerformanceAnalyzer
+from utils.http import decode_body
+from benchmarks.site_farm import SiteFarm, SiteHandler, build_corpus
+
+class KeepAliveHandler(SiteHandler):
+    protocol_version = "HTTP/1.1"
+
+def test_capped_fetch():
+    print("Testing streamed, capped page fetch and its timing breakdown...")
+    corpus = build_corpus(6, seed=4)
+    small = next(site for site in corpus if site["kind"] == "small")
+    large = next(site for site in corpus if site["kind"] == "large")
+    redirect = next(site for site in corpus if site["kind"] == "redirect")
+    farm = SiteFarm([small, large, redirect])
+    farm.RequestHandlerClass = KeepAliveHandler
+    farm.start()
+    original = performance_analyzer.PAGE_MAX_BYTES
+    performance_analyzer.PAGE_MAX_BYTES = 64 * 1024
+    try:
+        analyzer = PerformanceAnalyzer()
+
+        data, page = analyzer.analyze_page(farm.url(small))
+        assert not data["truncated"] and "<html" in page["text"].lower()
+        assert page["encoding"] == "utf-8" and page["content"].decode() == page["text"]
+        assert set(data["timing"]) == {"redirects", "dns", "connect", "tls", "ttfb", "download"}
+        # The first request opens a connection; the next one to the site reuses it
+        assert not data["connection_reused"] and data["timing"]["tls"] == 0
+        assert analyzer.analyze(farm.url(small))["connection_reused"]
+
+        # Only the cap is downloaded, but the page is scored at its declared size
+        data, page = analyzer.analyze_page(farm.url(large))
+        assert data["truncated"] and len(page["content"]) <= 64 * 1024
+        assert data["page_size_kb"] >= large["size_kb"] - 1
+
+        data = analyzer.analyze(farm.url(redirect))
+        assert data["timing"]["redirects"] > 0 and not data["truncated"]
+    finally:
+        performance_analyzer.PAGE_MAX_BYTES = original
+        farm.stop()
+
+def test_decode_body():
+    print("Testing charset resolution...")
+    cafe = "Café".encode("cp1252")
+    # Header charset first, then the page's own <meta>, then UTF-8, then detection
+    assert decode_body(cafe, "text/html; charset=windows-1252") == ("Café", "cp1252")
+    assert decode_body(b'<meta charset="iso-8859-1">' + cafe)[1] == "cp1252"
+    assert decode_body(b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">')[1] == "shift_jis"
+    assert decode_body("Café".encode(), "text/html") == ("Café", "utf-8")
+    assert decode_body("Привет, как дела у вас сегодня?".encode("cp1251") * 10)[1] == "cp1251"
+    # Unknown labels are ignored; a capped body cut inside a character is still UTF-8
+    assert decode_body(b"ok", "text/html; charset=bogus") == ("ok", "utf-8")
+    assert decode_body("Caf\u00e9".encode()[:-1])[1] == "utf-8"
+
+if __name__ == "__main__":
+    try:
+        test_decode_body()
+        test_capped_fetch()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,62 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from utils import profiling
+from utils.profiling import profile_run, maybe_profile, set_profile_rate
+
+def busy_worker(seconds):
+    end = time.perf_counter() + seconds
+    blocks = []
+    while time.perf_counter() < end:
+        blocks.append(bytearray(1024))
+    return blocks
+
+def test_profile_run():
+    print("Testing audit profiles...")
+    with tempfile.TemporaryDirectory() as directory:
+        async def audit():
+            # Work in executor threads must show up, as the sync analyzers run there
+            return await asyncio.to_thread(busy_worker, 0.3)
+
+        with profile_run("lead_7", directory=directory) as result:
+            kept = asyncio.run(audit())
+        assert kept and sorted(os.listdir(directory)) == sorted(
+            os.path.basename(result[key]) for key in ("allocations", "folded"))
+
+        with open(result["folded"], encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        busy = [line for line in lines if "busy_worker (test_profiling.py:" in line]
+        assert busy and busy[0].startswith("asyncio_")  # root frame is the thread name
+
+        with open(result["allocations"], encoding="utf-8") as f:
+            report = f.read()
+        assert report.startswith("Profile lead_7:") and "test_profiling.py:" in report
+
+def test_sampling_rate():
+    print("Testing profile sampling...")
+    try:
+        set_profile_rate(0)
+        with maybe_profile("off") as result:
+            assert result is None
+        set_profile_rate(100)
+        assert all(profiling.should_profile() for _ in range(100))
+        set_profile_rate(25)
+        share = sum(profiling.should_profile() for _ in range(4000)) / 4000
+        assert 0.18 < share < 0.32
+    finally:
+        set_profile_rate(0)
+
+if __name__ == "__main__":
+    try:
+        test_profile_run()
+        test_sampling_rate()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
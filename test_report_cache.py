@@ -0,0 +1,54 @@
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+from storage.report_cache import ReportCache, report_key
+
+LEAD = {"id": 1, "business_name": "Test Biz", "category": "Dentist", "website": "http://testbiz.com"}
+AUDIT = {"performance_score": 80, "seo_score": 70, "ux_score": 60, "mobile_score": 50, "overall_score": 65, "audit_id": 3}
+
+def test_report_keys():
+    print("Testing report cache keys...")
+    key = report_key(LEAD, AUDIT, "Fix the title")
+    # Key order and outreach state do not matter; content does
+    assert report_key(dict(reversed(list(LEAD.items()))), AUDIT, "Fix the title") == key
+    assert report_key(dict(LEAD, outreach_status="Sent"), AUDIT, "Fix the title") == key
+    assert report_key(LEAD, dict(AUDIT, seo_score=71), "Fix the title") != key
+    assert report_key(LEAD, AUDIT, "Fix the meta description") != key
+
+def test_report_cache_lru():
+    print("Testing report cache hits and eviction...")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ReportCache(tmp, max_bytes=2500, memory_items=2)
+        pdf = cache.get_or_render(LEAD, AUDIT, "Fix the title")
+        assert pdf.startswith(b"%PDF")
+        assert os.path.exists(os.path.join(tmp, report_key(LEAD, AUDIT, "Fix the title") + ".pdf"))
+
+        # A fresh cache on the same directory serves the bytes from disk
+        assert ReportCache(tmp).get_or_render(LEAD, AUDIT, "Fix the title") == pdf
+
+        cache.put_suggestions(LEAD, AUDIT, "Fix the title")
+        assert cache.get_suggestions(LEAD, AUDIT) == "Fix the title"
+        assert cache.get_suggestions(LEAD, dict(AUDIT, audit_id=4)) is None
+
+        # Past the size cap, least recently used files go first
+        lru_dir = os.path.join(tmp, "lru")
+        cache = ReportCache(lru_dir, max_bytes=2500, memory_items=1)
+        for i in range(2):
+            cache.put_pdf(f"k{i}", b"x" * 1000)
+            os.utime(os.path.join(lru_dir, f"k{i}.pdf"), (i + 1, i + 1))
+        assert cache.get_pdf("k0") == b"x" * 1000  # k0 used again, so k1 is now the oldest
+        cache.put_pdf("k2", b"x" * 1000)
+        remaining = sorted(os.listdir(lru_dir))
+        assert remaining == ["k0.pdf", "k2.pdf"]
+
+if __name__ == "__main__":
+    try:
+        test_report_keys()
+        test_report_cache_lru()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,83 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+import pipeline.scrape as scrape_pipeline
+from storage.scrape_cache import scrape_with_cache, lead_key
+
+def make_leads(start, count):
+    return [{"business_name": f"Biz {i}", "website": f"http://biz{i}.com"} for i in range(start, start + count)]
+
+def test_scrape_cache_top_up():
+    print("Testing scrape cache top-up...")
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        database.init_db()
+        calls = []
+
+        def scrape(count, skip):
+            calls.append((count, len(skip)))
+            return make_leads(len(skip), count)
+
+        first = asyncio.run(scrape_with_cache("maps", "Dentist ", "New York", 40, scrape))
+        assert len(first) == 40
+
+        # Same query, normalized keyword: served from the cache without scraping
+        again = asyncio.run(scrape_with_cache("maps", "dentist", "new york", 30, scrape))
+        assert len(again) == 30 and len(calls) == 1
+
+        # Deeper request only fetches the difference
+        more = asyncio.run(scrape_with_cache("maps", "Dentist", "New York", 60, scrape))
+        assert calls[-1] == (20, 40)
+        assert len({lead_key(l) for l in more}) == 60
+
+        # An expired entry is scraped again from scratch
+        asyncio.run(scrape_with_cache("maps", "Dentist", "New York", 10, scrape, ttl=-1))
+        assert calls[-1] == (10, 0)
+
+        # A failed (empty) scrape is not cached as an exhausted query
+        blocked = lambda count, skip: calls.append((count, len(skip))) or []
+        assert asyncio.run(scrape_with_cache("justdial", "Gym", "Delhi", 10, blocked)) == []
+        assert len(asyncio.run(scrape_with_cache("justdial", "Gym", "Delhi", 10, scrape))) == 10
+        assert calls[-1] == (10, 0)
+
+class FakeJustDial:
+    def scrape(self, keyword, location, total=10, on_lead=None, skip=None):
+        leads = [dict(lead, source="JustDial") for lead in make_leads(0, total) if lead_key(lead) not in (skip or ())]
+        for lead in leads:
+            if on_lead:
+                on_lead(lead)
+        return leads
+
+def test_repeated_scrape_keeps_leads():
+    print("Testing that a repeated scrape does not duplicate leads...")
+    original_db, original_scraper = database.DB_PATH, scrape_pipeline.JustDialScraper
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        scrape_pipeline.JustDialScraper = FakeJustDial
+        try:
+            database.init_db()
+            first = asyncio.run(scrape_pipeline.run_scraper("justdial", "Dentist", "Delhi", 5))
+            # Served from the scrape cache: the stored leads are returned, not inserted again
+            again = asyncio.run(scrape_pipeline.run_scraper("justdial", "Dentist", "Delhi", 5))
+            fresh = asyncio.run(scrape_pipeline.run_scraper("justdial", "Dentist", "Delhi", 5, use_cache=False))
+            conn = database.get_connection()
+            count = conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+            conn.close()
+            assert count == 5 and sorted(first) == sorted(again) == sorted(fresh)
+        finally:
+            database.DB_PATH = original_db
+            scrape_pipeline.JustDialScraper = original_scraper
+
+if __name__ == "__main__":
+    try:
+        test_scrape_cache_top_up()
+        test_repeated_scrape_keeps_leads()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,66 @@
+import sys
+import os
+import subprocess
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Import-time budget per command (ms, on top of bare interpreter startup) and
+# modules that command must never load. Cron runs `init` and `report` constantly.
+HEAVY = ["playwright", "reportlab", "google.generativeai", "bs4", "streamlit", "requests"]
+BUDGETS = {
+    ("--help",): 100,
+    ("init",): 150,
+    ("queue",): 150,
+    ("outbox",): 150,
+    ("stats",): 150,
+    ("report", "--lead_id", "999999"): 150,
+}
+
+def import_profile(args, env):
+    """Runs a python command with -X importtime and returns {module: self time in us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+def test_command_import_budgets():
+    print("Testing CLI import-time budgets...")
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, DB_PATH=os.path.join(tmp, "leads.db"), DAEMON_SOCKET=os.path.join(tmp, "none.sock"),
+               REPORT_OUTPUT_DIR=os.path.join(tmp, "reports"))
+    baseline = import_profile(["-c", "pass"], env)
+
+    for command, budget_ms in BUDGETS.items():
+        modules = import_profile(["main.py", *command], env)
+        loaded = [m for m in HEAVY if m in modules]
+        assert not loaded, f"`main.py {' '.join(command)}` imports {loaded}"
+        spent_ms = sum(us for name, us in modules.items() if name not in baseline) / 1000
+        print(f"main.py {' '.join(command)}: {spent_ms:.1f} ms of imports")
+        assert spent_ms < budget_ms, f"`main.py {' '.join(command)}` spent {spent_ms:.1f} ms importing (budget {budget_ms} ms)"
+
+    # Importing config must not create directories
+    assert not os.path.exists(os.path.join(tmp, "reports"))
+
+def test_cli_stages_match_queue():
+    import main
+    from storage import job_queue
+    assert main.STAGES == job_queue.STAGES
+
+if __name__ == "__main__":
+    try:
+        test_command_import_budgets()
+        test_cli_stages_match_queue()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
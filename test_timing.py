@@ -0,0 +1,86 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+from storage.timings import save_timings, get_timings, timing_stats
+from utils.timing import TimingRecorder, span, percentile
+from utils.http import get_session
+from benchmarks.site_farm import SiteFarm, build_corpus
+
+def test_spans():
+    print("Testing timing spans...")
+    # Nothing is recorded without an active recorder
+    with span("ignored") as unrecorded:
+        unrecorded.bytes = 10
+
+    recorder = TimingRecorder()
+
+    def fetch():
+        with span("Inner", kind="http"):
+            pass
+
+    async def audit():
+        with span("Outer", kind="analyzer"):
+            # Spans follow the audit into worker threads
+            await asyncio.to_thread(fetch)
+        try:
+            with span("Broken", kind="analyzer"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+
+    with recorder.activate():
+        asyncio.run(audit())
+    # Spans are recorded as they finish
+    assert [s.name for s in recorder.spans] == ["Inner", "Outer", "Broken"]
+    assert recorder.spans[2].error == "ValueError" and recorder.spans[1].duration >= recorder.spans[0].duration
+
+    assert percentile([5, 1, 4, 2, 3], 95) == 5 and percentile([5, 1, 4, 2, 3], 50) == 3
+    assert percentile([], 50) == 0.0
+
+def test_http_timings_saved():
+    print("Testing HTTP timings and stats...")
+    corpus = build_corpus(5)
+    farm = SiteFarm(corpus).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "leads.db")
+        database.init_db()
+        try:
+            recorder = TimingRecorder()
+            with recorder.activate():
+                for site in corpus:
+                    with span("Fetch", kind="analyzer"):
+                        get_session().get(farm.url(site), timeout=5)
+                get_session().head(farm.url(corpus[0]) + "missing", timeout=5)
+        finally:
+            farm.stop()
+
+        http = [s for s in recorder.spans if s.kind == "http"]
+        assert len(http) == 6 and http[0].detail == "127.0.0.1" and http[0].bytes > 0
+        assert http[-1].error == "HTTP 404"
+
+        lead_id = database.insert_lead({"business_name": "Timed", "website": farm.url(corpus[0])})
+        save_timings(1, lead_id, recorder.spans)
+        assert len(get_timings(1)) == 11
+
+        stats = {s["name"]: s for s in timing_stats()}
+        assert stats["http.get"]["count"] == 5 and stats["http.head"]["top_errors"] == [("HTTP 404", 1)]
+        assert stats["Fetch"]["p95_ms"] >= stats["Fetch"]["p50_ms"] > 0
+        assert [s["name"] for s in timing_stats(kind="analyzer")] == ["Fetch"]
+
+        # Deleting the lead removes its timings
+        database.delete_leads([lead_id])
+        assert get_timings(1) == []
+
+if __name__ == "__main__":
+    try:
+        test_spans()
+        test_http_timings_saved()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
@@ -0,0 +1,154 @@
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add parent directory to path
+sys.path.append(os.getcwd())
+
+import storage.database as database
+from analysis.site_triage import SiteTriage
+from pipeline.triage import triage_leads, check_lead_site
+
+PAGES = {
+    "/live": (200, "<html><head><title>Smile Dental</title></head><body><h1>Book a visit</h1>"
+                   "<p>Our new clinic is coming soon to the high street.</p>" + "<p>Opening hours</p>" * 300 + "</body></html>"),
+    "/parked": (200, "<html><head><title>example.com is for sale!</title></head><body>Buy this domain</body></html>"),
+    "/default": (200, "<html><body><h1>Welcome to nginx!</h1><p>If you see this page...</p></body></html>"),
+    "/error": (500, "<html><body>Internal Server Error</body></html>"),
+    "/blocked": (403, "<html><body>Checking your browser</body></html>"),
+}
+
+class TriageHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/social":
+            self.send_response(301)
+            self.send_header("Location", "https://www.facebook.com/smiledental")
+            self.end_headers()
+            return
+        status, body = PAGES[self.path]
+        body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TriageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def closed_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_classify():
+    print("Testing site triage...")
+    server, base = start_server()
+    try:
+        triage = SiteTriage()
+
+        async def check_all():
+            urls = [f"{base}{path}" for path in ("/live", "/parked", "/default", "/error", "/blocked", "/social")]
+            urls += ["https://facebook.com/smiledental", "N/A", f"http://127.0.0.1:{closed_port()}/",
+                     "http://no-such-host.invalid/"]
+            return await asyncio.gather(*(triage.check(url) for url in urls))
+
+        results = [r["status"] for r in asyncio.run(check_all())]
+        assert results == ["live", "parked", "parked", "http_error", "live", "social",
+                           "social", "no_website", "unreachable", "dns_failed"], results
+    finally:
+        server.shutdown()
+
+def test_triage_leads():
+    print("Testing batch triage of leads...")
+    server, base = start_server()
+    original_db = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "test.db")
+        try:
+            database.init_db()
+            live = database.insert_lead({"business_name": "Live", "website": f"{base}/live"})
+            parked = database.insert_lead({"business_name": "Parked", "website": f"{base}/parked"})
+            none = database.insert_lead({"business_name": "None", "website": None})
+
+            seen = []
+            statuses = asyncio.run(triage_leads(concurrency=2, progress=lambda done, total: seen.append((done, total))))
+            assert statuses == {live: "live", parked: "parked", none: "no_website"}
+            assert seen[-1] == (3, 3)
+            lead = database.get_lead(parked)
+            assert lead["site_status"] == "parked" and "for sale" in lead["site_detail"]
+
+            # Fresh results are reused; --recheck checks again
+            server.shutdown()
+            server.server_close()
+            assert asyncio.run(triage_leads([live]))[live] == "live"
+            assert asyncio.run(triage_leads([live], recheck=True))[live] == "unreachable"
+
+            # The audit gate uses the stored result
+            conn = database.get_connection()
+            row = conn.execute("SELECT * FROM leads WHERE id = ?", (parked,)).fetchone()
+            conn.close()
+            assert asyncio.run(check_lead_site(row)) is False
+        finally:
+            database.DB_PATH = original_db
+
+def get_row(lead_id):
+    conn = database.get_connection()
+    row = conn.execute("SELECT * FROM leads WHERE id = ?", (lead_id,)).fetchone()
+    conn.close()
+    return row
+
+def test_transient_failures():
+    print("Testing triage retry age and --recheck...")
+    server, base = start_server()
+    original_db = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "test.db")
+        try:
+            database.init_db()
+            error = database.insert_lead({"business_name": "Error", "website": f"{base}/error"})
+            down = database.insert_lead({"business_name": "Down", "website": f"http://127.0.0.1:{closed_port()}/"})
+            parked = database.insert_lead({"business_name": "Parked", "website": f"{base}/parked"})
+            live = database.insert_lead({"business_name": "Live", "website": f"{base}/live"})
+            new = database.insert_lead({"business_name": "New", "website": f"{base}/live"})
+            asyncio.run(triage_leads([error, down, parked, live]))
+            assert database.auditable_lead_ids() == [live, new]
+
+            # Two hours on, the transient failures (HTTP 5xx, unreachable) are due again; parked is not
+            conn = database.get_connection()
+            conn.execute("UPDATE leads SET site_checked_at = ?", (time.time() - 2 * 3600,))
+            conn.commit()
+            conn.close()
+            assert database.auditable_lead_ids() == [error, down, live, new]
+            asyncio.run(triage_leads([error, parked]))
+            assert time.time() - get_row(error)["site_checked_at"] < 60
+            assert time.time() - get_row(parked)["site_checked_at"] > 3600
+
+            # An explicit audit can force a new check of a stored failure
+            database.save_site_statuses([(live, {"status": "unreachable", "detail": "timed out"})])
+            assert asyncio.run(check_lead_site(get_row(live))) is False
+            assert asyncio.run(check_lead_site(get_row(live), recheck=True)) is True
+            assert get_row(live)["site_status"] == "live"
+        finally:
+            database.DB_PATH = original_db
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    try:
+        test_classify()
+        test_triage_leads()
+        test_transient_failures()
+        print("All tests passed!")
+    except Exception as e:
+        print(f"Test failed: {e}")
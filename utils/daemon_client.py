@@ -0,0 +1,61 @@
+import json
+import socket
+from config import DAEMON_SOCKET, DAEMON_PORT, DAEMON_USE_UNIX_SOCKET, DAEMON_TIMEOUT
+
+class DaemonError(Exception):
+    """The daemon received the request but the job failed."""
+
+class DaemonClient:
+    """
+    Thin client for the audit daemon started with `main.py serve`.
+
+    Only uses the standard library so callers pay nothing to import it. Each call
+    sends one JSON line ({"method": ..., "params": {...}}) and reads one JSON line back.
+    """
+
+    def __init__(self, socket_path=DAEMON_SOCKET, port=DAEMON_PORT, timeout=DAEMON_TIMEOUT):
+        self.socket_path = socket_path
+        self.port = port
+        self.timeout = timeout
+
+    def _connect(self, timeout):
+        if DAEMON_USE_UNIX_SOCKET:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+            return sock
+        return socket.create_connection(("127.0.0.1", self.port), timeout=timeout)
+
+    def call(self, method, timeout=None, **params):
+        """Runs `method` on the daemon. Raises OSError if it is unreachable, DaemonError if the job failed."""
+        sock = self._connect(timeout or self.timeout)
+        try:
+            sock.sendall(json.dumps({"method": method, "params": params}).encode("utf-8") + b"\n")
+            line = sock.makefile("rb").readline()
+        finally:
+            sock.close()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise DaemonError(response["error"])
+        return response["result"]
+
+    def is_running(self):
+        try:
+            self.call("ping", timeout=1)
+            return True
+        except (OSError, ValueError, DaemonError):
+            return False
+
+    def audit(self, lead_id, with_ai=True, tier="deep", recheck=False):
+        """Audits a lead with the daemon's warm pools. Returns the audit id, or None."""
+        return self.call("audit", lead_id=lead_id, with_ai=with_ai, tier=tier, recheck=recheck)["audit_id"]
+
+    def report(self, lead_id, suggestions=None):
+        """Renders a lead's PDF report. Returns the file path, or None."""
+        return self.call("report", lead_id=lead_id, suggestions=suggestions)["path"]
+
+    def generate_email(self, lead_id, template):
+        """Writes the outreach email for a lead's latest audit."""
+        return self.call("email", lead_id=lead_id, template=template)["body"]
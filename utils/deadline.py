@@ -0,0 +1,65 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+# Overall time budget of one unit of work (one audit).
+#
+#   deadline = Deadline(90)
+#   with deadline.activate():
+#       await asyncio.wait_for(step(), deadline.share(weight, pending_weight))
+#
+# Like the timing recorder, the active deadline lives in a context variable, so it
+# follows the audit into asyncio.to_thread workers. The shared HTTP session clamps
+# every request's timeout to the time left (clamp_timeout), so an analyzer that was
+# given up on stops at its next request instead of running out its own timeouts.
+# Only one deadline is active at a time: an audit step activates its own share of
+# the audit's deadline, which is never later than the audit's.
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """Raised for work started after the active deadline has passed."""
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def share(self, weight, pending_weight):
+        """
+        Time for a step of `weight` when steps weighing `pending_weight` (this one
+        included) are still to run: its proportional part of the time left, so
+        time saved by fast steps goes to the ones after them.
+        """
+        if pending_weight <= 0:
+            return self.remaining()
+        return self.remaining() * min(1.0, weight / pending_weight)
+
+    @contextmanager
+    def activate(self):
+        token = _deadline.set(self)
+        try:
+            yield self
+        finally:
+            _deadline.reset(token)
+
+def clamp_timeout(timeout):
+    """
+    `timeout` (seconds, a (connect, read) tuple or None) limited to the active
+    deadline. Raises DeadlineExceeded if the deadline has already passed.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return timeout
+    left = deadline.remaining()
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded")
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    return left if timeout is None else min(timeout, left)
@@ -1,46 +1,275 @@
+import asyncio
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+from utils import metrics
+from config import (
+    SMTP_STARTTLS, SMTP_TIMEOUT, SMTP_POOL_SIZE, SMTP_MAX_PER_CONNECTION, SMTP_RATE_PER_MINUTE, SMTP_IDLE_CHECK
+)
+
+def _connection_lost(error):
+    """True for errors after which the message should be retried on a new connection."""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421  # server closing the connection
+    # SMTPException subclasses OSError; only socket-level errors mean the connection is gone
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+# Start of the error message when the connection was lost after DATA: the server may
+# have the message, so the outbox must not send it again
+UNCONFIRMED = "Delivery unconfirmed"
+
+class RateLimiter:
+    """Spaces calls at least 60/per_minute seconds apart across threads (0 = no limit)."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class _Connection:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
 
 class EmailSender:
-    def __init__(self, smtp_server=None, smtp_port=None, smtp_user=None, smtp_password=None):
+    """
+    Sends email over a small pool of authenticated SMTP connections.
+
+    Connections are opened on first use (connect, STARTTLS, login) and kept open
+    between messages, so a campaign pays the handshake once per connection instead
+    of once per email. A connection dropped before DATA is reopened and the message
+    retried; after DATA the server may already have it, so the send fails instead
+    and is never repeated. Connections are recycled after SMTP_MAX_PER_CONNECTION
+    messages. Sending is spaced to at most `rate_per_minute` messages per minute.
+    Call close() (or use the sender as a context manager) when done.
+    """
+
+    def __init__(self, smtp_server=None, smtp_port=None, smtp_user=None, smtp_password=None,
+                 use_tls=SMTP_STARTTLS, pool_size=SMTP_POOL_SIZE, rate_per_minute=SMTP_RATE_PER_MINUTE,
+                 max_per_connection=SMTP_MAX_PER_CONNECTION):
         self.smtp_server = smtp_server or os.getenv("SMTP_SERVER", "smtp.gmail.com")
         self.smtp_port = int(smtp_port or os.getenv("SMTP_PORT", 587))
         self.smtp_user = smtp_user or os.getenv("SMTP_USER")
         self.smtp_password = smtp_password or os.getenv("SMTP_PASSWORD")
+        self.use_tls = use_tls
+        self.max_per_connection = max_per_connection
+        self.rate = RateLimiter(rate_per_minute)
+        self._idle = queue.LifoQueue()  # most recently used connection first
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self.connections_opened = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=SMTP_TIMEOUT)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            smtp.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            self._quit(smtp)
+            raise
+        self.connections_opened += 1
+        return _Connection(smtp)
+
+    @staticmethod
+    def _quit(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        """Takes an idle connection that is still alive, or opens a new one."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - conn.last_used < SMTP_IDLE_CHECK:
+                return conn
+            try:
+                if conn.smtp.noop()[0] == 250:
+                    return conn
+            except Exception:
+                pass
+            self._quit(conn.smtp)
+
+    def _checkin(self, conn):
+        conn.last_used = time.monotonic()
+        if conn.sent >= self.max_per_connection:
+            self._quit(conn.smtp)
+        else:
+            self._idle.put(conn)
+
+    def _message(self, to_email, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.smtp_user
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg.as_string()
+
+    def _envelope(self, smtp, to_email):
+        """MAIL FROM and RCPT TO. Nothing is delivered yet, so these are safe to repeat."""
+        smtp.ehlo_or_helo_if_needed()
+        code, resp = smtp.mail(self.smtp_user)
+        if code != 250:
+            self._abort(smtp, code)
+            raise smtplib.SMTPSenderRefused(code, resp, self.smtp_user)
+        code, resp = smtp.rcpt(to_email)
+        if code not in (250, 251):
+            self._abort(smtp, code)
+            if code == 421:
+                raise smtplib.SMTPResponseException(code, resp)
+            raise smtplib.SMTPRecipientsRefused({to_email: (code, resp)})
+
+    def _abort(self, smtp, code):
+        # As smtplib's sendmail does: 421 means the server is closing, anything else resets the transaction
+        if code == 421:
+            smtp.close()
+            return
+        try:
+            smtp.rset()
+        except smtplib.SMTPServerDisconnected:
+            pass
+
+    def _send(self, conn, to_email, subject, body):
+        """
+        Sends one message on `conn`, reconnecting once if the server dropped it
+        before DATA. Returns the connection used.
+        """
+        text = self._message(to_email, subject, body)
+        self.rate.wait()
+        try:
+            self._envelope(conn.smtp, to_email)
+        except Exception as e:
+            if not _connection_lost(e):
+                raise
+            self._quit(conn.smtp)
+            conn = self._connect()
+            self._envelope(conn.smtp, to_email)
+        # From here the server may have accepted the message: failures are raised, not resent
+        try:
+            code, resp = conn.smtp.data(text)
+        except smtplib.SMTPResponseException:
+            raise  # the server answered, so it did not take the message
+        except OSError as e:
+            raise smtplib.SMTPException(f"{UNCONFIRMED}, connection lost during DATA: {e}") from e
+        # data() only raises for the reply to DATA itself; the final reply may still refuse the message
+        if code != 250:
+            self._abort(conn.smtp, code)
+            raise smtplib.SMTPDataError(code, resp)
+        conn.sent += 1
+        return conn
 
     def send_email(self, to_email, subject, body):
         """
         Send an email using SMTP.
-        
+
         Args:
             to_email (str): Recipient email.
             subject (str): Email subject.
             body (str): Email body (HTML or Text).
-            
+
         Returns:
             bool: True if successful, False otherwise.
             str: Error message if failed.
         """
+        return self.send_batch([(to_email, subject, body)])[0]
+
+    def send_batch(self, messages):
+        """
+        Sends several emails over one pooled connection.
+
+        Args:
+            messages (list): (to_email, subject, body) tuples.
+
+        Returns:
+            list: One (success, message) tuple per email, in order.
+        """
         if not self.smtp_user or not self.smtp_password:
-            return False, "SMTP credentials not configured."
+            metrics.EMAILS_SENT.labels("not_configured").inc(len(messages))
+            return [(False, "SMTP credentials not configured.")] * len(messages)
 
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = self.smtp_user
-            msg['To'] = to_email
-            msg['Subject'] = subject
-
-            msg.attach(MIMEText(body, 'plain'))
-
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_user, self.smtp_password)
-            text = msg.as_string()
-            server.sendmail(self.smtp_user, to_email, text)
-            server.quit()
-            
-            return True, "Email sent successfully."
-        except Exception as e:
-            return False, str(e)
+        results = []
+        with self._slots:
+            conn = None
+            for to_email, subject, body in messages:
+                try:
+                    if conn is None:
+                        conn = self._checkout()
+                    conn = self._send(conn, to_email, subject, body)
+                    results.append((True, "Email sent successfully."))
+                    if conn.sent >= self.max_per_connection:
+                        self._checkin(conn)
+                        conn = None
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Bad address: the connection is still usable
+                    results.append((False, str(e)))
+                except Exception as e:
+                    results.append((False, str(e)))
+                    if conn is not None:
+                        self._quit(conn.smtp)
+                        conn = None
+            if conn is not None:
+                self._checkin(conn)
+        for ok, _ in results:
+            metrics.EMAILS_SENT.labels("sent" if ok else "failed").inc()
+        return results
+
+    async def send_email_async(self, to_email, subject, body):
+        """send_email for async callers; the pooled connection work runs in a thread."""
+        return await asyncio.to_thread(self.send_email, to_email, subject, body)
+
+    async def send_batch_async(self, messages):
+        return await asyncio.to_thread(self.send_batch, messages)
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(conn.smtp)
+
+_sender = None
+_sender_lock = threading.Lock()
+
+def get_email_sender():
+    """
+    Returns a process-wide EmailSender using the SMTP_* environment settings, so
+    pipeline workers keep their SMTP connections open between outreach jobs.
+    """
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = EmailSender()
+        return _sender
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+import requests
+from config import (HOST_TIMEOUT_MIN, HOST_BREAKER_FAILURES, HOST_BREAKER_COOLDOWN, HOST_HEALTH_MAX_HOSTS)
+
+# Shared per-host health of the sites we fetch.
+#
+# Every GET/HEAD through the shared session (utils/http.py) reports its latency or
+# transport failure (timeout, refused or reset connection) here. From that each host
+# gets:
+#   - a latency EWMA and deviation, giving an adaptive timeout like TCP's RTO
+#     (latency + 4 * deviation, at least HOST_TIMEOUT_MIN, never above the caller's);
+#   - a circuit breaker: after HOST_BREAKER_FAILURES failures in a row, requests to the
+#     host fail fast with HostUnavailable for HOST_BREAKER_COOLDOWN seconds, then one
+#     probe request is let through ("half-open"); its outcome closes or re-opens it.
+# A host that has only failed so far gets HOST_TIMEOUT_MIN, so a slow site costs one
+# full timeout and a short one, instead of a full timeout per fetch.
+
+# Weight of a new sample in the EWMAs
+ALPHA = 0.25
+# Latency samples needed before timeouts adapt
+MIN_SAMPLES = 3
+
+class HostUnavailable(requests.exceptions.ConnectionError):
+    """Raised without a request while a host's circuit breaker is open."""
+
+class HostHealth:
+    __slots__ = ("latency", "deviation", "samples", "error_rate", "failures", "opened_at")
+
+    def __init__(self):
+        self.latency = None
+        self.deviation = 0.0
+        self.samples = 0
+        self.error_rate = 0.0
+        self.failures = 0       # consecutive
+        self.opened_at = None   # breaker open since (monotonic), None when closed
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class HostTracker:
+    def __init__(self, max_hosts=HOST_HEALTH_MAX_HOSTS):
+        self.max_hosts = max_hosts
+        self._hosts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, host):
+        # Least recently used hosts are forgotten (triage touches thousands of sites)
+        health = self._hosts.get(host)
+        if health is None:
+            health = self._hosts[host] = HostHealth()
+            if len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host)
+        return health
+
+    def acquire(self, host):
+        """
+        Call before a request to `host`. Raises HostUnavailable while its breaker
+        is open; once the cooldown is over, lets one probe through and re-arms the
+        cooldown so concurrent requests keep failing fast until the probe reports.
+        """
+        with self._lock:
+            health = self._get(host)
+            if health.opened_at is None:
+                return
+            now = time.monotonic()
+            if now - health.opened_at < HOST_BREAKER_COOLDOWN:
+                raise HostUnavailable(f"{host} is unavailable ({health.failures} failed requests in a row)")
+            health.opened_at = now
+
+    def timeout_for(self, host, timeout):
+        """`timeout` (seconds, a (connect, read) tuple or None) shortened to what the host's history warrants."""
+        with self._lock:
+            health = self._get(host)
+            if health.samples >= MIN_SAMPLES:
+                adaptive = max(HOST_TIMEOUT_MIN, health.latency + 4 * health.deviation)
+            elif health.failures:
+                adaptive = HOST_TIMEOUT_MIN
+            else:
+                return timeout
+        if isinstance(timeout, tuple):
+            return tuple(adaptive if t is None else min(t, adaptive) for t in timeout)
+        return adaptive if timeout is None else min(timeout, adaptive)
+
+    def record_success(self, host, seconds):
+        with self._lock:
+            health = self._get(host)
+            if health.latency is None:
+                health.latency, health.deviation = seconds, seconds / 2
+            else:
+                health.deviation += ALPHA * (abs(seconds - health.latency) - health.deviation)
+                health.latency += ALPHA * (seconds - health.latency)
+            health.samples += 1
+            health.error_rate *= 1 - ALPHA
+            health.failures = 0
+            health.opened_at = None
+
+    def record_failure(self, host):
+        with self._lock:
+            health = self._get(host)
+            health.error_rate += ALPHA * (1 - health.error_rate)
+            health.failures += 1
+            if health.failures >= HOST_BREAKER_FAILURES:
+                health.opened_at = time.monotonic()
+
+    def health(self, host):
+        """A copy of the host's health as a dict, or None if it has not been seen."""
+        with self._lock:
+            health = self._hosts.get(host)
+            return health.as_dict() if health else None
+
+    def open_count(self):
+        with self._lock:
+            return sum(1 for health in self._hosts.values() if health.opened_at is not None)
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+_tracker = HostTracker()
+
+def get_host_tracker():
+    """Returns the process-wide HostTracker used by the shared HTTP session."""
+    return _tracker
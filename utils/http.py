@@ -0,0 +1,220 @@
+import codecs
+import re
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from utils.timing import span
+from utils.deadline import clamp_timeout
+from utils.host_health import get_host_tracker, HostUnavailable
+from utils import metrics
+from config import USER_AGENT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+
+_session = None
+_lock = threading.Lock()
+
+# Body decoding (decode_body): bytes searched for a <meta> charset, and bytes given to
+# charset detection when neither the headers nor the page name one
+SNIFF_BYTES = 4 * 1024
+DETECT_BYTES = 64 * 1024
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+# Page fetches, whose hosts' health is tracked (utils/host_health.py). API calls
+# (Gemini POSTs) keep their own timeouts and retries.
+TRACKED_METHODS = {"GET", "HEAD"}
+
+class TimedSession(requests.Session):
+    """
+    Session whose requests are recorded as "http" spans (method, host, bytes, error)
+    during an audit, with timeouts cut to what is left of the audit's deadline.
+    GETs and HEADs also go through the host's circuit breaker and adaptive timeout.
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        started = time.perf_counter()
+        parts = urlsplit(url)
+        host = f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+        tracker = get_host_tracker() if method.upper() in TRACKED_METHODS and parts.hostname else None
+        try:
+            with span(f"http.{method.lower()}", kind="http", detail=parts.hostname) as current:
+                timeout = kwargs.get("timeout")
+                if tracker:
+                    try:
+                        tracker.acquire(host)
+                    except HostUnavailable:
+                        metrics.HOST_REJECTED.inc()
+                        raise
+                    timeout = tracker.timeout_for(host, timeout)
+                kwargs["timeout"] = clamp_timeout(timeout)
+                try:
+                    response = super().request(method, url, *args, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    # A timeout cut short by the audit's deadline says nothing about the host
+                    if tracker and kwargs["timeout"] == timeout:
+                        tracker.record_failure(host)
+                    raise
+                if tracker:
+                    tracker.record_success(host, response.elapsed.total_seconds())
+                if not kwargs.get("stream"):
+                    current.bytes = len(response.content)
+                if response.status_code >= 400:
+                    current.error = f"HTTP {response.status_code}"
+                return response
+        finally:
+            metrics.FETCH_SECONDS.labels(method.upper()).observe(time.perf_counter() - started)
+
+class _PhaseTimer:
+    """
+    Connection mixin that records how long it took to set up: `phases` holds the
+    DNS, TCP connect and TLS times (s) and when the connection was ready
+    (time.perf_counter()), so a response on a reused connection can be told apart.
+    """
+    phases = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)))
+        except OSError:
+            return super()._new_conn()  # raises urllib3's own resolution error
+        resolved = time.perf_counter()
+        # Connect to the resolved addresses in turn, as urllib3 would, without resolving again
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+        connected = time.perf_counter()
+        self.phases = {"dns": resolved - started, "connect": connected - resolved, "tls": 0.0, "ready": connected}
+        return sock
+
+class _TimedHTTPConnection(_PhaseTimer, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_PhaseTimer, HTTPSConnection):
+    def connect(self):
+        super().connect()
+        if self.phases:
+            ready = time.perf_counter()
+            self.phases.update(tls=ready - self.phases["ready"], ready=ready)
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+def connection_phases(response, since):
+    """
+    DNS, connect and TLS times (s) of the connection `response` (a streamed one,
+    still holding its connection) arrived on, if it was opened after `since`
+    (time.perf_counter()); None when it was reused from the pool or is unknown.
+    """
+    connection = getattr(response.raw, "connection", None)
+    phases = getattr(connection, "phases", None)
+    if not phases or phases["ready"] < since:
+        return None
+    return {name: phases[name] for name in ("dns", "connect", "tls")}
+
+def _codec(name):
+    """Python's name for a charset label, or None if unknown. Latin-1 and ASCII labels mean windows-1252, as in browsers."""
+    try:
+        name = codecs.lookup(name.decode("ascii") if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+    return "cp1252" if name in ("latin-1", "iso8859-1", "ascii") else name
+
+def _declared_encoding(content, content_type):
+    """The charset a body declares: its byte order mark, the Content-Type charset or a <meta> charset."""
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding
+    match = _HEADER_CHARSET.search(content_type or "")
+    if match and _codec(match.group(1)):
+        return _codec(match.group(1))
+    match = _META_CHARSET.search(content[:SNIFF_BYTES])
+    if match and _codec(match.group(1)):
+        # A page that could be read this far is not UTF-16, whatever it says
+        return "utf-8" if _codec(match.group(1)).startswith("utf-16") else _codec(match.group(1))
+    return None
+
+def decode_body(content, content_type=None):
+    """
+    Decodes a response body once, as (text, encoding). Use instead of response.text.
+
+    The charset is the declared one (BOM, Content-Type, then a <meta> charset in the
+    first SNIFF_BYTES), else UTF-8 if the body is valid UTF-8, and only then what
+    detection makes of the first DETECT_BYTES (windows-1252 if it cannot tell).
+    """
+    encoding = _declared_encoding(content, content_type)
+    if encoding is None:
+        try:
+            return content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError as e:
+            # A capped body may end partway through a character
+            if e.reason == "unexpected end of data":
+                encoding = "utf-8"
+            else:
+                from requests.compat import chardet
+                detected = chardet.detect(content[:DETECT_BYTES])["encoding"] if chardet else None
+                encoding = (detected and _codec(detected)) or "cp1252"
+    return content.decode(encoding, errors="replace"), encoding
+
+def response_text(response):
+    """The decoded body of a (non-streamed) response, without requests' whole-body charset detection."""
+    return decode_body(response.content, response.headers.get("Content-Type"))[0]
+
+def _host_pools():
+    """The shared session's per-host urllib3 pools (for the pool gauges)."""
+    if _session is None:
+        return []
+    pools = []
+    for adapter in {id(a): a for a in _session.adapters.values()}.values():
+        container = adapter.poolmanager.pools
+        pools.extend(pool for pool in (container.get(key) for key in container.keys()) if pool is not None)
+    return pools
+
+def _connections_in_use():
+    # A pool's queue holds its idle connections; whatever is missing is checked out
+    return sum(pool.pool.maxsize - pool.pool.qsize() for pool in _host_pools() if pool.pool is not None)
+
+metrics.HTTP_CONNECTIONS_IN_USE.set_function(_connections_in_use)
+metrics.HTTP_HOST_POOLS.set_function(lambda: len(_host_pools()))
+metrics.HOSTS_UNAVAILABLE.set_function(lambda: get_host_tracker().open_count())
+
+def get_session():
+    """
+    Returns the process-wide requests.Session.
+
+    Sharing one session keeps TCP/TLS connections alive between analyzers that hit
+    the same site, and between Gemini calls, instead of handshaking on every request.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = TimedSession()
+            adapter = _TimedAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT})
+            _session = session
+        return _session
@@ -0,0 +1,270 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process metrics in the Prometheus text format, for long-running workers
+# (main.py worker/serve/outbox --metrics-port). Updating a metric is a dict lookup
+# plus a short lock, so it is safe in hot paths; gauges that are costly to keep
+# current (queue depth, HTTP pool usage) are computed by a function when scraped.
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def labels(self, *values):
+        """The child metric for these label values (cache it in hot loops)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items(), key=lambda item: tuple(map(str, item[0])))
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+class Counter(_Metric):
+    """Monotonic count, e.g. emails sent."""
+    kind = "counter"
+    _new_child = staticmethod(_Value)
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}" for values, child in self._items()]
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, e.g. open browser contexts. With set_function the
+    value is computed when scraped: fn() returns a number, or {label values: number}.
+    """
+    kind = "gauge"
+    _new_child = staticmethod(_Value)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._function = None
+
+    def set_function(self, fn):
+        self._function = fn
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def track_inprogress(self):
+        return self.labels().track_inprogress()
+
+    def samples(self):
+        if self._function is None:
+            items = [(values, child.value) for values, child in self._items()]
+        else:
+            try:
+                value = self._function()
+            except Exception:
+                return []  # e.g. database not initialised yet; never break the endpoint
+            items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(value)}" for values, value in items]
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+class Histogram(_Metric):
+    """Distribution of durations in seconds, e.g. fetch latency."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self):
+        lines = []
+        for values, child in self._items():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+def start_metrics_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Serves `registry` at http://host:port/metrics from a daemon thread. Returns the server."""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+# Pipeline metrics. Label values are kept to small fixed sets (no URLs or lead ids).
+LEADS_SCRAPED = Counter("auditor_leads_scraped_total", "Leads collected by the scrapers", ["source"])
+TRIAGE = Counter("auditor_triage_total", "Lead websites triaged before auditing, by outcome", ["status"])
+AUDITS = Counter("auditor_audits_total", "Audits finished", ["status"])
+ANALYZER_RUNS = Counter("auditor_analyzer_runs_total", "Analyzer runs by outcome", ["analyzer", "outcome"])
+ANALYZER_SECONDS = Histogram("auditor_analyzer_seconds", "Time per analyzer run", ["analyzer"])
+GEMINI_CALLS = Counter("auditor_gemini_calls_total", "Gemini API calls by client and outcome", ["client", "outcome"])
+GEMINI_TOKENS = Counter("auditor_gemini_tokens_total", "Gemini tokens used", ["client", "direction"])
+EMAILS_SENT = Counter("auditor_emails_total", "Outreach emails by outcome", ["outcome"])
+FETCH_SECONDS = Histogram("auditor_fetch_seconds", "HTTP request latency (shared session), body included", ["method"])
+RENDER_SECONDS = Histogram("auditor_render_seconds", "Browser page loads and PDF renders", ["kind"])
+AI_SECONDS = Histogram("auditor_ai_seconds", "Gemini request latency", ["client"])
+QUEUE_DEPTH = Gauge("auditor_queue_depth", "Queued pipeline jobs per stage", ["stage"])
+OUTBOX_DEPTH = Gauge("auditor_outbox_emails", "Outbox emails per status", ["status"])
+BROWSER_CONTEXTS = Gauge("auditor_browser_contexts_open", "Open Playwright browser contexts")
+HTTP_CONNECTIONS_IN_USE = Gauge("auditor_http_connections_in_use", "Connections checked out of the shared HTTP pool")
+HTTP_HOST_POOLS = Gauge("auditor_http_host_pools", "Per-host connection pools held by the shared HTTP session")
+HOSTS_UNAVAILABLE = Gauge("auditor_hosts_unavailable", "Hosts whose circuit breaker is open")
+HOST_REJECTED = Counter("auditor_host_rejected_total", "Requests failed fast by an open host circuit breaker")
+
+@contextmanager
+def gemini_call(client):
+    """
+    Times one Gemini request and counts it. Assign the HTTP response to the
+    yielded dict's "response" key; anything but a 200 counts as an error.
+    """
+    call = {"response": None}
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        AI_SECONDS.labels(client).observe(time.perf_counter() - started)
+        response = call["response"]
+        ok = response is not None and response.status_code == 200
+        GEMINI_CALLS.labels(client, "ok" if ok else "error").inc()
+
+def count_gemini_tokens(client, result):
+    """Adds the usageMetadata of a generateContent response to the token counter."""
+    usage = result.get("usageMetadata") or {}
+    if usage.get("promptTokenCount"):
+        GEMINI_TOKENS.labels(client, "prompt").inc(usage["promptTokenCount"])
+    if usage.get("candidatesTokenCount"):
+        GEMINI_TOKENS.labels(client, "output").inc(usage["candidatesTokenCount"])
@@ -0,0 +1,164 @@
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from config import BASE_DIR, PROFILE_DIR, PROFILE_INTERVAL
+
+# Wall-clock profiles of single audits (`main.py analyze --profile`,
+# `main.py worker --stage audit --profile 10`).
+#
+# A sampler thread reads every thread's stack (sys._current_frames) every
+# PROFILE_INTERVAL seconds, so time spent waiting on sockets, Playwright or the
+# event loop shows up next to CPU work, including the analyzers that run in
+# asyncio.to_thread workers (which cProfile would miss). Stacks are written in the
+# folded format ("frame;frame;frame count") read by flamegraph.pl and speedscope.
+# tracemalloc runs alongside and the largest allocations are written next to it.
+#
+# Samples cover the whole process: with several audits running at once their stacks
+# mix, so profile with --concurrency 1 when a clean picture matters.
+
+TOP_ALLOCATIONS = 25
+
+_rate = 0.0
+_tracing = 0
+_tracing_lock = threading.Lock()
+
+def set_profile_rate(percent):
+    """Profile `percent` % of the audits this process runs (0 turns profiling off)."""
+    global _rate
+    _rate = max(0.0, min(100.0, float(percent or 0)))
+
+def should_profile():
+    return _rate >= 100 or (_rate > 0 and random.random() * 100 < _rate)
+
+def _frame_label(code):
+    path = code.co_filename
+    if path.startswith(BASE_DIR):
+        path = os.path.relpath(path, BASE_DIR)
+    else:
+        path = "/".join(path.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+# Threads parked waiting for work (idle executor workers, the child watcher of the
+# Playwright driver) would otherwise dominate a wall-clock profile
+_IDLE_FRAMES = {
+    ("_worker", os.path.join("concurrent", "futures", "thread.py")),
+    ("_do_waitpid", os.path.join("asyncio", "unix_events.py")),
+}
+
+def _is_idle(frame):
+    code = frame.f_code
+    return any(code.co_name == name and code.co_filename.endswith(path) for name, path in _IDLE_FRAMES)
+
+class Sampler:
+    """Collects folded stacks of all threads from a background thread."""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def _start_tracemalloc():
+    global _tracing
+    with _tracing_lock:
+        if _tracing == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing += 1
+    tracemalloc.reset_peak()
+    return tracemalloc.take_snapshot()
+
+def _stop_tracemalloc():
+    global _tracing
+    snapshot = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    with _tracing_lock:
+        _tracing -= 1
+        if _tracing == 0:
+            tracemalloc.stop()
+    return snapshot, peak
+
+def _allocation_report(name, seconds, samples, before, after, peak):
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+              tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    diffs = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    diffs.sort(key=lambda diff: diff.size_diff, reverse=True)
+    lines = [
+        f"Profile {name}: {seconds:.2f}s wall clock, {samples} samples, peak traced memory {peak / 1024 / 1024:.1f} MB",
+        f"Top {TOP_ALLOCATIONS} allocations still held at the end of the run (KB, blocks, location):",
+    ]
+    for diff in diffs[:TOP_ALLOCATIONS]:
+        if diff.size_diff <= 0:
+            break
+        frame = diff.traceback[0]
+        lines.append(f"{diff.size_diff / 1024:10.1f} {diff.count_diff:8} {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+@contextmanager
+def profile_run(name, directory=None):
+    """
+    Profiles the enclosed block and writes `<name>.folded` (wall-clock stacks) and
+    `<name>.alloc.txt` (tracemalloc top allocations) to `directory` (PROFILE_DIR).
+    Yields a dict that holds the two paths once the block has finished.
+    """
+    directory = directory or PROFILE_DIR
+    result = {"folded": None, "allocations": None}
+    before = _start_tracemalloc()
+    sampler = Sampler().start()
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        seconds = time.perf_counter() - started
+        sampler.stop()
+        after, peak = _stop_tracemalloc()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}")
+        result["folded"] = base + ".folded"
+        result["allocations"] = base + ".alloc.txt"
+        with open(result["folded"], "w", encoding="utf-8") as f:
+            f.write(sampler.folded())
+        with open(result["allocations"], "w", encoding="utf-8") as f:
+            f.write(_allocation_report(name, seconds, sampler.samples, before, after, peak))
+        print(f"Profile written to {result['folded']} and {result['allocations']}")
+
+@contextmanager
+def maybe_profile(name):
+    """profile_run for a sampled share of runs (see set_profile_rate); otherwise a no-op."""
+    if not should_profile():
+        yield None
+        return
+    with profile_run(name) as result:
+        yield result
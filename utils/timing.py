@@ -0,0 +1,81 @@
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+
+# Lightweight spans for finding where audit time goes.
+#
+#   recorder = TimingRecorder()
+#   with recorder.activate():
+#       with span("SEO", kind="analyzer"):
+#           ...
+#
+# The active recorder lives in a context variable, so it follows the audit into
+# asyncio tasks and asyncio.to_thread calls, and concurrent audits never mix their
+# spans. Outside an active recorder span() only costs a context-variable lookup.
+
+_recorder = contextvars.ContextVar("timing_recorder", default=None)
+
+class Span:
+    __slots__ = ("name", "kind", "detail", "start", "duration", "bytes", "error")
+
+    def __init__(self, name, kind, detail=None, start=0.0):
+        self.name = name
+        self.kind = kind
+        self.detail = detail
+        self.start = start
+        self.duration = 0.0
+        self.bytes = None
+        self.error = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+# Handed out when nothing is recording; attributes set on it are ignored
+_UNRECORDED = Span("", "")
+
+class TimingRecorder:
+    """Collects the spans of one unit of work (one audit). Times are relative to its creation."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def activate(self):
+        token = _recorder.set(self)
+        try:
+            yield self
+        finally:
+            _recorder.reset(token)
+
+@contextmanager
+def span(name, kind="step", detail=None):
+    """
+    Times the enclosed block as a span of the active recorder.
+
+    Yields the Span so callers can set `bytes` (or `error` for failures they
+    handle themselves); an exception leaving the block is recorded by class
+    name and re-raised.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        yield _UNRECORDED
+        return
+    started = time.perf_counter()
+    current = Span(name, kind, detail, started - recorder.origin)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        recorder.spans.append(current)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]